@@ -0,0 +1,24 @@
+"""Бенчмарки YaTube.
+
+Запускаются из каталога с ``manage.py``::
+
+    python -m benchmarks.sqlite_writes --workers 16
+"""
+import os
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    os.environ.setdefault('SECRET_KEY', 'benchmarks')
+    import django
+
+    django.setup()
+
+
+def percentile(values, percent):
+    """Перцентиль по отсортированному списку без numpy."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = int(round(percent / 100 * (len(ordered) - 1)))
+    return ordered[index]
@@ -0,0 +1,95 @@
+"""Клиент, вызывающий WSGI-приложение напрямую, без сети."""
+import time
+from http.cookies import SimpleCookie
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import login
+from django.http import HttpRequest
+from django.test.client import RequestFactory
+from django.urls import Resolver404, resolve
+
+
+class EnvironFactory(RequestFactory):
+    """RequestFactory, который возвращает WSGI environ вместо запроса."""
+
+    def request(self, **request):
+        return self._base_environ(**request)
+
+
+class WSGIClient:
+    """Один "браузер": свои cookies, CSRF-токен и сессия.
+
+    Каждый ответ записывается в ``recorder`` как
+    ``(имя URL, статус, длительность в секундах)``.
+    """
+
+    def __init__(self, application, recorder):
+        self.application = application
+        self.recorder = recorder
+        self.factory = EnvironFactory(SERVER_NAME=server_name())
+        self.cookies = SimpleCookie()
+
+    def login(self, user):
+        engine = import_module(settings.SESSION_ENGINE)
+        request = HttpRequest()
+        request.session = engine.SessionStore()
+        login(request, user, 'django.contrib.auth.backends.ModelBackend')
+        request.session.save()
+        self.cookies[settings.SESSION_COOKIE_NAME] = (
+            request.session.session_key
+        )
+
+    def get(self, path, data=None):
+        return self.call(self.factory.get(path, data))
+
+    def post(self, path, data=None):
+        environ = self.factory.post(path, data or {})
+        token = self.cookies.get(settings.CSRF_COOKIE_NAME)
+        if token is not None:
+            environ['HTTP_X_CSRFTOKEN'] = token.value
+        return self.call(environ)
+
+    def call(self, environ):
+        if self.cookies:
+            environ['HTTP_COOKIE'] = self.cookies.output(
+                header='', sep='; '
+            ).strip()
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = headers
+
+        started = time.perf_counter()
+        body = self.application(environ, start_response)
+        try:
+            size = sum(len(chunk) for chunk in body)
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        elapsed = time.perf_counter() - started
+
+        for name, value in response['headers']:
+            if name.lower() == 'set-cookie':
+                self.cookies.load(value)
+        self.recorder.append(
+            (url_name(environ['PATH_INFO']), response['status'], elapsed)
+        )
+        response['size'] = size
+        return response
+
+
+def server_name():
+    """Имя хоста, которое пропустит проверка ALLOWED_HOSTS."""
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*' and not host.startswith('.'):
+            return host
+    return 'localhost'
+
+
+def url_name(path):
+    try:
+        return resolve(path).view_name
+    except Resolver404:
+        return 'unresolved'
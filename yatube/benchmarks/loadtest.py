@@ -0,0 +1,225 @@
+"""Нагрузочный прогон YaTube внутри процесса.
+
+Запросы идут прямо в WSGI-приложение, без сети, поэтому результат
+отражает стоимость Django-стека, шаблонов и базы::
+
+    python manage.py seed_yatube --posts 100000 --comments 200000
+    python -m benchmarks.loadtest --concurrency 8 --duration 30
+    python -m benchmarks.loadtest --mode process --mix browse=1 --json a.json
+
+Отчёт показывает пропускную способность и перцентили задержки
+для каждого имени URL.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from . import percentile, setup_django
+
+
+class Dataset:
+    """Выборка существующих объектов, по которым ходят сценарии."""
+
+    def __init__(self, sample=1000):
+        from django.contrib.auth import get_user_model
+        from django.db.models import Max, Min
+
+        from posts.models import Follow, Group, Post
+
+        User = get_user_model()
+        self.usernames = list(
+            User.objects.values_list('username', flat=True)[:sample]
+        )
+        self.groups = list(Group.objects.values_list('slug', flat=True))
+        bounds = Post.objects.aggregate(low=Min('id'), high=Max('id'))
+        self.post_range = (bounds['low'] or 0, bounds['high'] or 0)
+        reader_ids = list(Follow.objects.values_list(
+            'user_id', flat=True
+        ).distinct()[:sample])
+        self.readers = list(User.objects.filter(id__in=reader_ids)) or list(
+            User.objects.all()[:sample]
+        )
+        if not self.usernames or not self.post_range[1]:
+            raise SystemExit(
+                'База пуста: сначала выполните manage.py seed_yatube.'
+            )
+
+    def random_post(self, rng):
+        return rng.randint(*self.post_range)
+
+    def reader(self, rng):
+        return rng.choice(self.readers)
+
+
+def parse_mix(values):
+    from .scenarios import DEFAULT_MIX, SCENARIOS
+
+    if not values:
+        return DEFAULT_MIX
+    mix = {}
+    for value in values:
+        name, _, weight = value.partition('=')
+        if name not in SCENARIOS:
+            raise SystemExit(f'Неизвестный сценарий: {name}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def worker(number, mix, seed, duration, iterations):
+    """Гоняет сценарии одного виртуального пользователя."""
+    from django.core.wsgi import get_wsgi_application
+    from django.db import connections
+
+    from .client import WSGIClient
+    from .scenarios import SCENARIOS
+
+    application = get_wsgi_application()
+    dataset = Dataset()
+    rng = random.Random(seed * 1000 + number)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples = []
+    deadline = time.monotonic() + duration
+    done = 0
+    while time.monotonic() < deadline:
+        if iterations and done >= iterations:
+            break
+        name = rng.choices(names, weights)[0]
+        client = WSGIClient(application, samples)
+        try:
+            SCENARIOS[name](client, dataset, rng)
+        except Exception as error:
+            samples.append((f'{name}:exception', 599, 0.0))
+            print(f'[{number}] {name}: {error!r}', file=sys.stderr)
+        done += 1
+    connections.close_all()
+    return samples
+
+
+def _process_initializer():
+    setup_django()
+
+
+def run(concurrency, mode, mix, seed, duration, iterations):
+    if mode == 'process':
+        executor = ProcessPoolExecutor(
+            concurrency, initializer=_process_initializer
+        )
+    else:
+        executor = ThreadPoolExecutor(concurrency)
+    started = time.perf_counter()
+    with executor:
+        futures = [
+            executor.submit(worker, number, mix, seed, duration, iterations)
+            for number in range(concurrency)
+        ]
+        samples = [sample for future in futures for sample in future.result()]
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples, elapsed):
+    grouped = defaultdict(list)
+    errors = defaultdict(int)
+    for name, status, latency in samples:
+        grouped[name].append(latency)
+        if status >= 500:
+            errors[name] += 1
+    report = {}
+    for name, latencies in sorted(grouped.items()):
+        report[name] = {
+            'requests': len(latencies),
+            'errors': errors[name],
+            'rps': len(latencies) / elapsed,
+            'p50': percentile(latencies, 50) * 1000,
+            'p90': percentile(latencies, 90) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+            'max': max(latencies) * 1000,
+        }
+    return report
+
+
+def print_report(report, elapsed):
+    header = (f'{"url name":<28} {"reqs":>7} {"errs":>5} {"rps":>8} '
+              f'{"p50 ms":>8} {"p90 ms":>8} {"p99 ms":>8} {"max ms":>8}')
+    print(header)
+    print('-' * len(header))
+    for name, row in report.items():
+        print(f'{name:<28} {row["requests"]:>7} {row["errors"]:>5} '
+              f'{row["rps"]:>8.1f} {row["p50"]:>8.1f} {row["p90"]:>8.1f} '
+              f'{row["p99"]:>8.1f} {row["max"]:>8.1f}')
+    total = sum(row['requests'] for row in report.values())
+    print(f'\nВсего запросов: {total} за {elapsed:.1f} с '
+          f'({total / elapsed:.1f} rps)')
+
+
+def print_comparison(report, baseline_path):
+    with open(baseline_path) as file:
+        baseline = json.load(file)['report']
+    print(f'\nСравнение с {baseline_path} (p50 / p99, ms):')
+    for name, row in report.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        print(f'{name:<28} {old["p50"]:>8.1f} -> {row["p50"]:<8.1f} '
+              f'{old["p99"]:>8.1f} -> {row["p99"]:<8.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument(
+        '--mode', choices=('thread', 'process'), default='thread'
+    )
+    parser.add_argument(
+        '--duration', type=float, default=10,
+        help='Длительность прогона в секундах.'
+    )
+    parser.add_argument(
+        '--iterations', type=int, default=0,
+        help='Ограничить число сценариев на воркер (0 — без ограничения).'
+    )
+    parser.add_argument(
+        '--mix', action='append',
+        help='Сценарий и вес, например browse=70. Можно повторять.'
+    )
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument(
+        '--json', help='Сохранить отчёт в файл для сравнения релизов.'
+    )
+    parser.add_argument(
+        '--baseline', help='Отчёт прошлого прогона для сравнения.'
+    )
+    args = parser.parse_args()
+    setup_django()
+    # Проверяем данные до старта воркеров, чтобы не падать в каждом.
+    Dataset()
+    from django.db import connections
+    connections.close_all()
+
+    samples, elapsed = run(
+        args.concurrency, args.mode, parse_mix(args.mix), args.seed,
+        args.duration, args.iterations,
+    )
+    report = summarize(samples, elapsed)
+    print_report(report, elapsed)
+    if args.baseline:
+        print_comparison(report, args.baseline)
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({
+                'elapsed': elapsed,
+                'concurrency': args.concurrency,
+                'mode': args.mode,
+                'report': report,
+            }, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Сценарии нагрузки.
+
+Сценарий — функция ``(client, dataset, rng)``, которая выполняет
+последовательность запросов одного посетителя. Сценарии с записью
+(комментарии, загрузка картинок) меняют базу, поэтому запускать их стоит
+на копии, заполненной ``seed_yatube``.
+"""
+import io
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from PIL import Image
+
+
+def random_page(rng, pages=5):
+    """Чаще всего читают первые страницы ленты."""
+    return min(pages, int(rng.paretovariate(1.5)))
+
+
+def anonymous_browse(client, dataset, rng):
+    client.get(reverse('posts:index'), {'page': random_page(rng)})
+    if dataset.groups:
+        client.get(reverse(
+            'posts:group_list', kwargs={'slug': rng.choice(dataset.groups)}
+        ))
+    client.get(reverse(
+        'posts:profile', kwargs={'username': rng.choice(dataset.usernames)}
+    ))
+    client.get(reverse(
+        'posts:post_detail', kwargs={'post_id': dataset.random_post(rng)}
+    ))
+
+
+def feed_reader(client, dataset, rng):
+    client.login(dataset.reader(rng))
+    for page in range(1, random_page(rng) + 1):
+        client.get(reverse('posts:follow_index'), {'page': page})
+    client.get(reverse(
+        'posts:post_detail', kwargs={'post_id': dataset.random_post(rng)}
+    ))
+
+
+def comment_burst(client, dataset, rng, comments=5):
+    client.login(dataset.reader(rng))
+    post_id = dataset.random_post(rng)
+    url = reverse('posts:post_detail', kwargs={'post_id': post_id})
+    client.get(url)
+    for number in range(comments):
+        client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post_id}),
+            {'text': f'Нагрузочный комментарий {number}'},
+        )
+        client.get(url)
+
+
+def image_upload(client, dataset, rng):
+    client.login(dataset.reader(rng))
+    client.get(reverse('posts:post_create'))
+    buffer = io.BytesIO()
+    color = tuple(rng.randrange(256) for _ in range(3))
+    Image.new('RGB', (640, 480), color).save(buffer, 'PNG')
+    client.post(reverse('posts:post_create'), {
+        'text': 'Нагрузочный пост с картинкой',
+        'image': SimpleUploadedFile(
+            'load.png', buffer.getvalue(), content_type='image/png'
+        ),
+    })
+
+
+SCENARIOS = {
+    'browse': anonymous_browse,
+    'feed': feed_reader,
+    'comment': comment_burst,
+    'upload': image_upload,
+}
+# Смесь по умолчанию: в основном чтение, немного записи.
+DEFAULT_MIX = {'browse': 70, 'feed': 20, 'comment': 8, 'upload': 2}
@@ -0,0 +1,137 @@
+"""Конкурентная запись в SQLite: стандартный бэкенд против настроенного.
+
+Каждый поток открывает своё соединение и выполняет короткие транзакции
+"прочитать и записать", как ``add_comment`` и ``profile_follow``.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from . import percentile, setup_django
+
+CONFIGURATIONS = {
+    'stock': ('django.db.backends.sqlite3', {}),
+    'tuned': ('core.backends.sqlite3', {'serialize_writes': False}),
+    'tuned+queue': ('core.backends.sqlite3', {'serialize_writes': True}),
+}
+
+
+def make_wrapper(engine, name, options):
+    from django.db.utils import load_backend
+
+    settings_dict = {
+        'ENGINE': engine,
+        'NAME': name,
+        'OPTIONS': {'timeout': 5, **options},
+        'ATOMIC_REQUESTS': False,
+        'AUTOCOMMIT': True,
+        'CONN_MAX_AGE': 0,
+        'TIME_ZONE': None,
+        'USER': '',
+        'PASSWORD': '',
+        'HOST': '',
+        'PORT': '',
+        'TEST': {},
+    }
+    return load_backend(engine).DatabaseWrapper(settings_dict, 'bench')
+
+
+def write_transaction(wrapper, worker, number):
+    wrapper.set_autocommit(
+        False, force_begin_transaction_with_broken_autocommit=True
+    )
+    try:
+        with wrapper.cursor() as cursor:
+            cursor.execute(
+                'SELECT COUNT(*) FROM bench_comment WHERE post_id = %s',
+                [number % 100],
+            )
+            cursor.fetchone()
+            cursor.execute(
+                'INSERT INTO bench_comment (post_id, author_id, text) '
+                'VALUES (%s, %s, %s)',
+                [number % 100, worker, 'x' * 200],
+            )
+        wrapper.commit()
+    except Exception:
+        wrapper.rollback()
+        raise
+    finally:
+        wrapper.set_autocommit(True)
+
+
+def run(engine, options, workers, writes):
+    from django.db import OperationalError
+
+    directory = tempfile.mkdtemp()
+    name = os.path.join(directory, 'bench.sqlite3')
+    setup = make_wrapper(engine, name, options)
+    with setup.cursor() as cursor:
+        cursor.execute(
+            'CREATE TABLE bench_comment (id INTEGER PRIMARY KEY, '
+            'post_id INTEGER, author_id INTEGER, text TEXT)'
+        )
+    setup.close()
+
+    latencies = []
+    errors = []
+    start_barrier = threading.Barrier(workers)
+
+    def worker(number):
+        wrapper = make_wrapper(engine, name, options)
+        start_barrier.wait()
+        for index in range(writes):
+            started = time.perf_counter()
+            try:
+                write_transaction(wrapper, number, index)
+            except OperationalError as error:
+                errors.append(str(error))
+                continue
+            latencies.append(time.perf_counter() - started)
+        wrapper.close()
+
+    threads = [
+        threading.Thread(target=worker, args=(number,))
+        for number in range(workers)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    shutil.rmtree(directory, ignore_errors=True)
+    return {
+        'ok': len(latencies),
+        'errors': len(errors),
+        'throughput': len(latencies) / elapsed,
+        'p50': percentile(latencies, 50) * 1000,
+        'p99': percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--writes', type=int, default=200)
+    parser.add_argument(
+        '--config', choices=CONFIGURATIONS, action='append',
+        help='Конфигурации для сравнения (по умолчанию все).'
+    )
+    args = parser.parse_args()
+    setup_django()
+    print(f'{"config":<12} {"ok":>7} {"errors":>7} {"writes/s":>10} '
+          f'{"p50 ms":>8} {"p99 ms":>8}')
+    for label in args.config or CONFIGURATIONS:
+        engine, options = CONFIGURATIONS[label]
+        result = run(engine, options, args.workers, args.writes)
+        print(f'{label:<12} {result["ok"]:>7} {result["errors"]:>7} '
+              f'{result["throughput"]:>10.0f} {result["p50"]:>8.2f} '
+              f'{result["p99"]:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Время рендера страниц постов: Django Template Language против Jinja2.
+
+Контекст собирается в памяти, база данных не нужна::
+
+    python -m benchmarks.templates --repeat 500
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+
+from . import percentile, setup_django
+
+PAGES = ('index', 'group_list', 'profile', 'follow', 'post_detail')
+
+
+def build_contexts(posts_per_page, pages):
+    from django.contrib.auth.models import AnonymousUser
+    from django.core.paginator import Paginator
+    from django.test import RequestFactory
+    from django.urls import resolve
+
+    from posts.forms import CommentForm
+    from posts.listings import AuthorRow, GroupRow, PostRow
+    from posts.models import Comment, Group, Post, User
+
+    author = User(username='author', first_name='Лев', last_name='Толстой')
+    group = Group(title='Классика', slug='classic', description='Описание')
+    rows = [
+        PostRow(
+            number,
+            datetime(2023, 1, 1 + number % 28, tzinfo=timezone.utc),
+            f'Пост номер {number}'[:15],
+            '',
+            AuthorRow(1, 'author', 'Лев', 'Толстой'),
+            GroupRow(1, 'classic') if number % 2 else None,
+        )
+        for number in range(posts_per_page * pages)
+    ]
+    page_obj = Paginator(rows, posts_per_page).get_page(2)
+    post = Post(id=1, text='Текст поста ' * 50, author=author, group=group,
+                pub_date=datetime(2023, 1, 1, tzinfo=timezone.utc))
+    comments = [
+        Comment(post=post, author=author, text=f'Комментарий {number}')
+        for number in range(10)
+    ]
+
+    def request(path):
+        request = RequestFactory().get(path)
+        request.user = AnonymousUser()
+        request.resolver_match = resolve(path)
+        return request
+
+    return {
+        'index': (request('/'), {'page_obj': page_obj}),
+        'group_list': (
+            request('/group/classic/'), {'group': group, 'page_obj': page_obj}
+        ),
+        'profile': (request('/profile/author/'), {
+            'author': author, 'page_obj': page_obj, 'following': False,
+        }),
+        'follow': (request('/follow/'), {'page_obj': page_obj}),
+        'post_detail': (request('/posts/1/'), {
+            'post': post, 'form': CommentForm(), 'comments': comments,
+        }),
+    }
+
+
+def measure(engine, template_name, request, context, repeat):
+    from django.template.loader import get_template
+
+    template = get_template(template_name, using=engine)
+    template.render(dict(context), request)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        template.render(dict(context), request)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--posts-per-page', type=int, default=10)
+    parser.add_argument('--pages', type=int, default=20)
+    args = parser.parse_args()
+    setup_django()
+
+    contexts = build_contexts(args.posts_per_page, args.pages)
+    print(f'{"page":<12} {"django p50":>11} {"jinja2 p50":>11} '
+          f'{"django p99":>11} {"jinja2 p99":>11} {"speedup":>8}')
+    for page in PAGES:
+        request, context = contexts[page]
+        template_name = f'posts/{page}.html'
+        results = {
+            engine: measure(engine, template_name, request, context,
+                            args.repeat)
+            for engine in ('django', 'jinja2')
+        }
+        django_p50 = percentile(results['django'], 50) * 1000
+        jinja_p50 = percentile(results['jinja2'], 50) * 1000
+        print(f'{page:<12} {django_p50:>11.3f} {jinja_p50:>11.3f} '
+              f'{percentile(results["django"], 99) * 1000:>11.3f} '
+              f'{percentile(results["jinja2"], 99) * 1000:>11.3f} '
+              f'{django_p50 / jinja_p50:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+from django.contrib import admin
+
+from .models import Job, StoredFile
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'task',
+        'status',
+        'priority',
+        'attempts',
+        'run_at',
+        'locked_by',
+    )
+    list_filter = ('status', 'task')
+    search_fields = ('dedup_key',)
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Job, JobAdmin)
+
+
+class StoredFileAdmin(admin.ModelAdmin):
+    list_display = ('name', 'size', 'refcount', 'created')
+    list_filter = ('created',)
+    search_fields = ('name',)
+    readonly_fields = ('name', 'size', 'created')
+
+
+admin.site.register(StoredFile, StoredFileAdmin)
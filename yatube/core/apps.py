@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import images  # noqa: F401
+        from .jobs import autodiscover
+        autodiscover()
@@ -0,0 +1,204 @@
+"""SQLite-бэкенд с настроенными прагмами и очередью писателей.
+
+Подключается через ``'ENGINE': 'core.backends.sqlite3'`` в ``DATABASES``.
+Дополнительные ключи ``OPTIONS``:
+
+* ``pragmas`` — словарь прагм поверх ``DEFAULT_PRAGMAS``
+  (значение ``None`` отключает прагму);
+* ``timeout`` — сколько секунд ждать занятую базу; это же ожидание
+  драйвер задает прагмой ``busy_timeout``, поэтому в ``pragmas`` ее нет;
+* ``transaction_mode`` — режим ``BEGIN`` для ``atomic()``
+  (``DEFERRED``, ``IMMEDIATE`` или ``EXCLUSIVE``), по умолчанию
+  ``DEFERRED``: блок, который только читает, не берет блокировку записи;
+* ``serialize_writes`` — пропускать записи процесса через одну очередь,
+  чтобы потоки ждали друг друга, а не падали с "database is locked".
+
+В ``DEFERRED``-транзакции блокировка записи берется первым пишущим
+запросом. Если до него были чтения, SQLite не ждет занятую базу, а сразу
+отказывает, когда после этих чтений базу изменил кто-то другой. Блоки,
+которые читают, а потом пишут, открываются через
+``core.transactions.immediate()``.
+"""
+import re
+import threading
+from collections import deque
+
+from django.db import OperationalError
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -16000,
+    'temp_store': 'memory',
+}
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+WRITE_STATEMENT = re.compile(
+    r'^\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b', re.IGNORECASE
+)
+PRAGMA_NAME = re.compile(r'^\w+$')
+
+
+class WriteQueue:
+    """Честная (FIFO) блокировка единственного писателя в процессе."""
+
+    def __init__(self):
+        self._mutex = threading.Lock()
+        self._waiters = deque()
+        self._locked = False
+
+    def acquire(self, timeout=None):
+        with self._mutex:
+            if not self._locked and not self._waiters:
+                self._locked = True
+                return True
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+        if waiter.wait(timeout):
+            return True
+        with self._mutex:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                return False
+        # Блокировку передали в момент истечения таймаута.
+        return True
+
+    def release(self):
+        with self._mutex:
+            if self._waiters:
+                self._waiters.popleft().set()
+            else:
+                self._locked = False
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_write_queue(name):
+    """Одна очередь на файл базы данных в пределах процесса."""
+    with _queues_lock:
+        return _queues.setdefault(name, WriteQueue())
+
+
+class SQLiteCursorWrapper(base.SQLiteCursorWrapper):
+    def __init__(self, connection, wrapper):
+        super().__init__(connection)
+        self.wrapper = wrapper
+
+    def execute(self, query, params=None):
+        with self.wrapper.writer(query):
+            return super().execute(query, params)
+
+    def executemany(self, query, param_list):
+        with self.wrapper.writer(query):
+            return super().executemany(query, param_list)
+
+
+class _Writer:
+    def __init__(self, wrapper, query):
+        self.wrapper = wrapper
+        self.acquired = (
+            wrapper.write_queue is not None
+            and not wrapper.holds_write_lock
+            and WRITE_STATEMENT.match(query) is not None
+        )
+
+    def __enter__(self):
+        if self.acquired:
+            self.wrapper.acquire_write_lock()
+
+    def __exit__(self, *exc_info):
+        # Внутри транзакции блокировка держится до commit/rollback.
+        if self.acquired and not self.wrapper.connection.in_transaction:
+            self.wrapper.release_write_lock()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        options = self.settings_dict['OPTIONS']
+        self.pragmas = {**DEFAULT_PRAGMAS, **options.get('pragmas', {})}
+        self.transaction_mode = options.get(
+            'transaction_mode', 'DEFERRED'
+        ).upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ValueError(
+                f'Неизвестный transaction_mode: {self.transaction_mode}'
+            )
+        self.write_timeout = options.get('timeout', 5)
+        self.write_queue = None
+        if options.get('serialize_writes', False):
+            self.write_queue = get_write_queue(
+                str(self.settings_dict['NAME'])
+            )
+        self.holds_write_lock = False
+        self.next_transaction_mode = None
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        for key in ('pragmas', 'transaction_mode', 'serialize_writes'):
+            kwargs.pop(key, None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            if value is None:
+                continue
+            if not PRAGMA_NAME.match(name):
+                raise ValueError(f'Недопустимое имя прагмы: {name}')
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def create_cursor(self, name=None):
+        return self.connection.cursor(factory=self._cursor_factory)
+
+    def _cursor_factory(self, connection):
+        return SQLiteCursorWrapper(connection, self)
+
+    def writer(self, query):
+        """Контекст, ставящий пишущий запрос в очередь писателей."""
+        return _Writer(self, query)
+
+    def acquire_write_lock(self):
+        if not self.write_queue.acquire(self.write_timeout):
+            raise OperationalError('database is locked (write queue timeout)')
+        self.holds_write_lock = True
+
+    def release_write_lock(self):
+        if self.holds_write_lock:
+            self.holds_write_lock = False
+            self.write_queue.release()
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.next_transaction_mode or self.transaction_mode
+        self.next_transaction_mode = None
+        # IMMEDIATE сразу берёт RESERVED-блокировку: так SQLite не
+        # отказывает с SQLITE_BUSY при повышении уровня блокировки.
+        if self.write_queue is not None and mode != 'DEFERRED':
+            self.acquire_write_lock()
+        try:
+            self.cursor().execute(f'BEGIN {mode}')
+        except Exception:
+            self.release_write_lock()
+            raise
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self.release_write_lock()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self.release_write_lock()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self.release_write_lock()
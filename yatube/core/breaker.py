@@ -0,0 +1,199 @@
+"""Предохранитель базы для страниц чтения.
+
+``CircuitBreakerMiddleware`` считает запросы, которые обращались к базе,
+и среди них неудачные: с ошибкой базы (например, "database is locked")
+или с суммарным временем запросов больше ``BREAKER_SLOW_DB_TIME``.
+Если за ``BREAKER_WINDOW`` секунд таких набралось не меньше
+``BREAKER_FAILURE_RATE`` (при хотя бы ``BREAKER_MIN_REQUESTS`` запросах),
+предохранитель размыкается на ``BREAKER_COOLDOWN`` секунд.
+
+Пока он разомкнут, GET-запросы к страницам из ``BREAKER_NAMESPACES``
+до базы не доходят: отдается последняя сохраненная копия страницы или,
+если копии нет, 503 с ``Retry-After``. Ошибка базы во view таких
+страниц тоже отдает копию или 503, а не 500. Запись (POST) идет как
+обычно. Копии сохраняются из ответов анонимам, не чаще раза в
+``STALE_COPY_INTERVAL`` секунд на адрес, и живут ``STALE_COPY_TTL``
+в кэше ``pages``. Адрес копии — путь и только параметры из
+``PAGE_CACHE_QUERY_PARAMS``.
+
+Копию можно снять только с ответа целиком, а ошибку базы посреди
+потока middleware уже не перехватит. Поэтому страницы под
+предохранителем (``guarded``) потоком не отдаются, даже при
+``POSTS_STREAMING``.
+
+Счетчики у каждого процесса свои: процесс, который упирается в
+блокировку, разгружает себя сам.
+"""
+import logging
+import threading
+import time
+from http import HTTPStatus
+
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, connection
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD')
+MIDDLEWARE = 'core.breaker.CircuitBreakerMiddleware'
+STALE_WARNING = '110 - "Response is Stale"'
+
+
+class Breaker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._open_until = 0.0
+        self._start_window(time.monotonic())
+
+    def _start_window(self, now):
+        self._window_start = now
+        self._requests = 0
+        self._failures = 0
+
+    def is_open(self):
+        return time.monotonic() < self._open_until
+
+    def record(self, failed):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._window_start >= settings.BREAKER_WINDOW:
+                self._start_window(now)
+            self._requests += 1
+            self._failures += bool(failed)
+            if (self._requests >= settings.BREAKER_MIN_REQUESTS
+                    and self._failures
+                    >= self._requests * settings.BREAKER_FAILURE_RATE):
+                logger.warning(
+                    'База не справляется (%d из %d запросов): страницы '
+                    'чтения отдаются из копий %d с',
+                    self._failures, self._requests, settings.BREAKER_COOLDOWN,
+                )
+                self._open_until = now + settings.BREAKER_COOLDOWN
+                self._start_window(now)
+
+    def reset(self):
+        with self._lock:
+            self._open_until = 0.0
+            self._start_window(time.monotonic())
+
+
+breaker = Breaker()
+
+
+class QueryTimer:
+    """Обертка ``execute_wrapper``: время и ошибки запросов к базе."""
+
+    def __init__(self):
+        self.queries = 0
+        self.elapsed = 0.0
+        self.failed = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        except DatabaseError:
+            self.failed = True
+            raise
+        finally:
+            self.queries += 1
+            self.elapsed += time.monotonic() - start
+
+    def is_failure(self):
+        return self.failed or self.elapsed >= settings.BREAKER_SLOW_DB_TIME
+
+
+def is_read(request):
+    match = request.resolver_match
+    return (
+        request.method in SAFE_METHODS
+        and match is not None
+        and match.namespace in settings.BREAKER_NAMESPACES
+    )
+
+
+def guarded(request):
+    """Отвечает ли за страницу предохранитель (копией или 503)."""
+    return MIDDLEWARE in settings.MIDDLEWARE and is_read(request)
+
+
+def page_path(request):
+    """Хост, путь и параметры из ``PAGE_CACHE_QUERY_PARAMS``."""
+    params = sorted(
+        (name, value)
+        for name, values in request.GET.lists()
+        if name in settings.PAGE_CACHE_QUERY_PARAMS
+        for value in values
+    )
+    path = request.get_host() + request.path
+    return f'{path}?{urlencode(params)}' if params else path
+
+
+def copy_key(request):
+    return f'stale:copy:{page_path(request)}'
+
+
+def remember(request, response):
+    if (response.status_code != HTTPStatus.OK or response.streaming
+            or request.user.is_authenticated):
+        return
+    key = copy_key(request)
+    cache = caches['pages']
+    if cache.add(f'{key}:recent', True, settings.STALE_COPY_INTERVAL):
+        cache.set(
+            key, (response['Content-Type'], response.content),
+            settings.STALE_COPY_TTL,
+        )
+
+
+def stale_or_unavailable(request):
+    """Сохраненная копия страницы или 503, не трогая базу."""
+    copy = caches['pages'].get(copy_key(request))
+    if copy is not None:
+        content_type, content = copy
+        response = HttpResponse(content, content_type=content_type)
+        response['Warning'] = STALE_WARNING
+    else:
+        # Без request: шапке не нужен пользователь, а значит, и база.
+        response = HttpResponse(
+            render_to_string('core/503.html'),
+            status=HTTPStatus.SERVICE_UNAVAILABLE,
+        )
+        response['Retry-After'] = settings.BREAKER_COOLDOWN
+    response.from_stale_copy = True
+    return response
+
+
+class CircuitBreakerMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        if timer.queries:
+            breaker.record(timer.is_failure())
+        if is_read(request) and not getattr(
+            response, 'from_stale_copy', False
+        ):
+            remember(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if is_read(request) and breaker.is_open():
+            return stale_or_unavailable(request)
+        return None
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, DatabaseError) and is_read(request):
+            logger.error(
+                'Ошибка базы на %s', request.path, exc_info=exception
+            )
+            return stale_or_unavailable(request)
+        return None
@@ -0,0 +1,93 @@
+"""Полнотекстовый поиск через таблицы FTS5 SQLite.
+
+Таблица FTS5 с ``content=`` указывает на обычную таблицу модели и
+обновляется триггерами (см. миграцию ``posts.0014_admin_search``).
+Поиск по ней идет по индексу слов, а не перебором всех строк, как
+``LIKE '%…%'``.
+
+SQLite меняет столбцы пересозданием таблицы, и триггеры пропадают
+вместе со старой таблицей. Поэтому миграция, которая добавляет или
+меняет поле модели с индексом FTS, заканчивается операцией
+``restore_triggers``.
+"""
+import re
+
+from django.db import migrations
+from django.db.models.expressions import RawSQL
+
+WORD = re.compile(r'\w+')
+TRIGGERS = ('insert', 'delete', 'update')
+
+
+def trigger_names(table):
+    return [f'{table}_fts_{event}' for event in TRIGGERS]
+
+
+def triggers_sql(table, column='text'):
+    """Триггеры, которые держат ``{table}_fts`` в согласии с ``table``,
+    и перестройка индекса: изменения без триггеров в нем потеряны."""
+    fts = f'{table}_fts'
+    insert, delete, update = trigger_names(table)
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS {insert}
+        AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {delete}
+        AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {column})
+            VALUES ('delete', old.id, old.{column});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {update}
+        AFTER UPDATE OF {column} ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {column})
+            VALUES ('delete', old.id, old.{column});
+            INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column});
+        END""",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def create_index(table, column='text'):
+    """Операция миграции: таблица FTS5 для ``table`` с триггерами."""
+    fts = f'{table}_fts'
+    return migrations.RunSQL(
+        [
+            f"""CREATE VIRTUAL TABLE {fts} USING fts5(
+                {column}, content='{table}', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )""",
+            *triggers_sql(table, column),
+        ],
+        [
+            *(f'DROP TRIGGER IF EXISTS {name}'
+              for name in trigger_names(table)),
+            f'DROP TABLE IF EXISTS {fts}',
+        ],
+    )
+
+
+def restore_triggers(table, column='text'):
+    """Операция миграции: триггеры FTS после пересоздания ``table``."""
+    return migrations.RunSQL(
+        triggers_sql(table, column), migrations.RunSQL.noop
+    )
+
+
+def match_expression(term):
+    """Запрос FTS5: все слова ``term``, каждое как префикс.
+
+    Слова берутся в кавычки, поэтому операторы FTS5 во вводе
+    пользователя (``OR``, ``NEAR``, ``*``) теряют особый смысл.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD.findall(term))
+
+
+def search(queryset, table, term):
+    """Записи ``queryset``, текст которых находит ``term`` в ``table``."""
+    expression = match_expression(term)
+    if not expression:
+        return queryset
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {table} WHERE {table} MATCH %s', (expression,)
+    ))
@@ -0,0 +1,108 @@
+"""Карта идентичности: объект по естественному ключу через кэш.
+
+Двухуровневый read-through кэш: маленький LRU в памяти процесса
+(с коротким TTL, чтобы другие процессы не видели устаревшие данные долго)
+и общий кэш Django. Отсутствующие объекты тоже кэшируются, но недолго,
+поэтому поток запросов к несуществующим адресам не доходит до базы.
+Записи сбрасываются сигналами ``pre_save``, ``post_save`` и ``post_delete``.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.http import Http404
+
+MISSING = 'identity:missing'
+
+
+class IdentityMap:
+    def __init__(self, model, field):
+        self.model = model
+        self.field = field
+        self.prefix = f'identity.{model._meta.label_lower}.{field}.'
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        pre_save.connect(self._on_pre_save, sender=model, weak=False)
+        post_save.connect(self._on_change, sender=model, weak=False)
+        post_delete.connect(self._on_change, sender=model, weak=False)
+
+    def cache_key(self, value):
+        digest = hashlib.md5(str(value).encode()).hexdigest()
+        return self.prefix + digest
+
+    def get(self, value):
+        """Объект с ``field == value`` или None."""
+        key = self.cache_key(value)
+        found = self._local_get(key)
+        if found is None:
+            found = cache.get(key)
+            if found is None:
+                found = self.model.objects.filter(
+                    **{self.field: value}
+                ).first() or MISSING
+                cache.set(key, found, self._timeout(found))
+            self._local_set(key, found)
+        return None if found == MISSING else found
+
+    def get_or_404(self, value):
+        found = self.get(value)
+        if found is None:
+            raise Http404(
+                f'{self.model._meta.object_name} {value!r} не найден'
+            )
+        return found
+
+    def invalidate(self, value):
+        key = self.cache_key(value)
+        with self._lock:
+            self._local.pop(key, None)
+        cache.delete(key)
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def _timeout(self, found):
+        if found == MISSING:
+            return settings.IDENTITY_NEGATIVE_TIMEOUT
+        return settings.IDENTITY_CACHE_TIMEOUT
+
+    def _local_get(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            found, expires = entry
+            if expires < time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return found
+
+    def _local_set(self, key, found):
+        ttl = min(self._timeout(found), settings.IDENTITY_LOCAL_TTL)
+        with self._lock:
+            self._local[key] = (found, time.monotonic() + ttl)
+            self._local.move_to_end(key)
+            while len(self._local) > settings.IDENTITY_LOCAL_SIZE:
+                self._local.popitem(last=False)
+
+    def _on_pre_save(self, sender, instance, raw=False, update_fields=None,
+                     **kwargs):
+        # При смене ключа (переименовании) сбрасываем и старое значение.
+        if raw or instance.pk is None:
+            return
+        if update_fields is not None and self.field not in update_fields:
+            return
+        old = self.model.objects.filter(pk=instance.pk).values_list(
+            self.field, flat=True
+        ).first()
+        if old is not None and old != getattr(instance, self.field):
+            self.invalidate(old)
+
+    def _on_change(self, sender, instance, **kwargs):
+        self.invalidate(getattr(instance, self.field))
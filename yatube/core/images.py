@@ -0,0 +1,204 @@
+"""Картинки нужного размера по подписанной ссылке.
+
+Ссылку вида ``/img/<подпись>/960x339c.webp/posts/ab/cd/abcd….jpg`` строит
+``resized_url``. Вариант режется один раз и кладется в
+``IMAGE_CACHE_ROOT``; одновременные запросы одного варианта ждут
+единственный ресайз (блокировка в процессе и ``flock`` между процессами).
+Блокировок ``IMAGE_LOCK_STRIPES``, вариант берет свою по хешу пути: файлов
+блокировок не больше этого числа, сколько бы вариантов ни запрашивали.
+Кэш ограничен ``IMAGE_CACHE_MAX_SIZE``: задача ``evict_image_cache``
+удаляет давно не запрошенные варианты. Если вариант удален после
+``ensure_variant``, ``serve`` нарезает его заново.
+"""
+import fcntl
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.signing import Signer
+from django.http import Http404
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
+from PIL import Image, ImageOps
+
+from .jobs import task
+from .media import send_file
+
+SPEC = re.compile(r'^(\d+)x(\d+)(c?)(?:\.(jpeg|png|webp))?$')
+FORMATS = {'jpeg': 'JPEG', 'png': 'PNG', 'webp': 'WEBP'}
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Чаще раза в час время доступа к варианту не обновляем.
+TOUCH_INTERVAL = 60 * 60
+
+_locks = [threading.Lock() for _ in range(settings.IMAGE_LOCK_STRIPES)]
+
+
+def sign(value):
+    # Signer читает SECRET_KEY: создаем его при вызове, а не при импорте,
+    # чтобы команды manage.py работали и без ключа.
+    return Signer(salt='core.images').signature(value)
+
+
+def make_spec(width, height, crop=False, image_format=None):
+    spec = f'{width}x{height}{"c" if crop else ""}'
+    return f'{spec}.{image_format}' if image_format else spec
+
+
+def resized_url(name, width, height, crop=False, image_format=None):
+    """Подписанная ссылка на вариант картинки ``name``."""
+    name = str(name)
+    spec = make_spec(width, height, crop, image_format)
+    return reverse('image', kwargs={
+        'signature': sign(f'{spec}/{name}'),
+        'spec': spec,
+        'name': name,
+    })
+
+
+def variant_path(spec, name):
+    digest = hashlib.sha1(f'{spec}/{name}'.encode()).hexdigest()
+    match = SPEC.match(spec)
+    extension = match[4] or os.path.splitext(name)[1].lstrip('.').lower()
+    return os.path.join(
+        settings.IMAGE_CACHE_ROOT, digest[:2], f'{digest}.{extension}'
+    )
+
+
+def lock_path(stripe):
+    return os.path.join(settings.IMAGE_CACHE_ROOT, '.locks', f'{stripe}.lock')
+
+
+@contextmanager
+def variant_lock(path):
+    """Один ресайз варианта на все потоки и процессы.
+
+    Варианты с одной блокировкой режутся по очереди, разные — параллельно.
+    """
+    stripe = zlib.crc32(path.encode()) % len(_locks)
+    os.makedirs(os.path.dirname(lock_path(stripe)), exist_ok=True)
+    with _locks[stripe], open(lock_path(stripe), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def render_variant(name, width, height, crop, image_format, target):
+    with default_storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        if image.width * image.height > settings.UPLOAD_MAX_PIXELS:
+            raise Http404('Картинка слишком большая')
+        image_format = image_format or image.format
+        # JPEG декодируется сразу в уменьшенном масштабе.
+        image.draft('RGB', (width, height))
+        if crop:
+            image = ImageOps.fit(image, (width, height), Image.LANCZOS)
+        else:
+            image.thumbnail((width, height), Image.LANCZOS)
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    descriptor, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(target), prefix='.resize-'
+    )
+    try:
+        with os.fdopen(descriptor, 'wb') as temp:
+            image.save(temp, image_format, quality=85)
+        os.replace(temp_path, target)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def ensure_variant(spec, name):
+    """Путь к готовому варианту; режет его, если в кэше нет."""
+    match = SPEC.match(spec)
+    if match is None:
+        raise Http404('Неверный размер')
+    width, height = int(match[1]), int(match[2])
+    if not (0 < width <= settings.IMAGE_MAX_SIDE
+            and 0 < height <= settings.IMAGE_MAX_SIDE):
+        raise Http404('Неверный размер')
+    path = variant_path(spec, name)
+    if os.path.exists(path):
+        touch(path)
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with variant_lock(path):
+        # Пока ждали блокировку, вариант мог нарезать другой запрос.
+        if not os.path.exists(path):
+            if not default_storage.exists(name):
+                raise Http404('Картинка не найдена')
+            render_variant(
+                name, width, height, bool(match[3]),
+                FORMATS.get(match[4]), path,
+            )
+            # Одна отложенная очистка на все варианты, нарезанные за минуту.
+            evict_image_cache.enqueue(countdown=60)
+    return path
+
+
+def touch(path):
+    try:
+        if os.stat(path).st_mtime < time.time() - TOUCH_INTERVAL:
+            os.utime(path)
+    except OSError:
+        pass
+
+
+def scan_cache():
+    """``(время доступа, размер, путь)`` для каждого варианта в кэше."""
+    for directory, _, names in os.walk(settings.IMAGE_CACHE_ROOT):
+        for name in names:
+            if name.endswith('.lock') or name.startswith('.'):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            yield stat.st_mtime, stat.st_size, path
+
+
+def evict(max_size):
+    """Удаляет самые давно запрошенные варианты сверх ``max_size``."""
+    variants = list(scan_cache())
+    total = sum(size for _, size, _ in variants)
+    removed = 0
+    for _, size, path in sorted(variants):
+        if total <= max_size:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
+
+
+@task(priority=-5, dedup=lambda: 'evict_image_cache')
+def evict_image_cache():
+    evict(settings.IMAGE_CACHE_MAX_SIZE)
+
+
+def serve(request, signature, spec, name):
+    if not constant_time_compare(
+        signature, sign(f'{spec}/{name}')
+    ):
+        raise Http404('Неверная подпись')
+    path = ensure_variant(spec, name)
+    try:
+        return send_file(request, path, IMMUTABLE)
+    except Http404:
+        if os.path.exists(path):
+            raise
+    # Очистка кэша успела удалить вариант: режем заново.
+    return send_file(request, ensure_variant(spec, name), IMMUTABLE)
@@ -0,0 +1,53 @@
+"""Окружение Jinja2 для горячих шаблонов постов.
+
+Повторяет то, чем пользуются DTL-шаблоны: ``url``, ``static``,
+``thumbnail``, ``resized`` и фильтры ``addclass``, ``date``, ``truncatechars``.
+"""
+import logging
+
+from django.template import defaultfilters
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.timezone import template_localtime
+from jinja2 import Environment
+from sorl.thumbnail import get_thumbnail
+
+from .images import resized_url
+from .templatetags.user_filters import addclass
+
+logger = logging.getLogger(__name__)
+
+
+def url(viewname, *args, **kwargs):
+    return reverse(viewname, args=args or None, kwargs=kwargs or None)
+
+
+def thumbnail(file_, geometry, **options):
+    """Аналог ``{% thumbnail %}``: миниатюра или None без исключений."""
+    if not file_:
+        return None
+    try:
+        return get_thumbnail(file_, geometry, **options)
+    except Exception:
+        logger.exception('Ошибка создания миниатюры для %s', file_)
+        return None
+
+
+def date(value, arg=None):
+    return defaultfilters.date(template_localtime(value), arg)
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update({
+        'url': url,
+        'static': static,
+        'thumbnail': thumbnail,
+        'resized': resized_url,
+    })
+    env.filters.update({
+        'addclass': addclass,
+        'date': date,
+        'truncatechars': defaultfilters.truncatechars,
+    })
+    return env
@@ -0,0 +1,192 @@
+"""Очередь фоновых задач в базе данных.
+
+Задача — обычная функция, зарегистрированная декоратором ``task``
+в модуле ``jobs.py`` любого приложения::
+
+    @task(priority=5, dedup=lambda post_id: f'thumbnails:{post_id}')
+    def generate_thumbnails(post_id):
+        ...
+
+    generate_thumbnails.delay(post.pk)
+
+Задачи выполняет команда ``manage.py run_workers``. При
+``JOBS_ALWAYS_EAGER = True`` задача выполняется сразу, внутри запроса.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+class Task:
+    def __init__(self, func, name, priority, max_attempts, dedup):
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.dedup = dedup
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        """Ставит задачу в очередь с параметрами по умолчанию."""
+        return self.enqueue(args, kwargs)
+
+    def enqueue(self, args=(), kwargs=None, priority=None, dedup_key=None,
+                countdown=0):
+        kwargs = kwargs or {}
+        if dedup_key is None and self.dedup is not None:
+            dedup_key = self.dedup(*args, **kwargs)
+        if settings.JOBS_ALWAYS_EAGER:
+            self.func(*args, **kwargs)
+            return None
+        job = Job(
+            task=self.name,
+            args=list(args),
+            kwargs=kwargs,
+            priority=self.priority if priority is None else priority,
+            dedup_key=dedup_key,
+            max_attempts=self.max_attempts,
+            run_at=timezone.now() + timedelta(seconds=countdown),
+        )
+        try:
+            with transaction.atomic():
+                job.save()
+        except IntegrityError:
+            # Такая же задача уже ждёт выполнения. Выполняемая не в счёт:
+            # она могла прочитать данные до изменения, ради которого
+            # задачу ставят снова.
+            return Job.objects.filter(
+                dedup_key=dedup_key, status=Job.PENDING
+            ).first()
+        return job
+
+
+def task(name=None, priority=0, max_attempts=5, dedup=None):
+    """Регистрирует функцию как фоновую задачу."""
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        registered = Task(func, task_name, priority, max_attempts, dedup)
+        _registry[task_name] = registered
+        return registered
+    return decorator
+
+
+def autodiscover():
+    autodiscover_modules('jobs')
+
+
+def get_task(name):
+    return _registry[name]
+
+
+def backoff(attempts):
+    """Экспоненциальная задержка перед повтором с небольшим разбросом."""
+    delay = min(
+        settings.JOBS_RETRY_BASE_DELAY * 2 ** (attempts - 1),
+        settings.JOBS_RETRY_MAX_DELAY,
+    )
+    return delay * random.uniform(0.8, 1.2)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+def requeue(job_id, **fields):
+    """Возвращает задачу в очередь.
+
+    Если такая же задача уже ждёт, эта удаляется: её работу сделает
+    дубликат. ``True``, если задача вернулась в очередь.
+    """
+    try:
+        with transaction.atomic():
+            Job.objects.filter(id=job_id).update(
+                status=Job.PENDING, locked_by='', locked_at=None, **fields
+            )
+    except IntegrityError:
+        Job.objects.filter(id=job_id).delete()
+        return False
+    return True
+
+
+def release_stale_jobs():
+    """Возвращает в очередь задачи, чей воркер пропал."""
+    deadline = timezone.now() - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    stale = Job.objects.filter(
+        status=Job.RUNNING, locked_at__lt=deadline
+    ).values_list('id', flat=True)
+    return sum(requeue(job_id) for job_id in stale)
+
+
+def claim(worker, batch=10):
+    """Забирает одну готовую задачу с наибольшим приоритетом.
+
+    Захват — условный UPDATE по статусу: из нескольких воркеров,
+    выбравших одну задачу, её получит только один.
+    """
+    now = timezone.now()
+    candidates = Job.objects.filter(
+        status=Job.PENDING, run_at__lte=now
+    ).order_by('-priority', 'run_at', 'id').values_list('id', flat=True)
+    for job_id in candidates[:batch]:
+        claimed = Job.objects.filter(id=job_id, status=Job.PENDING).update(
+            status=Job.RUNNING,
+            locked_by=worker,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def execute(job):
+    """Выполняет задачу: успех удаляет её, ошибка планирует повтор."""
+    try:
+        get_task(job.task)(*job.args, **job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Задача %s упала (попытка %s)', job, job.attempts)
+        if job.attempts >= job.max_attempts:
+            Job.objects.filter(id=job.id).update(
+                status=Job.FAILED, last_error=error, locked_by=''
+            )
+            return False
+        requeue(
+            job.id,
+            last_error=error,
+            run_at=timezone.now() + timedelta(seconds=backoff(job.attempts)),
+        )
+        return False
+    Job.objects.filter(id=job.id).delete()
+    return True
+
+
+def run_pending(worker=None, limit=None):
+    """Выполняет готовые задачи, пока очередь не опустеет."""
+    worker = worker or worker_name()
+    done = 0
+    while limit is None or done < limit:
+        job = claim(worker)
+        if job is None:
+            break
+        execute(job)
+        done += 1
+    return done
@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from core.models import StoredFile
+from core.storage import is_referenced, register, remove, tracked_fields
+
+
+class Command(BaseCommand):
+    help = 'Удаляет загруженные файлы, на которые не ссылается ни одна запись.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Пересчитать счетчики ссылок по базе перед сборкой.'
+        )
+        parser.add_argument(
+            '--grace', type=int, default=settings.MEDIA_GC_GRACE,
+            help='Не трогать файлы моложе стольких секунд.'
+        )
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            self.stdout.write(f'Пересчитано файлов: {self.rebuild()}')
+        deadline = timezone.now() - timedelta(seconds=options['grace'])
+        orphans = StoredFile.objects.filter(
+            refcount=0, created__lt=deadline
+        ).values_list('name', flat=True)
+        removed = 0
+        for name in orphans.iterator():
+            # Счетчик мог отстать (bulk_create, правка в обход ORM).
+            if is_referenced(name):
+                continue
+            removed += 1
+            if options['dry_run']:
+                continue
+            remove(name)
+        self.stdout.write(f'Удалено файлов: {removed}')
+
+    def rebuild(self):
+        counts = {}
+        for model, field in tracked_fields():
+            rows = model._default_manager.exclude(
+                **{field: ''}
+            ).exclude(**{f'{field}__isnull': True}).order_by().values(
+                field
+            ).annotate(refs=Count('pk')).values_list(field, 'refs')
+            for name, refs in rows.iterator():
+                counts[name] = counts.get(name, 0) + refs
+        with transaction.atomic():
+            StoredFile.objects.update(refcount=0)
+            for name, refs in counts.items():
+                register(name)
+                StoredFile.objects.filter(name=name).update(refcount=refs)
+        return len(counts)
@@ -0,0 +1,99 @@
+import multiprocessing
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.jobs import release_stale_jobs, run_pending, worker_name
+
+
+def work(stop, poll_interval, burst):
+    """Цикл одного воркера: берёт задачи, пока не попросят остановиться.
+
+    Раз в ``JOBS_RELEASE_INTERVAL`` секунд воркер возвращает в очередь
+    задачи упавших воркеров, иначе их ключи дедупликации заняты до
+    перезапуска пула.
+    """
+    name = worker_name()
+    release_at = time.monotonic() + settings.JOBS_RELEASE_INTERVAL
+    try:
+        while not stop.is_set():
+            if time.monotonic() >= release_at:
+                release_stale_jobs()
+                release_at = time.monotonic() + settings.JOBS_RELEASE_INTERVAL
+            if run_pending(name, limit=settings.JOBS_BATCH_SIZE):
+                continue
+            if burst:
+                break
+            stop.wait(poll_interval)
+    finally:
+        connections.close_all()
+
+
+def process_main(stop, poll_interval, burst):
+    import django
+    django.setup()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    work(stop, poll_interval, burst)
+
+
+class Command(BaseCommand):
+    help = 'Запускает пул воркеров фоновых задач из core.Job.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.JOBS_WORKERS,
+            help='Размер пула.'
+        )
+        parser.add_argument(
+            '--mode', choices=('thread', 'process'), default='thread',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Выйти, как только очередь опустеет.'
+        )
+
+    def handle(self, *args, **options):
+        released = release_stale_jobs()
+        if released:
+            self.stdout.write(f'Возвращено зависших задач: {released}')
+        if options['mode'] == 'process':
+            stop = multiprocessing.Event()
+            connections.close_all()
+            pool = [
+                multiprocessing.Process(
+                    target=process_main,
+                    args=(stop, options['poll_interval'], options['burst']),
+                )
+                for _ in range(options['workers'])
+            ]
+        else:
+            stop = threading.Event()
+            pool = [
+                threading.Thread(
+                    target=work,
+                    args=(stop, options['poll_interval'], options['burst']),
+                )
+                for _ in range(options['workers'])
+            ]
+
+        def shutdown(signum, frame):
+            self.stdout.write('Останавливаем воркеры...')
+            stop.set()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+        self.stdout.write(
+            f'Запущено воркеров: {len(pool)} ({options["mode"]})'
+        )
+        for worker in pool:
+            worker.start()
+        for worker in pool:
+            worker.join()
@@ -0,0 +1,177 @@
+"""Безопасное подмножество Markdown для постов и комментариев.
+
+Исходный текст сначала экранируется целиком, а разметка затем
+добавляет только известные теги, поэтому HTML из текста пользователя
+на страницу не попадает и отдельная очистка не нужна.
+
+Поддерживаются абзацы и переносы строк, заголовки ``#``–``###``
+(как ``<h3>``–``<h5>``: ``<h1>`` на странице уже есть), списки ``-``/``*``
+и ``1.``, цитаты ``>``, блоки кода в тройных обратных кавычках,
+``**жирный**``, ``*курсив*``, ``` `код` ``` и ссылки ``[текст](адрес)``
+на http(s), mailto и пути сайта.
+
+HTML хранится рядом с текстом вместе с ``VERSION``; если поменять
+правила разметки, нужно увеличить ``VERSION`` и запустить команду
+``render_markdown``.
+"""
+import re
+
+from django.utils.html import escape
+
+VERSION = 2
+
+FENCE = re.compile(r'^\s*```')
+HEADING = re.compile(r'^(#{1,3})\s+(.+?)\s*#*\s*$')
+BULLET = re.compile(r'^\s*[-*+]\s+(.*)$')
+NUMBERED = re.compile(r'^\s*\d+[.)]\s+(.*)$')
+QUOTE = re.compile(r'^\s*&gt;\s?(.*)$')
+CODE_SPAN = re.compile(r'`([^`]+)`')
+LINK = re.compile(r'\[([^\]]+)\]\(([^)\s]+)\)')
+STRONG = re.compile(r'\*\*(?=\S)(.+?)(?<=\S)\*\*')
+EMPHASIS = re.compile(r'\*(?=\S)(.+?)(?<=\S)\*')
+# Путь сайта, но не //host и не /\host: браузеры читают оба как адрес
+# другого сайта.
+SAFE_URL = re.compile(r'^(https?://|mailto:|/(?![/\\]))', re.IGNORECASE)
+HEADING_OFFSET = 2
+
+
+def emphasis(text):
+    text = STRONG.sub(r'<strong>\1</strong>', text)
+    return EMPHASIS.sub(r'<em>\1</em>', text)
+
+
+def link(label, url):
+    if not SAFE_URL.match(url):
+        return emphasis(f'[{label}]({url})')
+    return f'<a href="{url}" rel="nofollow noopener">{emphasis(label)}</a>'
+
+
+def links(text):
+    """Ссылки и выделение; адреса ссылок выделение не трогает."""
+    pieces = LINK.split(text)
+    html = [emphasis(pieces[0])]
+    for start in range(1, len(pieces), 3):
+        label, url, tail = pieces[start:start + 3]
+        html.append(link(label, url))
+        html.append(emphasis(tail))
+    return ''.join(html)
+
+
+def inline(text):
+    """Строчная разметка уже экранированного текста."""
+    parts = CODE_SPAN.split(text)
+    for index, part in enumerate(parts):
+        if index % 2:
+            parts[index] = f'<code>{part}</code>'
+        else:
+            parts[index] = links(part)
+    return ''.join(parts)
+
+
+class Renderer:
+    """Разбор текста на блоки: строки читаются по одной сверху вниз."""
+
+    def __init__(self, text):
+        self.lines = escape(text).replace('\r\n', '\n').replace(
+            '\r', '\n'
+        ).split('\n')
+        self.position = 0
+        self.blocks = []
+        self.paragraph = []
+        self.items = []
+        self.list_tag = None
+
+    def flush(self):
+        if self.paragraph:
+            self.blocks.append(
+                '<p>' + '<br>'.join(inline(line) for line in self.paragraph)
+                + '</p>'
+            )
+            self.paragraph = []
+        if self.items:
+            tag = self.list_tag
+            self.blocks.append(
+                f'<{tag}>'
+                + ''.join(f'<li>{inline(item)}</li>' for item in self.items)
+                + f'</{tag}>'
+            )
+            self.items = []
+            self.list_tag = None
+
+    def take_while(self, pattern):
+        taken = []
+        while self.position < len(self.lines):
+            match = pattern.match(self.lines[self.position])
+            if not match:
+                break
+            taken.append(match)
+            self.position += 1
+        return taken
+
+    def fence(self):
+        code = []
+        while (self.position < len(self.lines)
+               and not FENCE.match(self.lines[self.position])):
+            code.append(self.lines[self.position])
+            self.position += 1
+        # Закрывающие кавычки (или конец текста).
+        self.position += 1
+        self.blocks.append('<pre><code>' + '\n'.join(code) + '</code></pre>')
+
+    def block(self, line):
+        """Обрабатывает строку, если она начинает отдельный блок."""
+        if FENCE.match(line):
+            self.flush()
+            self.fence()
+        elif not line.strip():
+            self.flush()
+        elif HEADING.match(line):
+            self.flush()
+            heading = HEADING.match(line)
+            level = len(heading[1]) + HEADING_OFFSET
+            self.blocks.append(f'<h{level}>{inline(heading[2])}</h{level}>')
+        elif QUOTE.match(line):
+            self.flush()
+            self.position -= 1
+            quoted = [match[1] for match in self.take_while(QUOTE)]
+            self.blocks.append(
+                '<blockquote><p>'
+                + '<br>'.join(inline(text) for text in quoted)
+                + '</p></blockquote>'
+            )
+        else:
+            return False
+        return True
+
+    def text_line(self, line):
+        for pattern, tag in ((BULLET, 'ul'), (NUMBERED, 'ol')):
+            item = pattern.match(line)
+            if item:
+                if self.paragraph or self.list_tag != tag:
+                    self.flush()
+                self.list_tag = tag
+                self.items.append(item[1])
+                return
+        if self.items:
+            self.flush()
+        self.paragraph.append(line)
+
+    def render(self):
+        while self.position < len(self.lines):
+            line = self.lines[self.position]
+            self.position += 1
+            if not self.block(line):
+                self.text_line(line)
+        self.flush()
+        return '\n'.join(self.blocks)
+
+
+def render(text):
+    """HTML для текста ``text``; результат безопасно выводить как есть."""
+    return Renderer(text).render()
+
+
+def render_text(obj):
+    """Заполняет ``text_html`` и ``html_version`` записи по ее ``text``."""
+    obj.text_html = render(obj.text)
+    obj.html_version = VERSION
@@ -0,0 +1,175 @@
+"""Отдача загруженных файлов из ``MEDIA_ROOT``.
+
+В отличие от ``django.views.static.serve`` понимает ``Range``, ``ETag``
+и условные запросы. Тело отдаётся через ``FileResponse``: WSGI-сервер
+с ``wsgi.file_wrapper`` (gunicorn, uWSGI) передаёт его ``sendfile``
+без копирования в Python. Если задан ``MEDIA_ACCEL_REDIRECT``, файл
+вообще отдаёт nginx по заголовку ``X-Accel-Redirect``.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from http import HTTPStatus
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+BLOCK_SIZE = 64 * 1024
+
+
+class FileRange:
+    """Файл, из которого читается только отрезок ``[start, start+length)``.
+
+    ``fileno`` и ``tell`` берутся у настоящего файла, поэтому
+    ``wsgi.file_wrapper`` может отдать отрезок через ``sendfile``.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """Возвращает ``(start, end)`` для одного отрезка или None.
+
+    Несколько отрезков сразу не поддерживаются: на такой запрос
+    отдаётся весь файл, как разрешает RFC 7233. Отрезок за концом
+    файла — ``ValueError``.
+    """
+    match = RANGE.match(header.replace(' ', ''))
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        length = min(int(last), size)
+        if length == 0:
+            raise ValueError(header)
+        return size - length, size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError(header)
+    end = min(int(last), size - 1) if last else size - 1
+    return start, end
+
+
+def not_modified(request, etag, mtime):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or etag in etags
+    since = parse_http_date_safe(
+        request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+    )
+    return since is not None and int(mtime) <= since
+
+
+def media_headers(fullpath, stat, cache_control):
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    headers = {
+        'Content-Type': content_type or 'application/octet-stream',
+        'ETag': f'"{int(stat.st_mtime):x}-{stat.st_size:x}"',
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': cache_control,
+        'Accept-Ranges': 'bytes',
+    }
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return headers
+
+
+def file_response(request, fullpath, size, etag):
+    """Весь файл или отрезок из заголовка ``Range``."""
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if range_header and request.META.get('HTTP_IF_RANGE') in (None, etag):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(
+                status=HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+            )
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    file = open(fullpath, 'rb')
+    if byte_range is None:
+        response = FileResponse(file)
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            FileRange(file, start, end - start + 1),
+            status=HTTPStatus.PARTIAL_CONTENT,
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response.block_size = BLOCK_SIZE
+    return response
+
+
+def send_file(request, fullpath, cache_control, accel_path=None):
+    """Ответ с файлом: 304, Range, а при ``accel_path`` — X-Accel-Redirect."""
+    try:
+        stat = os.stat(fullpath)
+    except (OSError, ValueError):
+        raise Http404('Файл не найден')
+    if not os.path.isfile(fullpath):
+        raise Http404('Файл не найден')
+
+    headers = media_headers(fullpath, stat, cache_control)
+    etag = headers['ETag']
+    if not_modified(request, etag, stat.st_mtime):
+        response = HttpResponse(status=HTTPStatus.NOT_MODIFIED)
+        for header in ('ETag', 'Last-Modified', 'Cache-Control'):
+            response[header] = headers[header]
+        return response
+
+    if accel_path:
+        # Range и отправку файла nginx выполнит сам.
+        response = HttpResponse()
+        response['X-Accel-Redirect'] = accel_path
+    else:
+        response = file_response(request, fullpath, stat.st_size, etag)
+        if response.status_code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE:
+            return response
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+def serve(request, path):
+    """Отдаёт файл из ``MEDIA_ROOT`` с поддержкой Range и 304."""
+    path = posixpath.normpath(path).lstrip('/')
+    fullpath = safe_join(settings.MEDIA_ROOT, path)
+    accel_path = None
+    if settings.MEDIA_ACCEL_REDIRECT:
+        accel_path = settings.MEDIA_ACCEL_REDIRECT + path
+    return send_file(
+        request, fullpath,
+        f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}',
+        accel_path,
+    )
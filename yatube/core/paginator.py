@@ -0,0 +1,33 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+
+class CachedCountPaginator(Paginator):
+    """Пагинатор, который считает ``COUNT(*)`` не чаще раза
+    в ``ADMIN_COUNT_CACHE_TIMEOUT`` для одного и того же запроса.
+
+    Число записей на страницах списка может отставать от настоящего
+    на время жизни кэша.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        try:
+            sql = str(query) if query is not None else None
+        except EmptyResultSet:
+            sql = None
+        if sql is None:
+            return super().count
+        digest = md5(sql.encode()).hexdigest()
+        key = f'paginator.count.{query.model._meta.label_lower}.{digest}'
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, settings.ADMIN_COUNT_CACHE_TIMEOUT)
+        return count
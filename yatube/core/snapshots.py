@@ -0,0 +1,43 @@
+"""Значения полей записи в базе до ее сохранения.
+
+Несколько обработчиков ``pre_save`` одной модели сравнивают старые и
+новые значения полей: счетчики ссылок на файлы, версии постов, ленты.
+Поля, которые им нужны, объявляются через ``watch``, а ``previous``
+читает их все одним запросом на сохранение и держит на экземпляре до
+следующего ``pre_save``.
+"""
+from collections import defaultdict
+
+from django.db.models.signals import pre_save
+
+_watched = defaultdict(set)
+ATTNAME = '_snapshot'
+
+
+def watch(model, *fields):
+    """Объявляет поля модели, которые читает ``previous``."""
+    _watched[model].update(fields)
+
+
+def previous(instance, field):
+    """Значение поля ``field`` в базе; None, если записи еще нет."""
+    if instance.pk is None:
+        return None
+    row = instance.__dict__.get(ATTNAME)
+    if row is None:
+        model = type(instance)
+        fields = sorted(_watched[model] | {field})
+        row = model._default_manager.filter(pk=instance.pk).values(
+            *fields
+        ).first() or {}
+        instance.__dict__[ATTNAME] = row
+    return row.get(field)
+
+
+def forget(sender, instance, **kwargs):
+    # Подключен раньше остальных обработчиков: каждое сохранение
+    # читает строку заново.
+    instance.__dict__.pop(ATTNAME, None)
+
+
+pre_save.connect(forget, dispatch_uid='core.snapshots.forget')
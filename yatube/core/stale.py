@@ -0,0 +1,100 @@
+"""Кэш страниц, который отдает устаревшее, пока обновляет свежее.
+
+``cache_page(timeout, key_prefix)`` заменяет одноименный декоратор
+Django. Копия страницы свежая ``timeout`` секунд, но хранится еще
+``PAGE_CACHE_STALE_TTL``. Устаревшую копию запрос получает сразу, а
+страницу в фоне перерисовывает один поток на ключ. Поэтому истечение
+срока не выстраивает очередь запросов к базе. Пока разомкнут
+предохранитель (``core.breaker``), фоновое обновление не запускается.
+
+Копии лежат в кэше ``pages`` и разделены по пользователю: в шапке
+страницы его имя. Устаревшие копии хранятся только для анонимов,
+копии вошедших пользователей живут ``timeout``.
+
+Как и у Django, ответ получает ``Cache-Control: max-age`` и ``Expires``:
+свежий — на ``timeout``, копия — на остаток ее срока, устаревшая — 0.
+"""
+import logging
+import math
+import threading
+import time
+from functools import wraps
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.cache import patch_response_headers
+
+from .breaker import STALE_WARNING, breaker, page_path
+
+logger = logging.getLogger(__name__)
+
+
+def page_key(request, key_prefix):
+    return 'stale:page:{}:{}:{}'.format(
+        key_prefix, page_path(request), request.user.pk or 0
+    )
+
+
+def store(key, request, response, timeout):
+    if response.status_code != HTTPStatus.OK or response.streaming:
+        return
+    patch_response_headers(response, timeout)
+    ttl = timeout
+    if not request.user.is_authenticated:
+        ttl += settings.PAGE_CACHE_STALE_TTL
+    caches['pages'].set(
+        key,
+        (time.time() + timeout, response['Content-Type'], response.content),
+        ttl,
+    )
+
+
+def refresh(key, view, request, args, kwargs, timeout):
+    try:
+        store(key, request, view(request, *args, **kwargs), timeout)
+    except Exception:
+        logger.exception('Не удалось обновить страницу %s', request.path)
+    finally:
+        caches['pages'].delete(f'{key}:refresh')
+        connections.close_all()
+
+
+def revalidate(key, view, request, args, kwargs, timeout):
+    """Обновление в фоне, если его еще не запустил другой запрос."""
+    if breaker.is_open():
+        return
+    if not caches['pages'].add(
+        f'{key}:refresh', True, settings.PAGE_CACHE_REFRESH_LOCK
+    ):
+        return
+    threading.Thread(
+        target=refresh, args=(key, view, request, args, kwargs, timeout),
+        daemon=True,
+    ).start()
+
+
+def cache_page(timeout, key_prefix):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            key = page_key(request, key_prefix)
+            entry = caches['pages'].get(key)
+            if entry is None:
+                response = view(request, *args, **kwargs)
+                store(key, request, response, timeout)
+                return response
+            fresh_until, content_type, content = entry
+            response = HttpResponse(content, content_type=content_type)
+            remaining = fresh_until - time.time()
+            patch_response_headers(response, max(math.ceil(remaining), 0))
+            if remaining < 0:
+                response['Warning'] = STALE_WARNING
+                revalidate(key, view, request, args, kwargs, timeout)
+            return response
+        return wrapper
+    return decorator
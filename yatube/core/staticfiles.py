@@ -0,0 +1,190 @@
+"""Статика с хешами в именах, предсжатыми копиями и отдачей из WSGI.
+
+``CompressedManifestStaticFilesStorage`` при ``collectstatic`` пишет рядом
+с каждым хешированным файлом ``.gz`` и, если установлен ``brotli``,
+``.br``. ``StaticFilesApplication`` оборачивает WSGI-приложение и отдаёт
+файлы из ``STATIC_ROOT`` сам: выбирает сжатую копию по
+``Accept-Encoding`` и ставит вечный ``Cache-Control`` на файлы с хешем.
+"""
+import gzip
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.html', '.txt', '.json', '.xml', '.map', '.ico',
+)
+MIN_COMPRESS_SIZE = 256
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+SHORT_LIVED = 'public, max-age=60'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+BLOCK_SIZE = 64 * 1024
+
+
+def accepted_encodings(header):
+    """``Accept-Encoding`` как словарь ``кодировка -> q``.
+
+    Кодировка с некорректным ``q`` считается непринятой.
+    """
+    accepted = {}
+    for item in header.split(','):
+        token, *params = item.split(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[token] = quality
+    return accepted
+
+
+def compress(path):
+    """Пишет .gz и .br рядом с файлом, если это уменьшает размер."""
+    with open(path, 'rb') as file:
+        data = file.read()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return []
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data)))
+    written = []
+    for suffix, compressed in variants:
+        if len(compressed) < len(data):
+            with open(path + suffix, 'wb') as file:
+                file.write(compressed)
+            written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def post_process(self, *args, **kwargs):
+        yield from super().post_process(*args, **kwargs)
+        if kwargs.get('dry_run'):
+            return
+        for name in set(self.hashed_files.values()):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                compress(self.path(name))
+
+    def stored_name(self, name):
+        # Без collectstatic (разработка, тесты) отдаём исходное имя.
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+
+class StaticFile:
+    __slots__ = ('path', 'headers', 'etag', 'variants')
+
+    def __init__(self, path, url_path):
+        self.path = path
+        stat = os.stat(path)
+        content_type, _ = mimetypes.guess_type(path)
+        self.headers = [
+            ('Content-Type', content_type or 'application/octet-stream'),
+            ('Cache-Control',
+             IMMUTABLE if HASHED_NAME.search(url_path) else SHORT_LIVED),
+            ('Last-Modified', formatdate(stat.st_mtime, usegmt=True)),
+            ('Vary', 'Accept-Encoding'),
+        ]
+        self.etag = f'{int(stat.st_mtime):x}-{stat.st_size:x}'
+        self.variants = [
+            (encoding, path + suffix, os.path.getsize(path + suffix))
+            for encoding, suffix in ENCODINGS
+            if os.path.exists(path + suffix)
+        ]
+        self.variants.append((None, path, stat.st_size))
+
+    def choose(self, accept_encoding):
+        """Сжатая копия с наибольшим ``q`` или, если ни одна не принята
+        (``q=0`` или не упомянута), исходный файл."""
+        accepted = accepted_encodings(accept_encoding)
+        default = accepted.get('*', 0.0)
+        best, best_quality = self.variants[-1], 0.0
+        for variant in self.variants[:-1]:
+            quality = accepted.get(variant[0], default)
+            if quality > best_quality:
+                best, best_quality = variant, quality
+        return best
+
+
+class StaticFilesApplication:
+    """WSGI-обёртка, отдающая собранную статику без участия Django.
+
+    Список файлов строится один раз при старте, поэтому поиск — это
+    обращение к словарю, а не к файловой системе.
+    """
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.root = root or settings.STATIC_ROOT
+        self.prefix = prefix or settings.STATIC_URL
+        self.files = self.scan()
+
+    def scan(self):
+        files = {}
+        if not self.root or not os.path.isdir(self.root):
+            return files
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(directory, name)
+                url_path = self.prefix + os.path.relpath(
+                    path, self.root
+                ).replace(os.sep, '/')
+                files[url_path] = StaticFile(path, url_path)
+        return files
+
+    def __call__(self, environ, start_response):
+        static_file = self.files.get(environ.get('PATH_INFO', ''))
+        method = environ.get('REQUEST_METHOD')
+        if static_file is None or method not in ('GET', 'HEAD'):
+            return self.application(environ, start_response)
+        return self.serve(static_file, environ, start_response)
+
+    def serve(self, static_file, environ, start_response):
+        encoding, path, size = static_file.choose(
+            environ.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        # У каждой сжатой копии свой ETag: это разные представления.
+        etag = (f'"{static_file.etag}-{encoding}"' if encoding
+                else f'"{static_file.etag}"')
+        headers = [*static_file.headers, ('ETag', etag)]
+        if etag in environ.get('HTTP_IF_NONE_MATCH', ''):
+            start_response('304 Not Modified', headers)
+            return []
+        if encoding is not None:
+            headers.append(('Content-Encoding', encoding))
+        headers.append(('Content-Length', str(size)))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file = open(path, 'rb')
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            return file_wrapper(file, BLOCK_SIZE)
+        return read_blocks(file)
+
+
+def read_blocks(file):
+    with file:
+        yield from iter(lambda: file.read(BLOCK_SIZE), b'')
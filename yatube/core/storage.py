@@ -0,0 +1,166 @@
+"""Хранилище загрузок с адресацией по содержимому.
+
+Файл называется по SHA-256 своего содержимого и лежит в двух уровнях
+подкаталогов: ``posts/ab/cd/abcd….jpg``. Одинаковые картинки хранятся
+один раз, а sorl-thumbnail, который ключует миниатюры по имени
+исходника, не режет их повторно.
+
+Сколько записей ссылается на файл, считает ``core.StoredFile``;
+счетчики ведут сигналы, подключенные через ``track``. Файлы без ссылок
+удаляет команда ``gc_media``, а файлы удаленных постов — сразу
+``delete_orphans``.
+"""
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+from sorl.thumbnail import delete
+
+from .models import StoredFile
+from .snapshots import previous, watch
+from .transactions import immediate
+
+_tracked = []
+
+
+def content_name(directory, digest, extension):
+    return posixpath.join(
+        directory, digest[:2], digest[2:4], digest + extension.lower()
+    )
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # Одинаковое имя означает одинаковое содержимое: суффиксы не нужны.
+        return name
+
+    def _save(self, name, content):
+        directory, basename = posixpath.split(name)
+        extension = os.path.splitext(basename)[1]
+        os.makedirs(self.location, exist_ok=True)
+        # Пишем во временный файл и одновременно считаем хеш: один проход.
+        digest = hashlib.sha256()
+        descriptor, temp_path = tempfile.mkstemp(
+            dir=self.location, prefix='.upload-'
+        )
+        try:
+            with os.fdopen(descriptor, 'wb') as temp:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+            name = content_name(directory, digest.hexdigest(), extension)
+            full_path = self.path(name)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            try:
+                # link атомарен и не перезаписывает уже загруженную копию.
+                os.link(temp_path, full_path)
+            except FileExistsError:
+                pass
+        finally:
+            os.unlink(temp_path)
+        register(name, os.path.getsize(full_path))
+        return name
+
+
+def register(name, size=0):
+    """Заводит учет файла, а уже учтенному обновляет дату создания.
+
+    Иначе повторно загруженный файл без ссылок остался бы старым для
+    ``gc_media`` и мог бы удалиться до сохранения поста с ним.
+    """
+    try:
+        with immediate():
+            _, created = StoredFile.objects.get_or_create(
+                name=name, defaults={'size': size}
+            )
+    except IntegrityError:
+        created = False
+    if not created:
+        StoredFile.objects.filter(name=name).update(created=timezone.now())
+
+
+def incref(name):
+    if not name:
+        return
+    if not StoredFile.objects.filter(name=name).update(
+        refcount=F('refcount') + 1
+    ):
+        register(name)
+        StoredFile.objects.filter(name=name).update(
+            refcount=F('refcount') + 1
+        )
+
+
+def decref(name):
+    if name:
+        StoredFile.objects.filter(name=name, refcount__gt=0).update(
+            refcount=F('refcount') - 1
+        )
+
+
+def is_referenced(name):
+    """Есть ли запись, ссылающаяся на файл, в любом отслеживаемом поле."""
+    return any(
+        model._default_manager.filter(**{field: name}).exists()
+        for model, field in _tracked
+    )
+
+
+def remove(name):
+    """Удаляет файл, его миниатюры и учетную запись."""
+    delete(name)
+    StoredFile.objects.filter(name=name, refcount=0).delete()
+
+
+def delete_orphans(names):
+    """Удаляет те из файлов ``names``, на которые больше нет ссылок."""
+    removed = 0
+    for name in names:
+        if not StoredFile.objects.filter(name=name, refcount=0).exists():
+            continue
+        if is_referenced(name):
+            continue
+        remove(name)
+        removed += 1
+    return removed
+
+
+def track(model, field):
+    """Ведет счетчики ссылок для файлового поля модели."""
+    _tracked.append((model, field))
+    watch(model, field)
+    attname = f'_stored_file_old_{field}'
+
+    def remember_old(sender, instance, raw=False, update_fields=None,
+                     **kwargs):
+        if raw or (update_fields is not None and field not in update_fields):
+            return
+        instance.__dict__[attname] = previous(instance, field) or ''
+
+    def count_new(sender, instance, **kwargs):
+        old = instance.__dict__.pop(attname, None)
+        new = getattr(instance, field).name or ''
+        if old is not None and old != new:
+            incref(new)
+            decref(old)
+
+    def count_deleted(sender, instance, **kwargs):
+        decref(getattr(instance, field).name)
+
+    pre_save.connect(remember_old, sender=model, weak=False)
+    post_save.connect(count_new, sender=model, weak=False)
+    post_delete.connect(count_deleted, sender=model, weak=False)
+
+
+def tracked_fields():
+    return list(_tracked)
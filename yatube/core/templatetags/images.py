@@ -0,0 +1,13 @@
+from django import template
+
+from core.images import resized_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def resized(image, width, height, crop=False, image_format=None):
+    """Подписанная ссылка на картинку нужного размера."""
+    if not image:
+        return ''
+    return resized_url(image, width, height, crop, image_format)
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+
+from ..backends.sqlite3.base import WriteQueue
+from ..transactions import immediate
+
+User = get_user_model()
+
+
+class SQLiteBackendTests(TestCase):
+    def test_pragmas_applied(self):
+        """Прагмы из настроек применяются к новому соединению."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(
+                cursor.fetchone()[0],
+                connection.settings_dict['OPTIONS']['timeout'] * 1000,
+            )
+
+    def test_write_queue_is_fifo(self):
+        """Очередь писателей пропускает потоки в порядке прихода."""
+        queue = WriteQueue()
+        queue.acquire()
+        order = []
+        threads = []
+        for number in range(3):
+            ready = threading.Event()
+
+            def writer(number=number, ready=ready):
+                ready.set()
+                queue.acquire()
+                order.append(number)
+                queue.release()
+
+            thread = threading.Thread(target=writer)
+            thread.start()
+            ready.wait()
+            while len(queue._waiters) <= number:
+                time.sleep(0.001)
+            threads.append(thread)
+        queue.release()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, [0, 1, 2])
+
+    def test_write_queue_timeout(self):
+        """Ожидание писателя ограничено таймаутом."""
+        queue = WriteQueue()
+        queue.acquire()
+        self.assertFalse(queue.acquire(timeout=0.01))
+        queue.release()
+        self.assertTrue(queue.acquire(timeout=0.01))
+
+
+class TransactionModeTests(TransactionTestCase):
+    def test_read_only_atomic_does_not_take_write_lock(self):
+        """Блок, который только читает, не встает в очередь писателей."""
+        with transaction.atomic():
+            User.objects.count()
+            self.assertFalse(connection.holds_write_lock)
+            User.objects.create(username='writer')
+            self.assertTrue(connection.holds_write_lock)
+        self.assertFalse(connection.holds_write_lock)
+
+    def test_immediate_takes_write_lock_on_begin(self):
+        """``immediate()`` берет блокировку записи до первого чтения."""
+        with immediate():
+            self.assertTrue(connection.holds_write_lock)
+            User.objects.count()
+        self.assertFalse(connection.holds_write_lock)
+        with transaction.atomic():
+            User.objects.count()
+            self.assertFalse(connection.holds_write_lock)
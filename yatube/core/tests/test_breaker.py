@@ -0,0 +1,164 @@
+import time
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+from .. import stale
+from ..breaker import breaker
+
+User = get_user_model()
+
+
+@override_settings(BREAKER_MIN_REQUESTS=4, BREAKER_FAILURE_RATE=0.5)
+class BreakerTests(TestCase):
+    def setUp(self):
+        breaker.reset()
+
+    def tearDown(self):
+        breaker.reset()
+
+    def test_opens_on_failure_rate(self):
+        for failed in (True, False, False):
+            breaker.record(failed)
+        self.assertFalse(breaker.is_open())
+        breaker.record(True)
+        self.assertTrue(breaker.is_open())
+        breaker.reset()
+        self.assertFalse(breaker.is_open())
+
+    def test_window_forgets_old_failures(self):
+        with override_settings(BREAKER_WINDOW=0):
+            for _ in range(4):
+                breaker.record(True)
+        self.assertFalse(breaker.is_open())
+
+
+class StaleFallbackTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description=''
+        )
+        Post.objects.create(
+            text='Первый пост', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        caches['pages'].clear()
+        breaker.reset()
+
+    def tearDown(self):
+        breaker.reset()
+
+    def test_stale_page_is_served_while_one_refresh_runs(self):
+        url = reverse('posts:index')
+        self.client.get(url)
+        Post.objects.create(text='Второй пост', author=self.author)
+        later = time.time() + 60
+        with mock.patch.object(stale.time, 'time', return_value=later), \
+                mock.patch.object(stale.threading, 'Thread') as thread:
+            for _ in range(2):
+                response = self.client.get(url)
+                self.assertNotContains(response, 'Второй пост')
+                self.assertIn('Warning', response)
+            self.assertEqual(thread.call_count, 1)
+            kwargs = thread.call_args.kwargs
+            with mock.patch.object(stale.connections, 'close_all'):
+                kwargs['target'](*kwargs['args'])
+            response = self.client.get(url)
+        self.assertContains(response, 'Второй пост')
+        self.assertNotIn('Warning', response)
+
+    def test_open_breaker_serves_copies_or_503(self):
+        group_url = reverse('posts:group_list', args=['group'])
+        self.client.get(group_url)
+        with override_settings(BREAKER_MIN_REQUESTS=1):
+            breaker.record(True)
+        with self.assertNumQueries(0):
+            response = self.client.get(group_url)
+        self.assertContains(response, 'Первый пост')
+        response = self.client.get(reverse('posts:profile', args=['author']))
+        self.assertEqual(response.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertIn('Retry-After', response)
+
+    def test_database_error_is_not_500(self):
+        group_url = reverse('posts:group_list', args=['group'])
+        self.client.get(group_url)
+        locked = OperationalError('database is locked')
+        with mock.patch('posts.views.paginate', side_effect=locked), \
+                self.assertLogs('core.breaker', 'ERROR'):
+            response = self.client.get(group_url)
+            self.assertContains(response, 'Первый пост')
+            self.assertEqual(
+                self.client.get(
+                    reverse('posts:profile', args=['author'])
+                ).status_code,
+                HTTPStatus.SERVICE_UNAVAILABLE,
+            )
+
+    @override_settings(POSTS_STREAMING=True)
+    def test_guarded_listings_are_not_streamed(self):
+        group_url = reverse('posts:group_list', args=['group'])
+        self.assertFalse(self.client.get(group_url).streaming)
+        with override_settings(BREAKER_MIN_REQUESTS=1):
+            breaker.record(True)
+        self.assertContains(self.client.get(group_url), 'Первый пост')
+
+    def test_copies_are_taken_from_anonymous_pages_only(self):
+        group_url = reverse('posts:group_list', args=['group'])
+        self.client.force_login(self.author)
+        self.client.get(group_url)
+        with override_settings(BREAKER_MIN_REQUESTS=1):
+            breaker.record(True)
+        self.assertEqual(
+            self.client.get(group_url).status_code,
+            HTTPStatus.SERVICE_UNAVAILABLE,
+        )
+
+    def test_copies_ignore_unknown_query_params(self):
+        group_url = reverse('posts:group_list', args=['group'])
+        self.client.get(group_url, {'utm_source': 'mail'})
+        with override_settings(BREAKER_MIN_REQUESTS=1):
+            breaker.record(True)
+        response = self.client.get(group_url, {'utm_source': 'news'})
+        self.assertContains(response, 'Первый пост')
+        self.assertEqual(
+            self.client.get(group_url, {'page': 2}).status_code,
+            HTTPStatus.SERVICE_UNAVAILABLE,
+        )
+
+    def test_logged_in_pages_are_not_kept_stale(self):
+        pages = caches['pages']
+        url = reverse('posts:index')
+        with mock.patch.object(pages, 'set', wraps=pages.set) as store:
+            self.client.get(url)
+            self.client.force_login(self.author)
+            self.client.get(url)
+        anonymous_ttl, user_ttl = [
+            call.args[2] for call in store.call_args_list
+            if call.args[0].startswith('stale:page:')
+        ]
+        self.assertEqual(user_ttl, 20)
+        self.assertGreater(anonymous_ttl, 60 * 60)
+
+    def test_cached_pages_keep_cache_headers(self):
+        url = reverse('posts:index')
+        fresh = self.client.get(url)
+        cached = self.client.get(url)
+        for response in (fresh, cached):
+            self.assertIn('max-age=20', response['Cache-Control'])
+            self.assertIn('Expires', response)
+        later = time.time() + 60
+        with mock.patch.object(stale.time, 'time', return_value=later), \
+                mock.patch.object(stale.threading, 'Thread'):
+            response = self.client.get(url)
+        self.assertIn('max-age=0', response['Cache-Control'])
@@ -0,0 +1,35 @@
+from django.test import SimpleTestCase
+
+from core.hll import HyperLogLog
+
+
+class HyperLogLogTests(SimpleTestCase):
+    def test_estimate_is_close(self):
+        """Оценка укладывается в несколько стандартных ошибок (~3%)."""
+        for total in (10, 1000, 50000):
+            with self.subTest(total=total):
+                sketch = HyperLogLog()
+                for number in range(total):
+                    sketch.add(f'visitor-{number}')
+                    sketch.add(f'visitor-{number}')
+                self.assertAlmostEqual(
+                    sketch.count(), total, delta=max(1, total * 0.1)
+                )
+
+    def test_merge_counts_union(self):
+        first, second = HyperLogLog(), HyperLogLog()
+        for number in range(2000):
+            first.add(number)
+        for number in range(1000, 3000):
+            second.add(number)
+        self.assertAlmostEqual(
+            first.merge(second).count(), 3000, delta=300
+        )
+
+    def test_bytes_round_trip(self):
+        sketch = HyperLogLog()
+        sketch.add('visitor')
+        data = sketch.to_bytes()
+        self.assertEqual(len(data), 1024)
+        self.assertEqual(HyperLogLog.from_bytes(data).count(), 1)
+        self.assertEqual(HyperLogLog.from_bytes(b'').count(), 0)
@@ -0,0 +1,60 @@
+from django.core.cache import cache
+from django.db import connection
+from django.http import Http404
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from posts.identity import groups_by_slug
+from posts.models import Group
+
+
+class IdentityMapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        groups_by_slug.clear_local()
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def test_repeated_lookup_hits_cache(self):
+        """Повторный поиск по slug не обращается к базе."""
+        self.assertEqual(groups_by_slug.get('test-slug'), self.group)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(groups_by_slug.get('test-slug'), self.group)
+        self.assertEqual(len(queries), 0)
+
+    def test_shared_cache_serves_other_processes(self):
+        """Без локального LRU объект берется из общего кэша."""
+        groups_by_slug.get('test-slug')
+        groups_by_slug.clear_local()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(groups_by_slug.get('test-slug'), self.group)
+        self.assertEqual(len(queries), 0)
+
+    def test_missing_lookups_are_cached(self):
+        """Несуществующий slug кэшируется как 404."""
+        with self.assertRaises(Http404):
+            groups_by_slug.get_or_404('missing')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertIsNone(groups_by_slug.get('missing'))
+        self.assertEqual(len(queries), 0)
+
+    def test_create_clears_negative_entry(self):
+        """Созданный объект сразу виден, даже если до этого был 404."""
+        self.assertIsNone(groups_by_slug.get('new-slug'))
+        group = Group.objects.create(
+            title='Новая', slug='new-slug', description='Описание'
+        )
+        self.assertEqual(groups_by_slug.get('new-slug'), group)
+
+    def test_rename_and_delete_invalidate(self):
+        """Переименование и удаление сбрасывают кэш."""
+        groups_by_slug.get('test-slug')
+        self.group.slug = 'renamed'
+        self.group.save()
+        self.assertIsNone(groups_by_slug.get('test-slug'))
+        self.assertEqual(groups_by_slug.get('renamed'), self.group)
+        self.group.delete()
+        self.assertIsNone(groups_by_slug.get('renamed'))
@@ -0,0 +1,168 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core import images
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+TEMP_CACHE_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_CACHE_ROOT=TEMP_CACHE_ROOT
+)
+class ResizeEndpointTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        buffer = BytesIO()
+        Image.new('RGB', (400, 200), 'blue').save(buffer, 'JPEG')
+        with override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT):
+            cls.name = default_storage.save(
+                'posts/photo.jpg', ContentFile(buffer.getvalue())
+            )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(TEMP_CACHE_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_CACHE_ROOT, ignore_errors=True)
+
+    def fetch(self, url):
+        response = self.client.get(url)
+        content = b''.join(response.streaming_content)
+        return response, Image.open(BytesIO(content))
+
+    def test_variant_is_resized_and_cached_forever(self):
+        response, image = self.fetch(
+            images.resized_url(self.name, 100, 100, crop=True,
+                               image_format='webp')
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(image.size, (100, 100))
+        self.assertEqual(image.format, 'WEBP')
+        self.assertEqual(response['Cache-Control'], images.IMMUTABLE)
+
+    def test_fit_keeps_aspect_ratio(self):
+        _, image = self.fetch(images.resized_url(self.name, 100, 100))
+        self.assertEqual(image.size, (100, 50))
+        self.assertEqual(image.format, 'JPEG')
+
+    def test_variant_is_rendered_once(self):
+        """Повторный запрос отдается из дискового кэша."""
+        url = images.resized_url(self.name, 50, 50)
+        with mock.patch.object(
+            images, 'render_variant', wraps=images.render_variant
+        ) as render:
+            self.client.get(url)
+            self.client.get(url)
+        self.assertEqual(render.call_count, 1)
+
+    def test_concurrent_requests_share_one_resize(self):
+        """Одновременные запросы одного варианта ждут один ресайз."""
+        original = images.render_variant
+
+        def slow_render(*args):
+            time.sleep(0.05)
+            original(*args)
+
+        paths = []
+        with mock.patch.object(
+            images, 'render_variant', side_effect=slow_render
+        ) as render, mock.patch.object(images, 'evict_image_cache'):
+            threads = [
+                threading.Thread(target=lambda: paths.append(
+                    images.ensure_variant('60x60c', self.name)
+                ))
+                for _ in range(5)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(len(set(paths)), 1)
+
+    def test_bad_signature_and_size_are_rejected(self):
+        url = images.resized_url(self.name, 100, 100)
+        self.assertEqual(
+            self.client.get(url.replace('100x100', '200x200')).status_code,
+            404,
+        )
+        self.assertEqual(
+            self.client.get(images.resized_url(self.name, 9999, 1))
+            .status_code,
+            404,
+        )
+
+    def test_evict_removes_least_recently_used(self):
+        old = images.ensure_variant('10x10', self.name)
+        new = images.ensure_variant('20x20', self.name)
+        os.utime(old, (1, 1))
+        self.assertEqual(images.evict(os.path.getsize(new)), 1)
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(new))
+
+    @override_settings(IMAGE_MAX_SIDE=10000)
+    def test_lock_files_are_bounded(self):
+        """Файлов блокировок не больше числа полос, у вариантов своих нет."""
+        with mock.patch.object(images, 'render_variant'), \
+                mock.patch.object(images, 'evict_image_cache'):
+            for side in range(1, 2 * len(images._locks) + 1):
+                images.ensure_variant(f'{side}x{side}', self.name)
+        locks = [
+            name for _, _, names in os.walk(TEMP_CACHE_ROOT)
+            for name in names if name.endswith('.lock')
+        ]
+        self.assertLessEqual(len(locks), len(images._locks))
+        self.assertEqual(
+            set(os.listdir(os.path.dirname(images.lock_path(0)))),
+            set(locks),
+        )
+
+    def test_missing_source_is_not_retried(self):
+        url = images.resized_url('posts/missing.jpg', 100, 100)
+        with mock.patch.object(
+            images, 'ensure_variant', wraps=images.ensure_variant
+        ) as ensure:
+            self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(ensure.call_count, 1)
+
+    def test_variant_evicted_before_sending_is_rebuilt(self):
+        send_file = images.send_file
+
+        def evict_first(request, path, cache_control):
+            if not sending.called:
+                os.unlink(path)
+            sending()
+            return send_file(request, path, cache_control)
+
+        sending = mock.Mock()
+        with mock.patch.object(images, 'send_file', evict_first):
+            response, image = self.fetch(
+                images.resized_url(self.name, 100, 100)
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(image.size, (100, 50))
+        self.assertEqual(sending.call_count, 2)
+
+    def test_template_tag(self):
+        rendered = Template(
+            '{% load images %}{% resized image 10 10 crop=True %}'
+        ).render(Context({'image': self.name}))
+        self.assertEqual(
+            rendered, images.resized_url(self.name, 10, 10, crop=True)
+        )
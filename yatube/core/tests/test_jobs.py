@@ -0,0 +1,129 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..jobs import claim, release_stale_jobs, run_pending, task
+from ..management.commands.run_workers import work
+from ..models import Job
+
+User = get_user_model()
+calls = []
+
+
+@task(name='tests.record', dedup=lambda value: f'record:{value}')
+def record(value):
+    calls.append(value)
+
+
+@task(name='tests.explode', max_attempts=2)
+def explode():
+    raise RuntimeError('boom')
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_jobs_run_by_priority(self):
+        """Задачи с большим приоритетом выполняются первыми."""
+        record.enqueue(('low',), priority=0)
+        record.enqueue(('high',), priority=10)
+        self.assertEqual(run_pending(), 2)
+        self.assertEqual(calls, ['high', 'low'])
+        self.assertFalse(Job.objects.exists())
+
+    def test_dedup_key_collapses_duplicates(self):
+        """Повторная постановка той же задачи не создает дубликат."""
+        first = record.delay('same')
+        second = record.delay('same')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_delay_while_running_queues_new_job(self):
+        """Выполняемая задача не поглощает новую с тем же ключом."""
+        running = record.delay('same')
+        claim('worker')
+        pending = record.delay('same')
+        self.assertNotEqual(pending.pk, running.pk)
+        self.assertEqual(record.delay('same').pk, pending.pk)
+
+    def test_stale_job_with_pending_duplicate_is_dropped(self):
+        stale = record.delay('same')
+        other = record.delay('other')
+        claim('worker')
+        claim('worker')
+        Job.objects.filter(pk__in=(stale.pk, other.pk)).update(
+            locked_at=timezone.now() - timedelta(days=1)
+        )
+        pending = record.delay('same')
+        self.assertEqual(release_stale_jobs(), 1)
+        self.assertEqual(
+            set(Job.objects.values_list('pk', 'status')),
+            {(pending.pk, Job.PENDING), (other.pk, Job.PENDING)},
+        )
+
+    @override_settings(JOBS_RELEASE_INTERVAL=0)
+    def test_worker_loop_releases_stale_jobs(self):
+        stop = threading.Event()
+        with mock.patch(
+            'core.management.commands.run_workers.release_stale_jobs'
+        ) as release, mock.patch(
+            'core.management.commands.run_workers.connections'
+        ):
+            work(stop, poll_interval=0, burst=True)
+        release.assert_called_once()
+
+    def test_failed_job_is_retried_with_backoff(self):
+        """Упавшая задача откладывается, затем помечается ошибкой."""
+        job = explode.delay()
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('boom', job.last_error)
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+
+    def test_delayed_job_waits(self):
+        """Задача с countdown не выполняется раньше времени."""
+        record.enqueue(('later',), countdown=60)
+        self.assertEqual(run_pending(), 0)
+
+    @override_settings(JOBS_ALWAYS_EAGER=True)
+    def test_eager_mode_runs_inline(self):
+        record.delay('now')
+        self.assertEqual(calls, ['now'])
+        self.assertFalse(Job.objects.exists())
+
+    def test_password_reset_email_is_deferred(self):
+        """Письмо сброса пароля уходит из воркера, а не из запроса."""
+        user = User.objects.create_user(
+            username='auth', email='auth@example.com', password='pass'
+        )
+        self.client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'auth@example.com'},
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        job = Job.objects.get(task='users.jobs.send_password_reset')
+        self.assertEqual(job.args[0], user.pk)
+        run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['auth@example.com'])
+        link = next(
+            line for line in mail.outbox[0].body.splitlines()
+            if '/reset/' in line
+        )
+        self.assertNotIn(link.split('/reset/')[1].strip('/'), str(job.args))
+        self.assertEqual(
+            self.client.get(link.strip(), follow=True).status_code, 200
+        )
@@ -0,0 +1,50 @@
+from django.test import SimpleTestCase
+
+from core.markdown import render
+
+
+class MarkdownTests(SimpleTestCase):
+    def test_html_in_text_is_escaped(self):
+        self.assertEqual(
+            render('<script>alert(1)</script> **<b>**'),
+            '<p>&lt;script&gt;alert(1)&lt;/script&gt; '
+            '<strong>&lt;b&gt;</strong></p>',
+        )
+
+    def test_inline_markup(self):
+        cases = {
+            '**жирный** и *курсив*':
+                '<p><strong>жирный</strong> и <em>курсив</em></p>',
+            '`**не разметка**`': '<p><code>**не разметка**</code></p>',
+            '[сайт](https://example.com/?a=1&b=2)':
+                '<p><a href="https://example.com/?a=1&amp;b=2" '
+                'rel="nofollow noopener">сайт</a></p>',
+            '[плохо](javascript:alert(1))':
+                '<p>[плохо](javascript:alert(1))</p>',
+            '[чужой](/\\evil.com)': '<p>[чужой](/\\evil.com)</p>',
+            '[*звезды*](http://x/*y*)':
+                '<p><a href="http://x/*y*" '
+                'rel="nofollow noopener"><em>звезды</em></a></p>',
+            'строка\nвторая': '<p>строка<br>вторая</p>',
+        }
+        for text, html in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(render(text), html)
+
+    def test_blocks(self):
+        text = (
+            '# Заголовок\n'
+            'Абзац\n\n'
+            '- один\n- два\n'
+            '1. раз\n'
+            '> цитата\n'
+            '```\n<b>код</b>\n```'
+        )
+        self.assertEqual(render(text), '\n'.join([
+            '<h3>Заголовок</h3>',
+            '<p>Абзац</p>',
+            '<ul><li>один</li><li>два</li></ul>',
+            '<ol><li>раз</li></ol>',
+            '<blockquote><p>цитата</p></blockquote>',
+            '<pre><code>&lt;b&gt;код&lt;/b&gt;</code></pre>',
+        ]))
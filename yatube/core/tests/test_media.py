@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.test import TestCase, override_settings
+
+DATA = bytes(range(256)) * 8
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaServeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'), exist_ok=True)
+        with open(os.path.join(TEMP_MEDIA_ROOT, 'posts', 'a.gif'), 'wb') as f:
+            f.write(DATA)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_full_file(self):
+        response = self.client.get('/media/posts/a.gif')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(b''.join(response.streaming_content), DATA)
+        self.assertEqual(response['Content-Type'], 'image/gif')
+        self.assertEqual(response['Content-Length'], str(len(DATA)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_range_request(self):
+        """Запрос отрезка получает 206 и только нужные байты."""
+        response = self.client.get(
+            '/media/posts/a.gif', HTTP_RANGE='bytes=10-19'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), DATA[10:20])
+        self.assertEqual(
+            response['Content-Range'], f'bytes 10-19/{len(DATA)}'
+        )
+        self.assertEqual(response['Content-Length'], '10')
+
+    def test_suffix_range(self):
+        response = self.client.get('/media/posts/a.gif', HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content), DATA[-5:])
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(
+            '/media/posts/a.gif', HTTP_RANGE=f'bytes={len(DATA)}-'
+        )
+        self.assertEqual(
+            response.status_code, HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+        self.assertEqual(response['Content-Range'], f'bytes */{len(DATA)}')
+
+    def test_stale_if_range_returns_whole_file(self):
+        response = self.client.get(
+            '/media/posts/a.gif', HTTP_RANGE='bytes=0-9',
+            HTTP_IF_RANGE='"stale"',
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_conditional_get(self):
+        """Совпавший ETag дает 304 без тела."""
+        etag = self.client.get('/media/posts/a.gif')['ETag']
+        response = self.client.get(
+            '/media/posts/a.gif', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_missing_and_escaping_paths(self):
+        cases = {
+            '/media/posts/missing.gif': HTTPStatus.NOT_FOUND,
+            '/media/posts/': HTTPStatus.NOT_FOUND,
+            '/media/../settings.py': HTTPStatus.BAD_REQUEST,
+        }
+        for path, status in cases.items():
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(path).status_code, status)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='/protected-media/')
+    def test_accel_redirect(self):
+        """За nginx тело не читается, отдается X-Accel-Redirect."""
+        response = self.client.get('/media/posts/a.gif')
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/a.gif'
+        )
+        self.assertEqual(response.content, b'')
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from core.staticfiles import (IMMUTABLE, StaticFilesApplication,
+                              accepted_encodings)
+
+CSS = 'body { color: black; }\n' * 100
+
+
+class StaticPipelineTests(SimpleTestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source)
+        self.addCleanup(shutil.rmtree, self.root)
+        with open(os.path.join(self.source, 'site.css'), 'w') as file:
+            file.write(CSS)
+        with override_settings(
+            STATICFILES_DIRS=[self.source], STATIC_ROOT=self.root
+        ):
+            call_command(
+                'collectstatic', interactive=False, verbosity=0,
+                stdout=StringIO(),
+            )
+        self.hashed = next(
+            name for name in os.listdir(self.root)
+            if name.startswith('site.') and name.endswith('.css')
+            and name != 'site.css'
+        )
+        self.fallthrough = []
+        self.app = StaticFilesApplication(
+            self.django_app, root=self.root, prefix='/static/'
+        )
+
+    def django_app(self, environ, start_response):
+        self.fallthrough.append(environ['PATH_INFO'])
+        start_response('404 Not Found', [])
+        return [b'']
+
+    def request(self, path, **headers):
+        environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, **headers}
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = status
+            response['headers'] = dict(headers)
+
+        body = b''.join(self.app(environ, start_response))
+        return response['status'], response['headers'], body
+
+    def test_collectstatic_writes_compressed_copies(self):
+        """Рядом с хешированным файлом лежит .gz, и он меньше оригинала."""
+        path = os.path.join(self.root, self.hashed)
+        self.assertTrue(os.path.exists(path + '.gz'))
+        self.assertLess(
+            os.path.getsize(path + '.gz'), os.path.getsize(path)
+        )
+
+    def test_gzip_variant_is_served(self):
+        """Клиент с gzip получает сжатую копию с вечным кэшем."""
+        status, headers, body = self.request(
+            f'/static/{self.hashed}', HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Cache-Control'], IMMUTABLE)
+        self.assertEqual(headers['Vary'], 'Accept-Encoding')
+        self.assertEqual(headers['Content-Type'], 'text/css')
+        self.assertEqual(int(headers['Content-Length']), len(body))
+
+    def test_identity_variant_without_accept_encoding(self):
+        status, headers, body = self.request(f'/static/{self.hashed}')
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(body.decode(), CSS)
+
+    def test_refused_encoding_is_not_served(self):
+        """Кодировка с ``q=0`` не отдается, даже если упомянута."""
+        for header in ('gzip;q=0', 'br;q=0, gzip; q=0', '*;q=0', 'gzipx'):
+            with self.subTest(header=header):
+                _, headers, body = self.request(
+                    f'/static/{self.hashed}', HTTP_ACCEPT_ENCODING=header
+                )
+                self.assertNotIn('Content-Encoding', headers)
+                self.assertEqual(body.decode(), CSS)
+
+    def test_accept_encoding_qualities(self):
+        self.assertEqual(
+            accepted_encodings('GZIP;q=0.5, br ; q=0, *, x;q=bad'),
+            {'gzip': 0.5, 'br': 0.0, '*': 1.0, 'x': 0.0},
+        )
+        _, headers, _ = self.request(
+            f'/static/{self.hashed}', HTTP_ACCEPT_ENCODING='br;q=0, *'
+        )
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+
+    def test_matching_etag_returns_not_modified(self):
+        _, headers, _ = self.request(f'/static/{self.hashed}')
+        status, _, body = self.request(
+            f'/static/{self.hashed}', HTTP_IF_NONE_MATCH=headers['ETag']
+        )
+        self.assertEqual(status, '304 Not Modified')
+        self.assertEqual(body, b'')
+
+    def test_unknown_path_falls_through(self):
+        """Неизвестные пути обрабатывает Django."""
+        status, _, _ = self.request('/static/missing.css')
+        self.assertEqual(status, '404 Not Found')
+        self.assertEqual(self.fallthrough, ['/static/missing.css'])
@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import StoredFile
+from posts.models import Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def save(self, name, data=b'image-bytes'):
+        return default_storage.save(name, ContentFile(data))
+
+    def test_identical_content_is_stored_once(self):
+        """Одинаковые файлы получают одно имя в шардированном каталоге."""
+        first = self.save('posts/one.JPG')
+        second = self.save('posts/two.jpg')
+        self.assertEqual(first, second)
+        directory, name = os.path.split(first)
+        self.assertEqual(directory, f'posts/{name[:2]}/{name[2:4]}')
+        self.assertTrue(name.endswith('.jpg'))
+        self.assertNotEqual(first, self.save('posts/one.jpg', b'other'))
+        self.assertEqual(StoredFile.objects.get(name=first).size, 11)
+
+    def test_refcount_follows_posts(self):
+        name = self.save('posts/a.gif')
+        first = Post.objects.create(text='1', author=self.user, image=name)
+        second = Post.objects.create(text='2', author=self.user, image=name)
+        # История правок появляется только с первой правкой.
+        self.assertEqual(StoredFile.objects.get(name=name).refcount, 2)
+        first.delete()
+        second.image = self.save('posts/b.gif', b'new')
+        second.save()
+        # Осталась ссылка из первой версии второго поста.
+        self.assertEqual(StoredFile.objects.get(name=name).refcount, 1)
+        second.delete()
+        self.assertEqual(StoredFile.objects.get(name=name).refcount, 0)
+
+    def test_gc_removes_only_orphans(self):
+        """gc_media удаляет файл без ссылок и не трогает используемый."""
+        used = self.save('posts/used.gif', b'used')
+        orphan = self.save('posts/orphan.gif', b'orphan')
+        # bulk_create обходит сигналы: счетчик остается нулевым.
+        Post.objects.bulk_create([
+            Post(text='1', author=self.user, image=used)
+        ])
+        StoredFile.objects.update(
+            created=timezone.now() - timedelta(days=1)
+        )
+        call_command('gc_media', stdout=StringIO())
+        self.assertTrue(default_storage.exists(used))
+        self.assertFalse(default_storage.exists(orphan))
+        self.assertFalse(StoredFile.objects.filter(name=orphan).exists())
+
+    def test_reupload_protects_orphan_from_gc(self):
+        name = self.save('posts/a.gif')
+        StoredFile.objects.update(
+            created=timezone.now() - timedelta(days=1)
+        )
+        self.assertEqual(self.save('posts/again.gif'), name)
+        call_command('gc_media', stdout=StringIO())
+        self.assertTrue(default_storage.exists(name))
+
+    def test_gc_rebuild_counts_references(self):
+        name = self.save('posts/a.gif')
+        Post.objects.bulk_create([
+            Post(text=str(number), author=self.user, image=name)
+            for number in range(3)
+        ])
+        call_command('gc_media', '--rebuild', stdout=StringIO())
+        self.assertEqual(StoredFile.objects.get(name=name).refcount, 3)
@@ -0,0 +1,94 @@
+"""Миниатюры sorl-thumbnail для целой страницы за один запрос к кэшу.
+
+``{% thumbnail %}`` ищет каждую миниатюру в key-value хранилище sorl
+отдельно. ``preload`` вычисляет имена миниатюр для всех картинок страницы
+без обращения к диску и достает их одним ``cache.get_many``; промахи
+добирает одним запросом к таблице sorl. Шаблону остается взять готовый
+``thumbnail.url``: сам он миниатюры карточек не режет, поэтому
+неудачная попытка не повторяется при рендере.
+"""
+import logging
+
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+logger = logging.getLogger(__name__)
+
+
+class KVStore(cached_db_kvstore.KVStore):
+    """Хранилище sorl в общем кэше с базой за ним и пакетным чтением."""
+
+    def get_many(self, image_files):
+        """Словарь ``key -> ImageFile`` для найденных файлов."""
+        raw_keys = {add_prefix(image_file.key): image_file.key
+                    for image_file in image_files}
+        values = self.cache.get_many(list(raw_keys))
+        missing = [key for key in raw_keys if key not in values]
+        if missing:
+            stored = dict(KVStoreModel.objects.filter(
+                key__in=missing
+            ).values_list('key', 'value'))
+            for key in missing:
+                values[key] = stored.get(key, cached_db_kvstore.EMPTY_VALUE)
+            self.cache.set_many(
+                {key: values[key] for key in missing},
+                sorl_settings.THUMBNAIL_CACHE_TIMEOUT,
+            )
+        return {
+            raw_keys[key]: deserialize_image_file(value)
+            for key, value in values.items()
+            if value and value != cached_db_kvstore.EMPTY_VALUE
+        }
+
+
+def thumbnail_file(file_, geometry, **options):
+    """Будущая миниатюра как ``ImageFile`` — то же имя, что у sorl."""
+    backend = default.backend
+    source = ImageFile(file_)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, geometry, options)
+    return ImageFile(name, default.storage)
+
+
+def preload(items, geometry, options, field='image', attr='thumbnail'):
+    """Кладет в ``item.<attr>`` миниатюру картинки ``item.<field>``.
+
+    Известные хранилищу миниатюры берутся одним ``get_many``, остальные
+    создаются как обычно через ``get_thumbnail``. Если миниатюру
+    создать не удалось, ``item.<attr>`` остается None и карточка
+    выходит без картинки.
+    """
+    wanted = {}
+    for item in items:
+        setattr(item, attr, None)
+        if getattr(item, field):
+            wanted[item] = thumbnail_file(
+                getattr(item, field), geometry, **options
+            )
+    if not wanted:
+        return
+    found = default.kvstore.get_many(wanted.values())
+    for item, expected in wanted.items():
+        thumbnail = found.get(expected.key)
+        if thumbnail is None:
+            try:
+                thumbnail = get_thumbnail(
+                    getattr(item, field), geometry, **options
+                )
+            except Exception:
+                logger.exception(
+                    'Ошибка создания миниатюры для %s', getattr(item, field)
+                )
+        setattr(item, attr, thumbnail)
@@ -0,0 +1,27 @@
+"""Транзакции, которые читают, а потом пишут.
+
+``atomic()`` открывает транзакцию как ``BEGIN DEFERRED``: блокировка
+записи берется только первым пишущим запросом. Если блок до него уже
+читал, а базу тем временем изменил другой писатель, SQLite не ждет, а
+сразу отказывает с "database is locked". ``immediate()`` открывает
+транзакцию как ``BEGIN IMMEDIATE``, и такой блок ждет своей очереди
+на входе.
+
+Вложенный в уже открытую транзакцию ``immediate()`` ее режим не меняет.
+"""
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+@contextmanager
+def immediate(using=None):
+    """``atomic()``, который сразу берет блокировку записи."""
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        connection.next_transaction_mode = 'IMMEDIATE'
+    try:
+        with transaction.atomic(using=using):
+            yield
+    finally:
+        connection.next_transaction_mode = None
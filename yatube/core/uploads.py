@@ -0,0 +1,78 @@
+"""Прием загружаемых картинок с ограниченным расходом памяти.
+
+``BoundedUploadHandler`` всегда пишет загрузку во временный файл, а
+когда превышен ``UPLOAD_MAX_SIZE``, прекращает прием: остаток запроса
+не читается, соединение сбрасывается. Оборванный файл в
+``request.FILES`` не попадает, поэтому views берут файлы через
+``uploaded_files``, и ``ImageUploadField`` отклоняет его по размеру.
+Картинку поле проверяет по заголовку — формат и число пикселей
+известны без декодирования.
+"""
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadhandler import (StopUpload,
+                                             TemporaryFileUploadHandler)
+
+ALLOWED_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+
+
+class BoundedUploadHandler(TemporaryFileUploadHandler):
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.UPLOAD_MAX_SIZE:
+            self.file.size = self.received
+            self.request.oversized_uploads = {
+                **getattr(self.request, 'oversized_uploads', {}),
+                self.field_name: self.file,
+            }
+            raise StopUpload(connection_reset=True)
+        self.file.write(raw_data)
+
+
+def uploaded_files(request):
+    """``request.FILES`` и файлы, прием которых оборван по размеру."""
+    files = request.FILES
+    oversized = getattr(request, 'oversized_uploads', None)
+    if oversized:
+        files = files.copy()
+        files.update(oversized)
+    return files or None
+
+
+class ImageUploadField(forms.ImageField):
+    default_error_messages = {
+        'too_large': 'Файл больше %(limit)s МБ.',
+        'too_many_pixels': 'Картинка больше %(limit)s мегапикселей.',
+        'unsupported_format': 'Поддерживаются JPEG, PNG, GIF и WebP.',
+    }
+
+    def to_python(self, data):
+        size = getattr(data, 'size', None)
+        if size is not None and size > settings.UPLOAD_MAX_SIZE:
+            raise ValidationError(
+                self.error_messages['too_large'],
+                code='too_large',
+                params={'limit': settings.UPLOAD_MAX_SIZE // 2 ** 20},
+            )
+        uploaded = super().to_python(data)
+        if uploaded is None:
+            return None
+        image = uploaded.image
+        if image.format not in ALLOWED_FORMATS:
+            raise ValidationError(
+                self.error_messages['unsupported_format'],
+                code='unsupported_format',
+            )
+        width, height = image.size
+        if width * height > settings.UPLOAD_MAX_PIXELS:
+            raise ValidationError(
+                self.error_messages['too_many_pixels'],
+                code='too_many_pixels',
+                params={'limit': settings.UPLOAD_MAX_PIXELS // 10 ** 6},
+            )
+        return uploaded
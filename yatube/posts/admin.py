@@ -1,23 +1,151 @@
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.contrib.auth.admin import UserAdmin
+from django.db import models
 
-from .models import Comment, Group, Post
+from core import fts
+from core.markdown import render_text
+from core.paginator import CachedCountPaginator
 
+from .jobs import hide_author, purge_group, purge_post, purge_user
+from .models import ArchivedPost, Comment, Group, Post, User
 
-class PostAdmin(admin.ModelAdmin):
+
+class PurgeAdminMixin:
+    """Удаление без каскада в запросе: запись сразу скрывается,
+    а удаляет ее вместе с зависимыми записями фоновая задача."""
+
+    purge_task = None
+    hidden_field = 'is_hidden'
+    hidden_value = True
+
+    def delete_model(self, request, obj):
+        setattr(obj, self.hidden_field, self.hidden_value)
+        obj.save(update_fields=[self.hidden_field])
+        self.purge_task.delay(obj.pk)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.delete_model(request, obj)
+
+    def get_deleted_objects(self, objs, request):
+        # Стандартная страница подтверждения обходит все зависимые записи.
+        return (
+            [str(obj) for obj in objs], {},
+            self.get_cascade_perms_needed(request), [],
+        )
+
+    def get_cascade_perms_needed(self, request):
+        """Модели каскада, которые пользователю нельзя удалять.
+
+        Как и Django, проверяет только модели из админки, но по связям
+        моделей, а не по записям: удалять их будет задача.
+        """
+        perms_needed = set()
+        seen = {self.model}
+        pending = [self.model]
+        while pending:
+            for relation in pending.pop()._meta.related_objects:
+                model = relation.related_model
+                if (getattr(relation, 'on_delete', None) is not models.CASCADE
+                        or model in seen):
+                    continue
+                seen.add(model)
+                pending.append(model)
+                model_admin = self.admin_site._registry.get(model)
+                if (model_admin is not None
+                        and not model_admin.has_delete_permission(request)):
+                    perms_needed.add(model._meta.verbose_name)
+        return perms_needed
+
+
+class MarkdownAdminMixin:
+    def save_model(self, request, obj, form, change):
+        if 'text' in form.changed_data or not obj.html_version:
+            render_text(obj)
+        super().save_model(request, obj, form, change)
+
+
+class FastChangeListMixin:
+    """Список без полного ``COUNT(*)`` на каждой странице."""
+
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+
+
+class LoadedAutocompleteSelect(AutocompleteSelect):
+    """Подпись выбранного значения берется из уже загруженного объекта,
+    а не отдельным запросом на каждую строку списка."""
+
+    selected = None
+
+    def optgroups(self, name, value, attr=None):
+        selected = self.selected
+        if selected is None or [str(v) for v in value] != [str(selected.pk)]:
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        label = self.choices.field.label_from_instance(selected)
+        options.append(
+            self.create_option(name, selected.pk, label, True, len(options))
+        )
+        return [(None, options, 0)]
+
+
+class PostAdmin(PurgeAdminMixin, MarkdownAdminMixin, FastChangeListMixin,
+                admin.ModelAdmin):
     list_display = (
         'pk',
         'text',
         'pub_date',
         'author',
         'group',
+        'is_hidden',
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
-    list_filter = ('pub_date',)
+    list_filter = ('is_hidden',)
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
+    purge_task = purge_post
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'group':
+            kwargs['widget'] = LoadedAutocompleteSelect(
+                db_field, self.admin_site, using=kwargs.get('using')
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_form(self, request, **kwargs):
+        base = super().get_changelist_form(request, **kwargs)
+
+        class ChangeListForm(base):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                # Группа уже выбрана через list_select_related.
+                self.fields['group'].widget.widget.selected = (
+                    self.instance.group
+                )
+
+        return ChangeListForm
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по индексу FTS5 вместо LIKE по всем текстам.
+        return fts.search(queryset, 'posts_post_fts', search_term), False
+
 
+class GroupAdmin(PurgeAdminMixin, admin.ModelAdmin):
+    list_display = ('title', 'slug', 'is_hidden')
+    list_filter = ('is_hidden',)
+    search_fields = ('title', 'slug')
+    purge_task = purge_group
 
-class CommentAdmin(admin.ModelAdmin):
+
+class CommentAdmin(MarkdownAdminMixin, FastChangeListMixin,
+                   admin.ModelAdmin):
     list_display = (
         'pk',
         'created',
@@ -25,8 +153,33 @@ class CommentAdmin(admin.ModelAdmin):
         'post',
         'text',
     )
+    list_select_related = ('author', 'post')
+    autocomplete_fields = ('author', 'post')
+    date_hierarchy = 'created'
+
+
+class ArchivedPostAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_select_related = ('author', 'group')
+    raw_id_fields = ('author', 'group')
+    empty_value_display = '-пусто-'
+
+
+class PurgeUserAdmin(PurgeAdminMixin, UserAdmin):
+    purge_task = purge_user
+    hidden_field = 'is_active'
+    hidden_value = False
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        # Посты из лент убирает задача: их может быть много.
+        hide_author.delay(obj.pk)
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
+admin.site.register(ArchivedPost, ArchivedPostAdmin)
+# Импорт django.contrib.auth.admin уже зарегистрировал стандартный UserAdmin.
+admin.site.unregister(User)
+admin.site.register(User, PurgeUserAdmin)
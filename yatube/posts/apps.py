@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class PostsConfig(AppConfig):
     name = 'posts'
     verbose_name = 'Посты'
+
+    def ready(self):
+        from core.storage import track
+
+        from . import identity, signals  # noqa: F401
+        from .models import (ArchivedPost, ArchivedPostRevision, Post,
+                             PostRevision)
+
+        track(Post, 'image')
+        track(ArchivedPost, 'image')
+        track(PostRevision, 'image')
+        track(ArchivedPostRevision, 'image')
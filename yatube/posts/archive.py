@@ -0,0 +1,119 @@
+"""Архив старых постов и комментариев.
+
+Посты старше ``ARCHIVE_AFTER_DAYS`` переносятся командой
+``archive_posts`` в таблицы ``ArchivedPost`` и ``ArchivedComment``
+с теми же id, а их история правок — в ``ArchivedPostRevision``,
+поэтому горячие таблицы и их индексы растут только на объем свежих
+записей. Перенос идет порциями, каждая в своей
+транзакции. Ссылки на архивные посты не меняются: ``post_detail``
+и профиль автора находят их в архиве, если в горячей таблице поста нет.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+
+from core.storage import incref
+from core.transactions import immediate
+
+from .models import (ArchivedComment, ArchivedPost, ArchivedPostRevision,
+                     Comment, Post, PostRevision, PostStats)
+from .purge import chunks
+
+POST_FIELDS = (
+    'id', 'text', 'text_html', 'html_version', 'pub_date', 'author_id',
+    'group_id', 'image', 'stats__views', 'stats__unique_visitors',
+)
+COMMENT_FIELDS = (
+    'id', 'post_id', 'author_id', 'text', 'text_html', 'html_version',
+    'created',
+)
+REVISION_FIELDS = (
+    'post_id', 'number', 'created', 'image', 'is_snapshot', 'data',
+)
+
+
+def horizon(days=None):
+    """Посты старше этого момента уходят в архив."""
+    if days is None:
+        days = settings.ARCHIVE_AFTER_DAYS
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_chunk(post_ids):
+    with immediate():
+        rows = Post.objects.filter(pk__in=post_ids).values_list(*POST_FIELDS)
+        archived = [
+            ArchivedPost(
+                id=pk, text=text, text_html=text_html,
+                html_version=html_version, pub_date=pub_date,
+                author_id=author_id, group_id=group_id, image=image,
+                views=views or 0, unique_visitors=unique_visitors or 0,
+            )
+            for (pk, text, text_html, html_version, pub_date, author_id,
+                 group_id, image, views, unique_visitors) in rows
+        ]
+        ArchivedPost.objects.bulk_create(archived)
+        ArchivedComment.objects.bulk_create(
+            [
+                ArchivedComment(
+                    id=pk, post_id=post_id, author_id=author_id, text=text,
+                    text_html=text_html, html_version=html_version,
+                    created=created,
+                )
+                for (pk, post_id, author_id, text, text_html, html_version,
+                     created) in
+                Comment.objects.filter(
+                    post_id__in=post_ids
+                ).values_list(*COMMENT_FIELDS).iterator()
+            ],
+            batch_size=settings.PURGE_CHUNK_SIZE,
+        )
+        revisions = [
+            ArchivedPostRevision(
+                post_id=post_id, number=number, created=created,
+                image=image, is_snapshot=is_snapshot, data=data,
+            )
+            for (post_id, number, created, image, is_snapshot, data) in
+            PostRevision.objects.filter(
+                post_id__in=post_ids
+            ).values_list(*REVISION_FIELDS).iterator()
+        ]
+        ArchivedPostRevision.objects.bulk_create(
+            revisions, batch_size=settings.PURGE_CHUNK_SIZE
+        )
+        # Удаление поста и его версий уменьшит счетчики ссылок на
+        # картинки: архивные копии ссылаются на них дальше.
+        for copy in (*archived, *revisions):
+            if copy.image:
+                incref(copy.image.name)
+        Comment.objects.filter(post_id__in=post_ids).delete()
+        Post.objects.filter(pk__in=post_ids).delete()
+    return len(archived)
+
+
+def archive_posts(before):
+    """Переносит в архив посты, опубликованные до ``before``.
+
+    Скрытые посты не трогаем: их удаляет задача очистки.
+    """
+    archived = 0
+    for chunk in chunks(
+        Post.objects.filter(pub_date__lt=before, is_hidden=False)
+    ):
+        archived += archive_chunk(chunk)
+    return archived
+
+
+def posts_count(author):
+    return author.posts.count() + author.archived_posts.count()
+
+
+def views_count(author):
+    hot = PostStats.objects.filter(post__author=author).aggregate(
+        total=Sum('views')
+    )['total'] or 0
+    return hot + (author.archived_posts.aggregate(
+        total=Sum('views')
+    )['total'] or 0)
@@ -0,0 +1,139 @@
+"""Счетчики просмотров постов с отложенной записью.
+
+Просмотр только увеличивает счетчик в памяти процесса и добавляет
+посетителя в HyperLogLog-скетч поста (1 КБ на пост). Накопленное уходит
+в ``PostStats`` одной транзакцией из пары запросов раз в
+``VIEWS_FLUSH_INTERVAL`` секунд или когда в памяти набралось
+``VIEWS_FLUSH_BATCH`` постов. Скетчи разных процессов сливаются в базе,
+так что уникальные посетители считаются по всем воркерам.
+"""
+import atexit
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import F
+
+from core.hll import HyperLogLog
+from core.transactions import immediate
+
+from .models import Post, PostStats
+
+logger = logging.getLogger(__name__)
+
+_pending = {}
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def visitor_id(request):
+    """Пользователь, сессия или, для анонимов без сессии, IP и браузер."""
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    if request.session.session_key:
+        return f'session:{request.session.session_key}'
+    fingerprint = '{}|{}'.format(
+        request.META.get('REMOTE_ADDR', ''),
+        request.META.get('HTTP_USER_AGENT', ''),
+    )
+    return 'anon:' + hashlib.sha1(fingerprint.encode()).hexdigest()
+
+
+def record_view(post_id, visitor):
+    global _last_flush
+    with _pending_lock:
+        entry = _pending.get(post_id)
+        if entry is None:
+            entry = _pending[post_id] = [0, HyperLogLog()]
+        entry[0] += 1
+        entry[1].add(visitor)
+        due = (
+            len(_pending) >= settings.VIEWS_FLUSH_BATCH
+            or time.monotonic() - _last_flush
+            >= settings.VIEWS_FLUSH_INTERVAL
+        )
+        if due:
+            _last_flush = time.monotonic()
+    if due:
+        try:
+            flush_views()
+        except DatabaseError as error:
+            # Просмотры вернулись в память и уйдут со следующей записью.
+            logger.warning('Просмотры не сохранены: %s', error)
+
+
+def pending_views(post_id):
+    """Просмотры этого процесса, еще не записанные в базу."""
+    with _pending_lock:
+        entry = _pending.get(post_id)
+        return entry[0] if entry else 0
+
+
+def flush_views():
+    """Записывает накопленные просмотры несколькими пакетными запросами.
+
+    Если запись не удалась, просмотры возвращаются в память процесса.
+    """
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+    if not pending:
+        return 0
+    try:
+        write_views(pending)
+    except DatabaseError:
+        restore(pending)
+        raise
+    return len(pending)
+
+
+def restore(pending):
+    with _pending_lock:
+        for post_id, (views, sketch) in pending.items():
+            entry = _pending.get(post_id)
+            if entry is None:
+                _pending[post_id] = [views, sketch]
+            else:
+                entry[0] += views
+                entry[1].merge(sketch)
+
+
+def write_views(pending):
+    with immediate():
+        stored = {
+            stats.pk: stats
+            for stats in PostStats.objects.filter(pk__in=list(pending))
+        }
+        missing = [post_id for post_id in pending if post_id not in stored]
+        # Пост могли удалить, пока просмотры копились в памяти.
+        created = [
+            PostStats(post_id=post_id)
+            for post_id in Post.objects.filter(
+                pk__in=missing
+            ).values_list('pk', flat=True)
+        ] if missing else []
+        PostStats.objects.bulk_create(created, ignore_conflicts=True)
+        for stats in created:
+            stored.setdefault(stats.post_id, stats)
+        for post_id, (views, sketch) in pending.items():
+            stats = stored.get(post_id)
+            if stats is None:
+                continue
+            sketch.merge(HyperLogLog.from_bytes(stats.visitors_sketch))
+            stats.views = F('views') + views
+            stats.visitors_sketch = sketch.to_bytes()
+            stats.unique_visitors = sketch.count()
+        PostStats.objects.bulk_update(
+            stored.values(), ['views', 'visitors_sketch', 'unique_visitors']
+        )
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        flush_views()
+    except DatabaseError as error:
+        logger.warning('Просмотры не сохранены при остановке: %s', error)
@@ -0,0 +1,285 @@
+"""Ленты Atom и карта сайта.
+
+Ответы собираются потоком из ``iterator()`` и по ходу отдачи
+складываются в кэш под ключом с номером поколения. У каждой ленты и
+каждого шарда карты свое поколение в таблице ``FeedGeneration``, общей
+для всех процессов, плюс общее поколение ``ALL``. Сохранение поста
+увеличивает (``bump``) поколения только его лент и его шарда; общее —
+только отключение автора, которое меняет все ленты. Устаревшие копии
+просто перестают читаться. Поколение же служит ETag: читатель ленты,
+у которого она не менялась, получает 304.
+
+Карта сайта разбита на шарды по диапазонам id: шард ``n`` содержит
+записи с ``n * SITEMAP_SHARD_SIZE <= id < (n + 1) * SITEMAP_SHARD_SIZE``.
+Шард выбирается по индексу первичного ключа без OFFSET, а индекс карты
+считает шарды по одному ``MAX(id)``.
+
+В кэш ответ кладется сжатым zlib. Шард карты и сжатым может не
+уложиться в ``FEEDS_CACHE_MAX_SIZE`` (предел memcached); такой ответ
+не кэшируется и каждый раз собирается заново.
+"""
+import zlib
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Max
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_safe
+
+from .identity import groups_by_slug, users_by_username
+from .models import ArchivedPost, FeedGeneration, Group, Post, User
+
+ALL = 'all'
+ATOM_TYPE = 'application/atom+xml; charset=utf-8'
+XML_TYPE = 'application/xml; charset=utf-8'
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def generation(name):
+    """Общее поколение и поколение ленты ``name`` одной строкой."""
+    values = dict(FeedGeneration.objects.filter(
+        name__in=(ALL, name)
+    ).values_list('name', 'value'))
+    return f'{values.get(ALL, 0)}.{values.get(name, 0)}'
+
+
+def bump(*names):
+    """Сбрасывает копии лент ``names``."""
+    updated = FeedGeneration.objects.filter(name__in=names).update(
+        value=F('value') + 1
+    )
+    if updated < len(names):
+        FeedGeneration.objects.bulk_create(
+            [FeedGeneration(name=name, value=1) for name in names],
+            ignore_conflicts=True,
+        )
+
+
+def shard_name(kind, pk):
+    return f'sitemap:{kind}:{pk // settings.SITEMAP_SHARD_SIZE}'
+
+
+def post_feeds(post):
+    """Ленты и шард карты, в которые попадает пост."""
+    names = [
+        'site', f'author:{post.author_id}', shard_name('posts', post.pk)
+    ]
+    if post.group_id is not None:
+        names.append(f'group:{post.group_id}')
+    return names
+
+
+def cached_response(request, name, chunks, content_type):
+    """Ответ из кэша, 304 или поток ``chunks``, который сохранится в кэш."""
+    current = generation(name)
+    etag = f'"{current}-{name}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        # Ссылки в ответе абсолютные: копии для разных хостов — разные.
+        key = f'feeds:{current}:{request.get_host()}:{name}'
+        body = cache.get(key)
+        if body is not None:
+            response = HttpResponse(
+                zlib.decompress(body), content_type=content_type
+            )
+        else:
+            response = StreamingHttpResponse(
+                remember(key, chunks), content_type=content_type
+            )
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=settings.FEEDS_MAX_AGE)
+    return response
+
+
+def remember(key, chunks):
+    compressor = zlib.compressobj()
+    parts = []
+    size = 0
+    for chunk in chunks:
+        if parts is not None:
+            parts.append(compressor.compress(chunk.encode()))
+            size += len(parts[-1])
+            if size > settings.FEEDS_CACHE_MAX_SIZE:
+                # Дальше не сжимаем: в кэш ответ все равно не попадет.
+                parts = None
+        yield chunk
+    if parts is None:
+        return
+    parts.append(compressor.flush())
+    if size + len(parts[-1]) <= settings.FEEDS_CACHE_MAX_SIZE:
+        cache.set(key, b''.join(parts), settings.FEEDS_CACHE_TIMEOUT)
+
+
+def atom(request, title, url, queryset):
+    rows = queryset.order_by('-pub_date').values_list(
+        'id', 'pub_date', 'text', 'text_html', 'html_version',
+        'author__username',
+    )[:settings.FEEDS_SIZE]
+    absolute = request.build_absolute_uri
+    yield '<?xml version="1.0" encoding="utf-8"?>\n'
+    yield '<feed xmlns="http://www.w3.org/2005/Atom">'
+    yield f'<title>{escape(title)}</title>'
+    yield f'<id>{escape(absolute(url))}</id>'
+    yield f'<link rel="alternate" href={quoteattr(absolute(url))}/>'
+    yield f'<link rel="self" href={quoteattr(absolute())}/>'
+    first = True
+    for pk, pub_date, text, text_html, html_version, username in (
+        rows.iterator()
+    ):
+        if first:
+            # Лента обновлена тогда же, когда вышел самый свежий пост.
+            yield f'<updated>{pub_date.isoformat()}</updated>'
+            first = False
+        link = absolute(reverse('posts:post_detail', args=[pk]))
+        content = (
+            f'<content type="html">{escape(text_html)}</content>'
+            if html_version else
+            f'<content type="text">{escape(text)}</content>'
+        )
+        yield (
+            '<entry>'
+            f'<id>{escape(link)}</id>'
+            f'<title>{escape(text[:settings.SYMBOL_OF_POSTS])}</title>'
+            f'<link rel="alternate" href={quoteattr(link)}/>'
+            f'<updated>{pub_date.isoformat()}</updated>'
+            f'<author><name>{escape(username)}</name></author>'
+            f'{content}'
+            '</entry>'
+        )
+    if first:
+        yield f'<updated>{timezone.now().isoformat()}</updated>'
+    yield '</feed>\n'
+
+
+@require_safe
+def site_feed(request):
+    return cached_response(
+        request, 'site',
+        atom(request, 'Yatube', reverse('posts:index'),
+             Post.objects.visible()),
+        ATOM_TYPE,
+    )
+
+
+@require_safe
+def group_feed(request, slug):
+    group = groups_by_slug.get_or_404(slug)
+    if group.is_hidden:
+        raise Http404(f'Группа {slug!r} удаляется')
+    return cached_response(
+        request, f'group:{group.pk}',
+        atom(request, group.title,
+             reverse('posts:group_list', args=[slug]),
+             group.posts.visible()),
+        ATOM_TYPE,
+    )
+
+
+@require_safe
+def author_feed(request, username):
+    author = users_by_username.get_or_404(username)
+    if not author.is_active:
+        raise Http404(f'Пользователь {username!r} отключен')
+    return cached_response(
+        request, f'author:{author.pk}',
+        atom(request, author.get_full_name() or author.username,
+             reverse('posts:profile', args=[username]),
+             author.posts.visible()),
+        ATOM_TYPE,
+    )
+
+
+def shard_count(*models):
+    top = max(
+        model.objects.aggregate(top=Max('pk'))['top'] or 0
+        for model in models
+    )
+    return top // settings.SITEMAP_SHARD_SIZE + 1
+
+
+def shard_range(shard):
+    size = settings.SITEMAP_SHARD_SIZE
+    return {'pk__gte': shard * size, 'pk__lt': (shard + 1) * size}
+
+
+def urlset(request, entries):
+    absolute = request.build_absolute_uri
+    yield '<?xml version="1.0" encoding="utf-8"?>\n'
+    yield f'<urlset xmlns="{SITEMAP_NS}">'
+    for url, lastmod in entries:
+        lastmod = f'<lastmod>{lastmod.date()}</lastmod>' if lastmod else ''
+        yield f'<url><loc>{escape(absolute(url))}</loc>{lastmod}</url>'
+    yield '</urlset>\n'
+
+
+def post_entries(shard):
+    """Горячие и архивные посты шарда: у них общее пространство id."""
+    visible = Post.objects.visible().filter(**shard_range(shard))
+    archived = ArchivedPost.objects.filter(
+        author__is_active=True, **shard_range(shard)
+    )
+    for queryset in (visible, archived):
+        for pk, pub_date in queryset.order_by('pk').values_list(
+            'pk', 'pub_date'
+        ).iterator():
+            yield reverse('posts:post_detail', args=[pk]), pub_date
+
+
+def profile_entries(shard):
+    for username in User.objects.filter(
+        is_active=True, **shard_range(shard)
+    ).order_by('pk').values_list('username', flat=True).iterator():
+        yield reverse('posts:profile', args=[username]), None
+
+
+def group_entries(shard):
+    yield reverse('posts:index'), None
+    for slug in Group.objects.filter(is_hidden=False).order_by(
+        'pk'
+    ).values_list('slug', flat=True).iterator():
+        yield reverse('posts:group_list', args=[slug]), None
+
+
+SITEMAPS = {
+    'posts': (post_entries, (Post, ArchivedPost)),
+    'profiles': (profile_entries, (User,)),
+    'groups': (group_entries, ()),
+}
+
+
+def sitemap_index_entries(request):
+    absolute = request.build_absolute_uri
+    yield '<?xml version="1.0" encoding="utf-8"?>\n'
+    yield f'<sitemapindex xmlns="{SITEMAP_NS}">'
+    for kind, (_, models) in SITEMAPS.items():
+        count = shard_count(*models) if models else 1
+        for shard in range(count):
+            url = absolute(reverse(
+                'posts:sitemap', kwargs={'kind': kind, 'shard': shard}
+            ))
+            yield f'<sitemap><loc>{escape(url)}</loc></sitemap>'
+    yield '</sitemapindex>\n'
+
+
+@require_safe
+def sitemap_index(request):
+    return cached_response(
+        request, 'sitemap', sitemap_index_entries(request), XML_TYPE
+    )
+
+
+@require_safe
+def sitemap(request, kind, shard):
+    if kind not in SITEMAPS:
+        raise Http404(f'Нет карты {kind!r}')
+    entries, models = SITEMAPS[kind]
+    if shard >= (shard_count(*models) if models else 1):
+        raise Http404(f'Нет шарда {shard}')
+    return cached_response(
+        request, f'sitemap:{kind}:{shard}',
+        urlset(request, entries(shard)), XML_TYPE,
+    )
@@ -1,15 +1,27 @@
 from django import forms
 
+from core.markdown import render_text
+from core.uploads import ImageUploadField
+
 from .models import Comment, Post
 
 
-class PostForm(forms.ModelForm):
+class MarkdownFormMixin:
+    """Markdown текста превращается в HTML один раз, при сохранении."""
+
+    def save(self, commit=True):
+        render_text(self.instance)
+        return super().save(commit)
+
+
+class PostForm(MarkdownFormMixin, forms.ModelForm):
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
+        field_classes = {'image': ImageUploadField}
 
 
-class CommentForm(forms.ModelForm):
+class CommentForm(MarkdownFormMixin, forms.ModelForm):
     class Meta:
         model = Comment
         fields = ('text',)
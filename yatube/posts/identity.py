@@ -0,0 +1,6 @@
+from core.identity import IdentityMap
+
+from .models import Group, User
+
+groups_by_slug = IdentityMap(Group, 'slug')
+users_by_username = IdentityMap(User, 'username')
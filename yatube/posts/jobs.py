@@ -0,0 +1,95 @@
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+from sorl.thumbnail import get_thumbnail
+
+from core.jobs import task
+
+from . import purge, revisions
+from .listings import CARD_THUMBNAIL
+from .models import Post
+
+# Форматы, в которых камеры пишут EXIF; GIF не трогаем (анимация).
+EXIF_FORMATS = ('JPEG', 'WEBP', 'PNG')
+
+
+@task(priority=5, dedup=lambda post_id: f'thumbnails:{post_id}')
+def generate_thumbnails(post_id):
+    """Готовит миниатюру заранее, чтобы ее не создавал рендер ленты."""
+    image = Post.objects.filter(pk=post_id).values_list(
+        'image', flat=True
+    ).first()
+    if image:
+        geometry, options = CARD_THUMBNAIL
+        get_thumbnail(Post(image=image).image, geometry, **options)
+
+
+def strip_metadata(file):
+    """Картинка без EXIF и с примененной ориентацией или None.
+
+    None — если метаданных нет и перекодировать нечего.
+    """
+    image = Image.open(file)
+    if image.format not in EXIF_FORMATS:
+        return None
+    if not image.getexif() and 'exif' not in image.info:
+        return None
+    image_format = image.format
+    icc_profile = image.info.get('icc_profile')
+    normalized = ImageOps.exif_transpose(image)
+    normalized.info.pop('exif', None)
+    options = {'icc_profile': icc_profile} if icc_profile else {}
+    if image_format in ('JPEG', 'WEBP'):
+        options['quality'] = 90
+    buffer = BytesIO()
+    normalized.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+@task(priority=5, dedup=lambda post_id: f'prepare_image:{post_id}')
+def prepare_image(post_id):
+    """Убирает EXIF, поворачивает картинку по ориентации, режет миниатюру.
+
+    Полное декодирование картинки происходит здесь, в воркере, а не
+    в запросе, который ее загрузил.
+    """
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    original = post.image.name
+    with post.image.open('rb') as file:
+        content = strip_metadata(file)
+    if content is not None:
+        post.image.save(
+            os.path.basename(original), ContentFile(content), save=False
+        )
+        # Автор мог успеть заменить картинку, пока задача ждала очереди.
+        if Post.objects.filter(pk=post_id, image=original).exists():
+            # В истории тоже остается только очищенная картинка.
+            revisions.replace_image(post_id, original, post.image.name)
+            post.save(update_fields=['image'])
+    generate_thumbnails(post_id)
+
+
+@task(priority=-1, dedup=lambda post_id: f'purge_post:{post_id}')
+def purge_post(post_id):
+    purge.purge_post(post_id)
+
+
+@task(priority=-1, dedup=lambda group_id: f'purge_group:{group_id}')
+def purge_group(group_id):
+    purge.purge_group(group_id)
+
+
+@task(priority=5, dedup=lambda user_id: f'hide_author:{user_id}')
+def hide_author(user_id):
+    """Убирает посты отключенного в админке автора из лент."""
+    purge.hide_author(user_id)
+
+
+@task(priority=-1, dedup=lambda user_id: f'purge_user:{user_id}')
+def purge_user(user_id):
+    """Удаляет отключенного пользователя со всеми его записями."""
+    purge.purge_user(user_id)
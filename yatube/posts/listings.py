@@ -0,0 +1,180 @@
+"""Лёгкие строки для лент постов.
+
+Карточке поста (``includes/one_post.html``) нужны только начало текста,
+дата, картинка, имя автора и slug группы. Вместо полных моделей
+``Post``, ``User`` и ``Group`` лента выбирает эти столбцы через
+``values_list`` и складывает их в компактные объекты со ``__slots__``.
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models.functions import Left
+
+from core.thumbnails import preload
+
+from .models import Group, Post, User
+
+# Миниатюра карточки поста, как в includes/one_post.html.
+CARD_THUMBNAIL = ('960x339', {'crop': 'center', 'upscale': True})
+
+LISTING_FIELDS = (
+    'id',
+    'pub_date',
+    'excerpt',
+    'image',
+    'author_id',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group_id',
+    'group__slug',
+)
+
+
+class Row:
+    """Сравнивается по pk как с такими же строками, так и с моделями."""
+
+    __slots__ = ('pk',)
+    model = None
+
+    def __eq__(self, other):
+        if isinstance(other, (type(self), self.model)):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.model, self.pk))
+
+    @property
+    def id(self):
+        return self.pk
+
+
+class AuthorRow(Row):
+    __slots__ = ('username', 'first_name', 'last_name')
+    model = User
+
+    def __init__(self, pk, username, first_name, last_name):
+        self.pk = pk
+        self.username = username
+        self.first_name = first_name
+        self.last_name = last_name
+
+    def __str__(self):
+        return self.username
+
+    def get_full_name(self):
+        return f'{self.first_name} {self.last_name}'.strip()
+
+
+class GroupRow(Row):
+    __slots__ = ('slug',)
+    model = Group
+
+    def __init__(self, pk, slug):
+        self.pk = pk
+        self.slug = slug
+
+    def __str__(self):
+        return self.slug
+
+
+class PostRow(Row):
+    __slots__ = (
+        'pub_date', 'excerpt', 'image', 'author', 'group', 'thumbnail'
+    )
+    model = Post
+    image_field = Post._meta.get_field('image')
+
+    def __init__(self, pk, pub_date, excerpt, image, author, group):
+        self.pk = pk
+        self.pub_date = pub_date
+        self.excerpt = excerpt
+        self.image = self.image_field.attr_class(
+            None, self.image_field, image or ''
+        )
+        self.author = author
+        self.group = group
+        self.thumbnail = None
+
+    def __str__(self):
+        return self.excerpt
+
+    @classmethod
+    def from_values(cls, values):
+        (pk, pub_date, excerpt, image, author_id, username, first_name,
+         last_name, group_id, group_slug) = values
+        return cls(
+            pk, pub_date, excerpt, image,
+            AuthorRow(author_id, username, first_name, last_name),
+            GroupRow(group_id, group_slug) if group_id else None,
+        )
+
+
+def listing(queryset):
+    """Queryset постов -> кортежи только с нужными карточке столбцами."""
+    return queryset.annotate(
+        excerpt=Left('text', settings.SYMBOL_OF_POSTS)
+    ).values_list(*LISTING_FIELDS)
+
+
+class Chain:
+    """Несколько выборок подряд как одна последовательность.
+
+    Нужна для ленты автора: архивные посты старше всех горячих, поэтому
+    горячие, а за ними архивные, идут по убыванию даты.
+    """
+
+    def __init__(self, *parts):
+        self.parts = parts
+        self._counts = None
+
+    def counts(self):
+        if self._counts is None:
+            self._counts = [part.count() for part in self.parts]
+        return self._counts
+
+    def count(self):
+        return sum(self.counts())
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        start, stop = key.start or 0, key.stop
+        rows = []
+        for part, size in zip(self.parts, self.counts()):
+            if stop <= 0:
+                break
+            if start < size:
+                rows.extend(part[start:min(stop, size)])
+            start = max(start - size, 0)
+            stop -= size
+        return rows
+
+
+def paginate(request, queryset, archive=None):
+    """Страница ленты, где object_list — еще не прочитанные кортежи
+    ``listing``; ``load_rows`` превращает их в карточки.
+
+    Посты ``archive`` (архивные) идут после постов ``queryset``.
+    """
+    rows = listing(queryset)
+    if archive is not None:
+        rows = Chain(rows, listing(archive))
+    paginator = Paginator(rows, settings.NUMBER_OF_POSTS)
+    return paginator.get_page(request.GET.get('page'))
+
+
+def load_rows(values):
+    """Список ``PostRow``; миниатюры всех карточек — одним запросом."""
+    rows = [PostRow.from_values(row) for row in values]
+    geometry, options = CARD_THUMBNAIL
+    preload(rows, geometry, options)
+    return rows
+
+
+def paginate_rows(request, queryset, archive=None):
+    """Страница ленты, где object_list — список ``PostRow``."""
+    page_obj = paginate(request, queryset, archive)
+    page_obj.object_list = load_rows(page_obj.object_list)
+    return page_obj
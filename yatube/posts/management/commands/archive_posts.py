@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.archive import archive_posts, horizon
+
+
+class Command(BaseCommand):
+    help = ('Переносит старые посты с комментариями в архивные таблицы. '
+            'Запускать по расписанию, например раз в сутки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ARCHIVE_AFTER_DAYS,
+            help='Архивировать посты старше стольких дней.'
+        )
+
+    def handle(self, *args, **options):
+        archived = archive_posts(horizon(options['days']))
+        self.stdout.write(f'Перенесено в архив постов: {archived}')
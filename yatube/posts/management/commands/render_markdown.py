@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.markdown import VERSION, render
+from posts.models import ArchivedComment, ArchivedPost, Comment, Post
+
+MODELS = (Post, Comment, ArchivedPost, ArchivedComment)
+
+
+class Command(BaseCommand):
+    help = ('Перестраивает HTML постов и комментариев, отрисованный '
+            'старой версией разметки. Запускать после смены VERSION '
+            'в core.markdown.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перестроить все записи, а не только устаревшие.'
+        )
+
+    def handle(self, *args, **options):
+        for model in MODELS:
+            queryset = model.objects.all()
+            if not options['all']:
+                queryset = queryset.exclude(html_version=VERSION)
+            rendered = self.render(queryset)
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: {rendered}'
+            )
+
+    def render(self, queryset):
+        """Идет по pk порциями, каждая порция — одна транзакция."""
+        last = 0
+        rendered = 0
+        while True:
+            rows = list(queryset.filter(pk__gt=last).order_by(
+                'pk'
+            ).values_list('pk', 'text')[:settings.PURGE_CHUNK_SIZE])
+            if not rows:
+                return rendered
+            objs = [
+                queryset.model(pk=pk, text_html=render(text),
+                               html_version=VERSION)
+                for pk, text in rows
+            ]
+            with transaction.atomic():
+                queryset.model.objects.bulk_update(
+                    objs, ['text_html', 'html_version']
+                )
+            last = rows[-1][0]
+            rendered += len(rows)
@@ -0,0 +1,240 @@
+import io
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from PIL import Image
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+WORDS = (
+    'пост', 'день', 'город', 'утро', 'кофе', 'книга', 'дорога', 'море',
+    'работа', 'проект', 'код', 'тест', 'друг', 'вечер', 'фото', 'новость',
+    'идея', 'музыка', 'фильм', 'погода', 'кот', 'сад', 'лес', 'река',
+    'сегодня', 'снова', 'очень', 'почти', 'всегда', 'новый', 'старый',
+    'хороший', 'быстрый', 'тихий', 'большой', 'маленький', 'яркий',
+)
+FIRST_NAMES = ('Анна', 'Иван', 'Мария', 'Пётр', 'Ольга', 'Сергей', 'Елена')
+LAST_NAMES = ('Иванов', 'Петров', 'Смирнов', 'Кузнецов', 'Попов', 'Соколов')
+IMAGE_POOL_SIZE = 32
+# Даты отсчитываются не от текущего момента, а от этой точки плюс
+# seed дней: повторный запуск с тем же seed дает те же даты.
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def power_law_index(rng, size):
+    """Индекс 0..size-1 с распределением, близким к закону Ципфа (s=1).
+
+    Вероятность ранга k пропорциональна 1/k: несколько "звёзд"
+    и длинный хвост почти неактивных пользователей.
+    """
+    return int(size ** rng.random()) - 1
+
+
+def chunks(total, chunk_size):
+    for start in range(0, total, chunk_size):
+        yield start, min(chunk_size, total - start)
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Временно отключает auto_now_add, чтобы сохранить свои даты."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, постами, '
+        'комментариями и подписками. Результат детерминирован для --seed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--comments', type=int, default=2000000)
+        parser.add_argument('--follows', type=int, default=200000)
+        parser.add_argument(
+            '--images', type=float, default=0.0,
+            help='Доля постов с картинкой (0..1).'
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней распределить даты публикаций.'
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Префикс имён пользователей и slug групп.'
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.chunk_size = options['chunk_size']
+        self.prefix = options['prefix']
+        self.now = EPOCH + timedelta(days=options['seed'] % 365)
+        self.start = self.now - timedelta(days=options['days'])
+
+        users = self.create_users(options['users'])
+        groups = self.create_groups(options['groups'])
+        images = self.create_images(options['images'])
+        posts = self.create_posts(
+            options['posts'], users, groups, images, options['images']
+        )
+        self.create_comments(options['comments'], users, posts)
+        self.create_follows(options['follows'], users)
+
+    def report(self, label, count):
+        self.stdout.write(self.style.SUCCESS(f'{label}: {count}'))
+
+    def post_date(self, index, total):
+        """Даты растут вместе с id, как у настоящей ленты."""
+        span = (self.now - self.start).total_seconds()
+        jitter = (index * 2654435761 % 1000) / 1000
+        return self.start + timedelta(seconds=(index + jitter) * span / total)
+
+    def text(self, mean_words):
+        length = max(1, int(self.rng.lognormvariate(0, 0.8) * mean_words))
+        return ' '.join(self.rng.choice(WORDS) for _ in range(length))
+
+    def create_users(self, total):
+        password = make_password(None)
+        for start, size in chunks(total, self.chunk_size):
+            User.objects.bulk_create(
+                [User(
+                    username=f'{self.prefix}{number}',
+                    first_name=self.rng.choice(FIRST_NAMES),
+                    last_name=self.rng.choice(LAST_NAMES),
+                    password=password,
+                ) for number in range(start, start + size)],
+                ignore_conflicts=True,
+            )
+        ids = list(User.objects.filter(
+            username__startswith=self.prefix
+        ).order_by('id').values_list('id', flat=True))
+        # Популярность не должна совпадать с порядком регистрации.
+        self.rng.shuffle(ids)
+        self.report('Пользователи', len(ids))
+        return ids
+
+    def create_groups(self, total):
+        Group.objects.bulk_create(
+            [Group(
+                title=f'Группа {number}',
+                slug=f'{self.prefix}-group-{number}',
+                description=self.text(20),
+            ) for number in range(total)],
+            ignore_conflicts=True,
+        )
+        ids = list(Group.objects.filter(
+            slug__startswith=f'{self.prefix}-group-'
+        ).order_by('id').values_list('id', flat=True))
+        self.report('Группы', len(ids))
+        return ids
+
+    def create_images(self, share):
+        if not share:
+            return []
+        names = []
+        for number in range(IMAGE_POOL_SIZE):
+            color = tuple(self.rng.randrange(256) for _ in range(3))
+            buffer = io.BytesIO()
+            Image.new('RGB', (960, 540), color).save(buffer, 'JPEG')
+            names.append(default_storage.save(
+                f'posts/{self.prefix}-{number}.jpg',
+                ContentFile(buffer.getvalue()),
+            ))
+        return names
+
+    def create_posts(self, total, users, groups, images, image_share):
+        field = Post._meta.get_field('pub_date')
+        last_id = Post.objects.aggregate(last=Max('id'))['last'] or 0
+        with explicit_dates(field):
+            for start, size in chunks(total, self.chunk_size):
+                batch = []
+                for index in range(start, start + size):
+                    with_group = groups and self.rng.random() < 0.6
+                    with_image = images and self.rng.random() < image_share
+                    batch.append(Post(
+                        text=self.text(40),
+                        pub_date=self.post_date(index, total),
+                        author_id=users[power_law_index(self.rng, len(users))],
+                        group_id=(
+                            groups[power_law_index(self.rng, len(groups))]
+                            if with_group else None
+                        ),
+                        image=self.rng.choice(images) if with_image else '',
+                    ))
+                with transaction.atomic():
+                    Post.objects.bulk_create(batch)
+                self.stdout.write(f'  постов: {start + size}/{total}')
+        self.report('Посты', total)
+        # Один процесс вставляет посты подряд, поэтому их id непрерывны.
+        first_id = Post.objects.filter(id__gt=last_id).order_by(
+            'id'
+        ).values_list('id', flat=True).first()
+        return first_id, total
+
+    def create_comments(self, total, users, posts):
+        first_id, posts_total = posts
+        if not posts_total:
+            return
+        # Ранг популярности поста переводится в индекс шагом, взаимно
+        # простым с числом постов, чтобы "звёзды" были разбросаны по ленте.
+        stride = 7919 if posts_total % 7919 else 104729
+        field = Comment._meta.get_field('created')
+        with explicit_dates(field):
+            for start, size in chunks(total, self.chunk_size):
+                batch = []
+                for _ in range(size):
+                    rank = power_law_index(self.rng, posts_total)
+                    index = rank * stride % posts_total
+                    created = self.post_date(index, posts_total) + timedelta(
+                        seconds=self.rng.expovariate(1 / 3600)
+                    )
+                    batch.append(Comment(
+                        post_id=first_id + index,
+                        author_id=self.rng.choice(users),
+                        text=self.text(12),
+                        created=min(created, self.now),
+                    ))
+                with transaction.atomic():
+                    Comment.objects.bulk_create(batch)
+                self.stdout.write(f'  комментариев: {start + size}/{total}')
+        self.report('Комментарии', total)
+
+    def create_follows(self, total, users):
+        pairs = set()
+        attempts = 0
+        while len(pairs) < total and attempts < total * 10:
+            attempts += 1
+            author = users[power_law_index(self.rng, len(users))]
+            user = self.rng.choice(users)
+            if user != author:
+                pairs.add((user, author))
+        ordered = sorted(pairs)
+        for start, size in chunks(len(ordered), self.chunk_size):
+            with transaction.atomic():
+                Follow.objects.bulk_create(
+                    [Follow(user_id=user, author_id=author)
+                     for user, author in ordered[start:start + size]],
+                    ignore_conflicts=True,
+                )
+        self.report('Подписки', len(ordered))
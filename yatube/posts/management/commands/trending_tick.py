@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import tick
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает затухание рейтингов популярных постов. '
+            'Запускать по расписанию, например раз в 10 минут.')
+
+    def handle(self, *args, **options):
+        top = tick()
+        self.stdout.write(f'В популярном постов: {len(top)}')
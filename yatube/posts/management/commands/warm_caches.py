@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.warmup import shared_cache, warm
+
+
+class Command(BaseCommand):
+    help = ('Заранее создает миниатюры карточек популярных и самых '
+            'просматриваемых постов, а при общем кэше — карты '
+            'идентичности и ленты. Запускать после выкладки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=settings.WARMUP_LIMIT,
+            help='Сколько постов каждого вида прогревать.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.WARMUP_WORKERS,
+            help='Сколько страниц рисовать одновременно.'
+        )
+        parser.add_argument(
+            '--host', default=settings.WARMUP_HOST,
+            help='Хост сайта для абсолютных ссылок в лентах.'
+        )
+
+    def handle(self, *args, **options):
+        counts = warm(
+            options['limit'], local=False, workers=options['workers'],
+            host=options['host'],
+        )
+        self.stdout.write(
+            'Прогрето миниатюр: {thumbnails}, групп: {groups}, '
+            'авторов: {authors}, страниц: {pages}'.format(**counts)
+        )
+        if not shared_cache():
+            self.stdout.write(
+                'Кэш у каждого процесса свой: остальное процесс сайта '
+                'прогревает сам при WARMUP_IN_PROCESS.'
+            )
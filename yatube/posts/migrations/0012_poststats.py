@@ -0,0 +1,27 @@
+# Generated by Django 3.2.20 on 2026-10-19 09:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_postscore'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostStats',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.post', verbose_name='Пост')),
+                ('views', models.PositiveBigIntegerField(default=0, verbose_name='Просмотров')),
+                ('unique_visitors', models.PositiveIntegerField(default=0, verbose_name='Уникальных посетителей')),
+                ('visitors_sketch', models.BinaryField(default=bytes, verbose_name='Скетч HyperLogLog посетителей')),
+            ],
+            options={
+                'verbose_name': 'Статистика поста',
+                'verbose_name_plural': 'Статистика постов',
+            },
+        ),
+    ]
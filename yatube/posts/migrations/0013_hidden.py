@@ -0,0 +1,27 @@
+# Generated by Django 3.2.20 on 2026-10-19 09:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_poststats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='is_hidden',
+            field=models.BooleanField(db_index=True, default=False, verbose_name='Скрыта'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='is_hidden',
+            field=models.BooleanField(default=False, verbose_name='Скрыт'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['is_hidden', '-pub_date'], name='post_visible_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.20 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+from core import fts
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_hidden'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created'], name='comment_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['pub_date'], name='post_pub_date_idx'),
+        ),
+        fts.create_index('posts_post'),
+    ]
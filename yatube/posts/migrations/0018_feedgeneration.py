@@ -0,0 +1,24 @@
+# Generated by Django 3.2.20 on 2026-10-19 10:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_text_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedGeneration',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Лента')),
+                ('value', models.PositiveBigIntegerField(default=0, verbose_name='Поколение')),
+            ],
+            options={
+                'verbose_name': 'Поколение ленты',
+                'verbose_name_plural': 'Поколения лент',
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.2.20 on 2026-10-19 10:37
+
+from django.db import migrations, models
+
+from core import fts
+
+
+def hide_inactive_authors(apps, schema_editor):
+    """Посты отключенных до миграции авторов ждут удаления: скрываем."""
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.filter(author__is_active=False).update(author_hidden=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_feedgeneration'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_visible_idx',
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='author_hidden',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Автор удаляется'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['is_hidden', 'author_hidden', '-pub_date'], name='post_visible_idx'),
+        ),
+        migrations.RunPython(hide_inactive_authors, migrations.RunPython.noop),
+        # Пересоздание posts_post удалило триггеры FTS.
+        fts.restore_triggers('posts_post'),
+    ]
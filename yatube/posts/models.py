@@ -11,6 +11,8 @@ class Group(models.Model):
     slug = models.SlugField(unique=True,
                             verbose_name='Идентификатор')
     description = models.TextField(verbose_name='Описание')
+    is_hidden = models.BooleanField(default=False, db_index=True,
+                                    verbose_name='Скрыта')
 
     class Meta:
         verbose_name = 'Группу'
@@ -20,9 +22,21 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def visible(self):
+        """Без скрытых постов и постов удаляемых авторов."""
+        return self.filter(is_hidden=False, author_hidden=False)
+
+
 class Post(models.Model):
     text = models.TextField(verbose_name='Текст поста',
                             help_text='Введите текст поста')
+    text_html = models.TextField(
+        blank=True, editable=False, verbose_name='Текст в HTML'
+    )
+    html_version = models.PositiveSmallIntegerField(
+        default=0, editable=False, verbose_name='Версия разметки HTML'
+    )
     pub_date = models.DateTimeField(auto_now_add=True,
                                     verbose_name='Дата публикации')
     author = models.ForeignKey(
@@ -45,12 +59,26 @@ class Post(models.Model):
         null=True,
         help_text='Выберите картинку'
     )
+    is_hidden = models.BooleanField(default=False,
+                                    verbose_name='Скрыт')
+    # Копия признака удаления автора: ленты фильтруют посты без JOIN
+    # с auth_user. Ставит его posts.purge.hide_author.
+    author_hidden = models.BooleanField(
+        default=False, editable=False, verbose_name='Автор удаляется'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         default_related_name = 'posts'
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(fields=['is_hidden', 'author_hidden', '-pub_date'],
+                         name='post_visible_idx'),
+            models.Index(fields=['pub_date'], name='post_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[:settings.SYMBOL_OF_POSTS]
@@ -70,6 +98,12 @@ class Comment(models.Model):
         verbose_name='Текст комментария',
         help_text='Введите комментраий',
     )
+    text_html = models.TextField(
+        blank=True, editable=False, verbose_name='Текст в HTML'
+    )
+    html_version = models.PositiveSmallIntegerField(
+        default=0, editable=False, verbose_name='Версия разметки HTML'
+    )
     created = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Дата комментария',
@@ -77,6 +111,8 @@ class Comment(models.Model):
 
     class Meta:
         default_related_name = 'comments'
+        indexes = [models.Index(fields=['created'],
+                                name='comment_created_idx')]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
@@ -100,3 +136,216 @@ class Follow(models.Model):
         constraints = [models.UniqueConstraint(
             fields=['user', 'author'], name='unigue_follow')
         ]
+
+
+class PostScore(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score',
+        verbose_name='Пост',
+    )
+    score = models.FloatField(default=0, verbose_name='Рейтинг')
+    updated = models.DateTimeField(verbose_name='Рейтинг на момент')
+
+    class Meta:
+        verbose_name = 'Рейтинг поста'
+        verbose_name_plural = 'Рейтинги постов'
+        indexes = [models.Index(fields=['-score'], name='post_score_idx')]
+
+    def __str__(self):
+        return f'{self.post_id}: {self.score:.2f}'
+
+
+class PostStats(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пост',
+    )
+    views = models.PositiveBigIntegerField(
+        default=0, verbose_name='Просмотров'
+    )
+    unique_visitors = models.PositiveIntegerField(
+        default=0, verbose_name='Уникальных посетителей'
+    )
+    visitors_sketch = models.BinaryField(
+        default=bytes, verbose_name='Скетч HyperLogLog посетителей'
+    )
+
+    class Meta:
+        verbose_name = 'Статистика поста'
+        verbose_name_plural = 'Статистика постов'
+
+    def __str__(self):
+        return f'{self.post_id}: {self.views}'
+
+
+class ArchivedPost(models.Model):
+    """Старый пост, перенесенный из горячей таблицы с тем же id."""
+
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField(verbose_name='Текст поста')
+    text_html = models.TextField(
+        blank=True, editable=False, verbose_name='Текст в HTML'
+    )
+    html_version = models.PositiveSmallIntegerField(
+        default=0, editable=False, verbose_name='Версия разметки HTML'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор',
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='archived_posts',
+        verbose_name='Группа',
+    )
+    image = models.ImageField(
+        'Картинка', upload_to='posts/', blank=True, null=True
+    )
+    views = models.PositiveBigIntegerField(
+        default=0, verbose_name='Просмотров'
+    )
+    unique_visitors = models.PositiveIntegerField(
+        default=0, verbose_name='Уникальных посетителей'
+    )
+    archived = models.DateTimeField(
+        auto_now_add=True, verbose_name='Дата переноса в архив'
+    )
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+        indexes = [models.Index(fields=['author', '-pub_date'],
+                                name='archived_post_author_idx')]
+
+    def __str__(self):
+        return self.text[:settings.SYMBOL_OF_POSTS]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор комментария',
+    )
+    text = models.TextField(verbose_name='Текст комментария')
+    text_html = models.TextField(
+        blank=True, editable=False, verbose_name='Текст в HTML'
+    )
+    html_version = models.PositiveSmallIntegerField(
+        default=0, editable=False, verbose_name='Версия разметки HTML'
+    )
+    created = models.DateTimeField(verbose_name='Дата комментария')
+
+    class Meta:
+        ordering = ('created',)
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+
+    def __str__(self):
+        return self.text
+
+
+class PostRevision(models.Model):
+    """Версия поста: полный снимок текста или сжатая разница
+    с предыдущей версией (см. ``posts.revisions``)."""
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='revisions',
+        verbose_name='Пост',
+    )
+    number = models.PositiveIntegerField(verbose_name='Номер версии')
+    created = models.DateTimeField(
+        auto_now_add=True, verbose_name='Дата версии'
+    )
+    image = models.ImageField(
+        'Картинка', upload_to='posts/', blank=True, null=True
+    )
+    is_snapshot = models.BooleanField(
+        default=False, verbose_name='Полный снимок'
+    )
+    data = models.BinaryField(verbose_name='Текст или разница (zlib)')
+
+    class Meta:
+        ordering = ('post', 'number')
+        verbose_name = 'Версия поста'
+        verbose_name_plural = 'Версии постов'
+        constraints = [models.UniqueConstraint(
+            fields=['post', 'number'], name='unique_post_revision'
+        )]
+
+    def __str__(self):
+        return f'{self.post_id} v{self.number}'
+
+
+class ArchivedPostRevision(models.Model):
+    """Версия архивного поста, перенесенная из ``PostRevision``."""
+
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='revisions',
+        verbose_name='Пост',
+    )
+    number = models.PositiveIntegerField(verbose_name='Номер версии')
+    created = models.DateTimeField(verbose_name='Дата версии')
+    image = models.ImageField(
+        'Картинка', upload_to='posts/', blank=True, null=True
+    )
+    is_snapshot = models.BooleanField(
+        default=False, verbose_name='Полный снимок'
+    )
+    data = models.BinaryField(verbose_name='Текст или разница (zlib)')
+
+    class Meta:
+        ordering = ('post', 'number')
+        verbose_name = 'Архивная версия поста'
+        verbose_name_plural = 'Архивные версии постов'
+        constraints = [models.UniqueConstraint(
+            fields=['post', 'number'], name='unique_archived_post_revision'
+        )]
+
+    def __str__(self):
+        return f'{self.post_id} v{self.number}'
+
+
+class FeedGeneration(models.Model):
+    """Поколение кэша ленты или шарда карты сайта (см. ``posts.feeds``).
+
+    Хранится в базе, чтобы сброс из любого процесса видели все.
+    """
+
+    name = models.CharField(
+        max_length=100, primary_key=True, verbose_name='Лента'
+    )
+    value = models.PositiveBigIntegerField(
+        default=0, verbose_name='Поколение'
+    )
+
+    class Meta:
+        verbose_name = 'Поколение ленты'
+        verbose_name_plural = 'Поколения лент'
+
+    def __str__(self):
+        return f'{self.name}: {self.value}'
@@ -0,0 +1,119 @@
+"""Удаление пользователей, групп и постов по частям.
+
+Каскадное удаление загружает в память все зависимые посты, комментарии
+и подписки и удаляет их одной транзакцией, которая надолго запирает
+SQLite. Поэтому запись сначала только скрывается (``Post.is_hidden``,
+``Group.is_hidden``, ``User.is_active`` вместе с ``Post.author_hidden``
+у его постов) и пропадает из лент, а задачи
+из ``posts.jobs`` удаляют зависимые записи порциями по
+``PURGE_CHUNK_SIZE``, каждую в своей короткой транзакции. Картинки
+удаленных постов, на которые больше никто не ссылается, удаляются
+вместе с миниатюрами.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from core.storage import delete_orphans
+from core.transactions import immediate
+
+from . import feeds
+from .models import (ArchivedComment, ArchivedPost, Comment, Follow, Group,
+                     Post, User)
+
+
+def chunks(queryset):
+    """Списки pk записей ``queryset`` порциями до ``PURGE_CHUNK_SIZE``.
+
+    Каждая следующая порция выбирается заново, поэтому обработанные
+    записи должны выпадать из ``queryset``.
+    """
+    ids = queryset.order_by().values_list('pk', flat=True)
+    while True:
+        chunk = list(ids[:settings.PURGE_CHUNK_SIZE])
+        if not chunk:
+            return
+        yield chunk
+
+
+def delete_in_chunks(queryset):
+    deleted = 0
+    manager = queryset.model._default_manager
+    for chunk in chunks(queryset):
+        with immediate():
+            manager.filter(pk__in=chunk).delete()
+        deleted += len(chunk)
+    return deleted
+
+
+def delete_posts(queryset):
+    """Удаляет посты вместе с комментариями и ставшими ненужными картинками.
+
+    Подходит и для ``Post``, и для ``ArchivedPost``.
+    """
+    model = queryset.model
+    comments = model._meta.get_field('comments').related_model
+    deleted = 0
+    for chunk in chunks(queryset):
+        delete_in_chunks(comments.objects.filter(post_id__in=chunk))
+        images = set(model.objects.filter(pk__in=chunk).exclude(
+            image=''
+        ).exclude(image__isnull=True).values_list('image', flat=True))
+        with immediate():
+            model.objects.filter(pk__in=chunk).delete()
+        delete_orphans(images)
+        deleted += len(chunk)
+    return deleted
+
+
+def purge_post(post_id):
+    delete_posts(Post.objects.filter(pk=post_id, is_hidden=True))
+
+
+def purge_group(group_id):
+    """Посты группы остаются, но без группы, как при ``SET_NULL``."""
+    if not Group.objects.filter(pk=group_id, is_hidden=True).exists():
+        return
+    for model in (Post, ArchivedPost):
+        for chunk in chunks(model.objects.filter(group_id=group_id)):
+            with transaction.atomic():
+                model.objects.filter(pk__in=chunk).update(group=None)
+    Group.objects.filter(pk=group_id).delete()
+
+
+def set_author_hidden(user_id, hidden):
+    changed = 0
+    for chunk in chunks(
+        Post.objects.filter(author_id=user_id, author_hidden=not hidden)
+    ):
+        with transaction.atomic():
+            Post.objects.filter(pk__in=chunk).update(author_hidden=hidden)
+        changed += len(chunk)
+    return changed
+
+
+def hide_author(user_id):
+    """Убирает посты удаляемого автора из лент до задачи ``purge_user``."""
+    # Пользователя могли снова включить, пока задача ждала очереди.
+    if not User.objects.filter(pk=user_id, is_active=False).exists():
+        return
+    # Ленты сбросились еще при отключении, до скрытия постов.
+    if set_author_hidden(user_id, True):
+        feeds.bump(feeds.ALL)
+
+
+def purge_user(user_id):
+    # Пользователя могли снова включить, пока задача ждала очереди.
+    if not User.objects.filter(pk=user_id, is_active=False).exists():
+        if set_author_hidden(user_id, False):
+            feeds.bump(feeds.ALL)
+        return
+    delete_in_chunks(
+        Follow.objects.filter(Q(user_id=user_id) | Q(author_id=user_id))
+    )
+    delete_in_chunks(Comment.objects.filter(author_id=user_id))
+    delete_in_chunks(ArchivedComment.objects.filter(author_id=user_id))
+    delete_posts(Post.objects.filter(author_id=user_id))
+    delete_posts(ArchivedPost.objects.filter(author_id=user_id))
+    with immediate():
+        User.objects.filter(pk=user_id).delete()
@@ -0,0 +1,136 @@
+"""История правок постов.
+
+Каждое изменение текста или картинки поста сохраняет ``PostRevision``.
+У поста без правок истории нет: первая правка сохраняет исходный текст
+версией 1, а новый — версией 2.
+Текст версии хранится разницей с предыдущей версией по словам, сжатой
+zlib, поэтому таблица растет на объем правок, а не на длину поста.
+Каждая ``REVISION_SNAPSHOT_EVERY``-я версия — полный снимок: чтобы
+восстановить любую версию, хватает ближайшего снимка и не больше
+``REVISION_SNAPSHOT_EVERY - 1`` разниц.
+
+Разница — список операций над словами предыдущей версии: положительное
+число копирует столько слов, отрицательное пропускает, строка
+вставляется как есть.
+"""
+import json
+import re
+import zlib
+from difflib import SequenceMatcher
+
+from django.conf import settings
+
+from core.storage import decref, incref
+
+from .models import PostRevision
+
+TOKEN = re.compile(r'\s+|\S+')
+
+
+def tokens(text):
+    return TOKEN.findall(text)
+
+
+def diff(base, text):
+    old, new = tokens(base), tokens(text)
+    ops = []
+    matcher = SequenceMatcher(None, old, new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append(''.join(new[j1:j2]))
+    return ops
+
+
+def patch(base, ops):
+    old = tokens(base)
+    position = 0
+    parts = []
+    for op in ops:
+        if isinstance(op, str):
+            parts.append(op)
+        elif op > 0:
+            parts.extend(old[position:position + op])
+            position += op
+        else:
+            position -= op
+    return ''.join(parts)
+
+
+def pack(payload):
+    return zlib.compress(json.dumps(
+        payload, ensure_ascii=False, separators=(',', ':')
+    ).encode())
+
+
+def unpack(data):
+    return json.loads(zlib.decompress(bytes(data)))
+
+
+def add(post_id, number, text, image, base=None):
+    snapshot = base is None or (
+        (number - 1) % settings.REVISION_SNAPSHOT_EVERY == 0
+    )
+    return PostRevision.objects.create(
+        post_id=post_id,
+        number=number,
+        image=image or '',
+        is_snapshot=snapshot,
+        data=pack(text if snapshot else diff(base, text)),
+    )
+
+
+def record(post, old):
+    """Сохраняет версию поста после изменения.
+
+    ``old`` — пара ``(text, image)`` до сохранения; для постов, у которых
+    еще нет истории, она становится первой версией.
+    """
+    image = post.image.name or ''
+    last = post.revisions.order_by('-number').values_list(
+        'number', 'image'
+    ).first()
+    old_text, old_image = old[0], old[1] or ''
+    if (old_text, old_image) == (post.text, image):
+        return
+    if last is None:
+        add(post.pk, 1, old_text, old_image)
+        last = (1, old_image)
+    elif old_text == post.text and last[1] == image:
+        # Картинку уже подменили в истории (replace_image).
+        return
+    add(post.pk, last[0] + 1, post.text, image, base=old_text)
+
+
+def text_at(post_id, number, model=PostRevision):
+    """Текст версии ``number``: ближайший снимок плюс разницы после него.
+
+    Для архивного поста ``model`` — ``ArchivedPostRevision``.
+    """
+    snapshot = model.objects.filter(
+        post_id=post_id, number__lte=number, is_snapshot=True
+    ).order_by('-number').values_list('number', 'data').first()
+    if snapshot is None:
+        return None
+    text = unpack(snapshot[1])
+    for data in model.objects.filter(
+        post_id=post_id, number__gt=snapshot[0], number__lte=number
+    ).order_by('number').values_list('data', flat=True):
+        text = patch(text, unpack(data))
+    return text
+
+
+def replace_image(post_id, old, new):
+    """Подменяет картинку во всей истории поста (например, на очищенную
+    от EXIF), чтобы старый файл не держался ссылками из истории."""
+    changed = PostRevision.objects.filter(
+        post_id=post_id, image=old
+    ).update(image=new)
+    for _ in range(changed):
+        incref(new)
+        decref(old)
+    return changed
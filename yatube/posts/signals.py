@@ -0,0 +1,126 @@
+from django.core.cache import cache
+from django.core.signals import request_started
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.snapshots import previous, watch
+
+from . import feeds, revisions, trending, warmup
+from .models import Comment, Follow, Group, Post, User
+
+# Старые текст, картинку и группу поста читает один запрос на сохранение.
+watch(Post, 'text', 'image', 'group_id')
+
+
+@receiver(post_save, sender=Comment)
+def score_comment(sender, instance, created, raw=False, **kwargs):
+    """Новый комментарий поднимает пост в популярном."""
+    if created and not raw:
+        trending.record_comment(instance.post)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def reset_followers(sender, instance, **kwargs):
+    cache.delete(trending.followers_key(instance.author_id))
+
+
+@receiver(pre_save, sender=Post)
+def remember_revision_base(sender, instance, raw=False, update_fields=None,
+                           **kwargs):
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not {'text', 'image'} & set(
+        update_fields
+    ):
+        return
+    if previous(instance, 'text') is not None:
+        instance._revision_base = (
+            previous(instance, 'text'), previous(instance, 'image')
+        )
+
+
+@receiver(post_save, sender=Post)
+def record_revision(sender, instance, created, raw=False, **kwargs):
+    """Правка текста или картинки сохраняет версию поста.
+
+    Новый пост версию не пишет: исходный текст станет первой версией
+    при первой правке.
+    """
+    old = instance.__dict__.pop('_revision_base', None)
+    if not raw and not created and old is not None:
+        revisions.record(instance, old)
+
+
+@receiver(pre_save, sender=Post)
+def remember_feed_group(sender, instance, raw=False, update_fields=None,
+                        **kwargs):
+    """Пост, перенесенный в другую группу, уходит и из ее ленты."""
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and 'group' not in update_fields:
+        return
+    instance._feed_group = previous(instance, 'group_id')
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, signal, created=False,
+                          **kwargs):
+    names = feeds.post_feeds(instance)
+    old_group = instance.__dict__.pop('_feed_group', None)
+    if old_group not in (None, instance.group_id):
+        names.append(f'group:{old_group}')
+    if created or signal is post_delete:
+        # Число шардов считается по MAX(id).
+        names.append('sitemap')
+    feeds.bump(*names)
+    warmup.schedule()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_feeds(sender, instance, **kwargs):
+    feeds.bump(f'group:{instance.pk}', 'sitemap:groups:0')
+    warmup.schedule()
+
+
+@receiver(pre_save, sender=User)
+def remember_user_active(sender, instance, raw=False, update_fields=None,
+                         **kwargs):
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and 'is_active' not in update_fields:
+        return
+    instance._feed_active = User.objects.filter(
+        pk=instance.pk
+    ).values_list('is_active', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_profile_feeds(sender, instance, signal, created=False,
+                             update_fields=None, **kwargs):
+    """Вход пользователя (last_login) карту сайта и ленты не меняет.
+
+    Отключение автора убирает его посты из всех лент и шардов: это
+    редкое событие сбрасывает общее поколение.
+    """
+    was_active = instance.__dict__.pop('_feed_active', None)
+    if signal is post_delete or (
+        was_active is not None and was_active != instance.is_active
+    ):
+        feeds.bump(feeds.ALL)
+        warmup.schedule()
+    elif created:
+        feeds.bump('sitemap', feeds.shard_name('profiles', instance.pk))
+    elif update_fields is None:
+        feeds.bump(
+            f'author:{instance.pk}', feeds.shard_name('profiles', instance.pk)
+        )
+
+
+@receiver(request_started)
+def warm_new_process(sender, environ=None, **kwargs):
+    """Новый процесс прогревает себя после первого запроса."""
+    warmup.schedule_once(environ)
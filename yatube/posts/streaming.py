@@ -0,0 +1,81 @@
+"""Потоковая отдача лент постов.
+
+Обычный ``render`` отдает страницу только целиком: пока не прочитаны
+строки ленты и не найдены миниатюры, браузер ждет. При
+``POSTS_STREAMING`` страница рендерится без карточек, с меткой на их
+месте. Все до метки (``<head>``, шапка, заголовок ленты) уходит сразу,
+затем карточки по ``POSTS_STREAM_BATCH`` штук по мере чтения курсора,
+затем остаток страницы. В памяти одновременно держится только одна
+порция карточек.
+
+Страницы под предохранителем базы (``core.breaker.guarded``) рендерятся
+целиком и при ``POSTS_STREAMING``: с потока нельзя снять копию на время
+сбоя базы. Потоком отдаются ленты вне ``BREAKER_NAMESPACES``.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.db.models.query import QuerySet
+from django.http import StreamingHttpResponse
+from django.shortcuts import render
+from django.template import engines
+from django.template.backends.jinja2 import Jinja2
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from core.breaker import guarded
+
+from .listings import load_rows
+
+MARKER = mark_safe('<!--posts:stream-->')
+CARD_TEMPLATE = 'includes/one_post.html'
+
+
+def card_renderer():
+    """Функция ``(post, last) -> html`` одной карточки в движке лент."""
+    engine = engines[settings.POSTS_TEMPLATE_ENGINE]
+    if isinstance(engine, Jinja2):
+        card = engine.env.get_template(CARD_TEMPLATE).module.card
+        return lambda post, last: str(card(post, last))
+    template = engine.get_template(CARD_TEMPLATE)
+    return lambda post, last: template.render(
+        {'post': post, 'forloop': {'last': last}}
+    )
+
+
+def cards(values):
+    render_card = card_renderer()
+    if isinstance(values, QuerySet):
+        values = values.iterator(chunk_size=settings.POSTS_STREAM_BATCH)
+    values = iter(values)
+    pending = list(islice(values, settings.POSTS_STREAM_BATCH))
+    while pending:
+        rows = load_rows(pending)
+        pending = list(islice(values, settings.POSTS_STREAM_BATCH))
+        for number, row in enumerate(rows, start=1):
+            yield render_card(row, not pending and number == len(rows))
+
+
+def render_listing(request, template_name, context):
+    """``render`` ленты, где ``page_obj`` получен из ``paginate``."""
+    page_obj = context['page_obj']
+    if not settings.POSTS_STREAMING or guarded(request):
+        page_obj.object_list = load_rows(page_obj.object_list)
+        return render(
+            request, template_name, context,
+            using=settings.POSTS_TEMPLATE_ENGINE
+        )
+    page = render_to_string(
+        template_name, {**context, 'stream_marker': MARKER}, request,
+        using=settings.POSTS_TEMPLATE_ENGINE,
+    )
+    head, tail = page.split(MARKER, 1)
+    return StreamingHttpResponse(
+        stream(head, cards(page_obj.object_list), tail)
+    )
+
+
+def stream(head, body, tail):
+    yield head
+    yield from body
+    yield tail
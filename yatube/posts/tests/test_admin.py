@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.fts import match_expression, trigger_names
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class AdminPerformanceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', password='pass'
+        )
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Ёжик в тумане', author=cls.admin, group=cls.group
+        )
+        Post.objects.create(text='Лошадка', author=cls.admin)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def queries(self, url, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        return response, [query['sql'] for query in context.captured_queries]
+
+    def add_posts(self, start, count):
+        for number in range(start, start + count):
+            author = User.objects.create_user(username=f'user{number}')
+            group = Group.objects.create(
+                title=f'Группа {number}', slug=f'group{number}',
+                description='Описание',
+            )
+            Post.objects.create(text='Текст', author=author, group=group)
+            Comment.objects.create(
+                post=self.post, author=author, text='Комментарий'
+            )
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        names = ('admin:posts_post_changelist',
+                 'admin:posts_comment_changelist')
+        for start, name in enumerate(names):
+            with self.subTest(name=name):
+                url = reverse(name)
+                cache.clear()
+                _, before = self.queries(url)
+                self.add_posts(start * 5, 5)
+                cache.clear()
+                response, after = self.queries(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(after), len(before))
+
+    def test_group_column_is_autocomplete(self):
+        Group.objects.create(title='Другая', slug='other', description='')
+        response = self.client.get(reverse('admin:posts_post_changelist'))
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertNotContains(response, '>Другая</option>')
+        self.assertContains(response, 'selected>Группа</option>')
+
+    def test_count_is_cached(self):
+        url = reverse('admin:posts_post_changelist')
+        self.queries(url)
+        _, sql = self.queries(url)
+        self.assertFalse([query for query in sql if 'COUNT(*)' in query])
+
+    def test_search_uses_full_text_index(self):
+        url = reverse('admin:posts_post_changelist')
+        response, sql = self.queries(url, q='ЁЖИ')
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.post]
+        )
+        self.assertTrue([query for query in sql if 'MATCH' in query])
+        Post.objects.filter(pk=self.post.pk).update(text='Туман')
+        response = self.client.get(url, {'q': 'ежик'})
+        self.assertEqual(list(response.context['cl'].result_list), [])
+
+    def test_migrations_keep_fts_triggers(self):
+        """После всех миграций (SQLite пересоздает posts_post) триггеры
+        индекса FTS на месте."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                "AND tbl_name = 'posts_post'"
+            )
+            triggers = {row[0] for row in cursor.fetchall()}
+        self.assertLessEqual(set(trigger_names('posts_post')), triggers)
+
+    def test_match_expression_quotes_operators(self):
+        self.assertEqual(
+            match_expression('кот OR "пёс*'), '"кот"* "OR"* "пёс"*'
+        )
@@ -0,0 +1,145 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import StoredFile
+
+from .. import revisions
+from ..archive import archive_posts, horizon
+from ..listings import Chain
+from ..models import (ArchivedComment, ArchivedPost, ArchivedPostRevision,
+                      Comment, Post, PostRevision, PostStats)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, PURGE_CHUNK_SIZE=4)
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.old = []
+        for number in range(12):
+            post = Post.objects.create(
+                text=f'Старый пост {number}', author=cls.author
+            )
+            Comment.objects.create(
+                post=post, author=cls.author, text=f'Старый отзыв {number}'
+            )
+            cls.old.append(post)
+        cls.fresh = Post.objects.create(text='Свежий пост', author=cls.author)
+        past = timezone.now() - timedelta(days=400)
+        for number, post in enumerate(cls.old):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=past - timedelta(hours=number)
+            )
+        PostStats.objects.create(
+            post=cls.old[0], views=7, unique_visitors=3
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_old_posts_move_to_archive(self):
+        self.assertEqual(archive_posts(horizon()), 12)
+        self.assertEqual(list(Post.objects.all()), [self.fresh])
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(ArchivedPost.objects.count(), 12)
+        self.assertEqual(ArchivedComment.objects.count(), 12)
+        archived = ArchivedPost.objects.get(pk=self.old[0].pk)
+        self.assertEqual(archived.text, self.old[0].text)
+        self.assertEqual((archived.views, archived.unique_visitors), (7, 3))
+
+    def test_archived_post_detail_fallback(self):
+        archive_posts(horizon())
+        self.client.force_login(self.author)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.old[0].pk])
+        )
+        self.assertContains(response, 'Старый пост 0')
+        self.assertContains(response, 'Старый отзыв 0')
+        self.assertEqual(response.context['views'], 7)
+        self.assertEqual(response.context['posts_count'], 13)
+        self.assertNotContains(response, 'Добавить комментарий')
+        missing = self.client.get(reverse('posts:post_detail', args=[999]))
+        self.assertEqual(missing.status_code, 404)
+
+    def test_profile_continues_into_archive(self):
+        archive_posts(horizon())
+        url = reverse('posts:profile', args=[self.author.username])
+        first = self.client.get(url).context['page_obj']
+        second = self.client.get(url, {'page': 2}).context['page_obj']
+        self.assertEqual(first.paginator.count, 13)
+        ids = [row.pk for row in first] + [row.pk for row in second]
+        self.assertEqual(ids, [self.fresh.pk] + [post.pk for post in self.old])
+
+    def test_archived_image_stays_referenced(self):
+        name = default_storage.save('posts/a.gif', ContentFile(b'gif'))
+        post = Post.objects.get(pk=self.old[1].pk)
+        post.image = name
+        post.save()
+        archive_posts(horizon())
+        self.assertEqual(ArchivedPost.objects.get(pk=post.pk).image, name)
+        # Архивный пост и его версия с этой картинкой.
+        self.assertEqual(StoredFile.objects.get(name=name).refcount, 2)
+
+    def test_revisions_move_to_archive(self):
+        """История правок переезжает в архив вместе с постом."""
+        post = Post.objects.get(pk=self.old[2].pk)
+        for text in ('Правка один', 'Правка два'):
+            post.text = text
+            post.save()
+        created = list(PostRevision.objects.filter(
+            post=post
+        ).values_list('number', 'created'))
+        archive_posts(horizon())
+        self.assertFalse(PostRevision.objects.exists())
+        self.assertEqual(
+            list(ArchivedPostRevision.objects.filter(
+                post_id=post.pk
+            ).values_list('number', 'created')),
+            created,
+        )
+        self.assertEqual(
+            [
+                revisions.text_at(post.pk, number, ArchivedPostRevision)
+                for number in (1, 2, 3)
+            ],
+            ['Старый пост 2', 'Правка один', 'Правка два'],
+        )
+
+    def test_command(self):
+        out = StringIO()
+        call_command('archive_posts', days=10000, stdout=out)
+        self.assertIn('постов: 0', out.getvalue())
+        self.assertEqual(Post.objects.count(), 13)
+
+
+class ChainTests(TestCase):
+    def test_slices_span_parts(self):
+        users = [User.objects.create_user(username=f'u{n}') for n in range(5)]
+        ordered = User.objects.order_by('pk')
+        chain = Chain(
+            ordered.filter(pk__lte=users[2].pk),
+            ordered.filter(pk__gt=users[2].pk),
+        )
+        self.assertEqual(len(chain), 5)
+        self.assertEqual(chain[2:4], users[2:4])
+        self.assertEqual(chain[3:10], users[3:])
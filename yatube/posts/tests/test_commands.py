@@ -0,0 +1,59 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class SeedCommandTests(TestCase):
+    options = {
+        'users': 30,
+        'groups': 3,
+        'posts': 120,
+        'comments': 200,
+        'follows': 50,
+        'chunk_size': 40,
+    }
+
+    def seed(self, seed):
+        call_command(
+            'seed_yatube', seed=seed, stdout=StringIO(), **self.options
+        )
+        return (
+            list(Post.objects.order_by('id').values_list(
+                'text', 'author__username', 'pub_date'
+            )),
+            list(Follow.objects.order_by('user__username').values_list(
+                'user__username', 'author__username'
+            )),
+        )
+
+    def test_seed_creates_rows(self):
+        """Команда создает заданное количество записей."""
+        self.seed(1)
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 120)
+        self.assertEqual(Comment.objects.count(), 200)
+        self.assertEqual(Follow.objects.count(), 50)
+
+    def test_seed_is_deterministic(self):
+        """Одинаковый seed дает одинаковые данные, включая даты."""
+        first = self.seed(7)
+        for model in (Comment, Follow, Post, Group, User):
+            model.objects.all().delete()
+        second = self.seed(7)
+        self.assertEqual(first, second)
+
+    def test_author_activity_is_skewed(self):
+        """Активность авторов распределена по степенному закону."""
+        self.seed(3)
+        counts = sorted(
+            (user.posts.count() for user in User.objects.all()),
+            reverse=True,
+        )
+        self.assertGreater(counts[0], 120 / 30 * 3)
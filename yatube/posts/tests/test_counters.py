@@ -0,0 +1,90 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import counters
+from ..models import Post, PostStats
+
+User = get_user_model()
+
+
+class ViewCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.author)
+        cls.url = reverse('posts:post_detail', kwargs={'post_id': cls.post.pk})
+
+    def setUp(self):
+        counters._pending.clear()
+
+    def view(self, username=None, times=1):
+        client = Client()
+        if username:
+            client.force_login(
+                User.objects.get_or_create(username=username)[0]
+            )
+        for _ in range(times):
+            response = client.get(self.url)
+        return response
+
+    def test_views_are_batched_until_flush(self):
+        """Просмотры копятся в памяти и не пишутся в базу сразу."""
+        response = self.view('reader', times=3)
+        self.assertEqual(response.context['views'], 3)
+        self.assertFalse(PostStats.objects.exists())
+        self.assertEqual(counters.flush_views(), 1)
+        stats = PostStats.objects.get(post=self.post)
+        self.assertEqual(stats.views, 3)
+        self.assertEqual(stats.unique_visitors, 1)
+
+    def test_unique_visitors_merge_across_flushes(self):
+        self.view('first', times=2)
+        counters.flush_views()
+        self.view('first')
+        self.view('second')
+        counters.flush_views()
+        stats = PostStats.objects.get(post=self.post)
+        self.assertEqual(stats.views, 4)
+        self.assertEqual(stats.unique_visitors, 2)
+
+    @override_settings(VIEWS_FLUSH_BATCH=1)
+    def test_flush_on_batch_size(self):
+        self.view()
+        self.assertEqual(PostStats.objects.get(post=self.post).views, 1)
+
+    def test_failed_flush_keeps_views(self):
+        """Ошибка базы при записи не теряет просмотры и не дает 500."""
+        locked = OperationalError('database is locked')
+        with mock.patch.object(
+            PostStats.objects, 'bulk_update', side_effect=locked
+        ), override_settings(VIEWS_FLUSH_BATCH=1), \
+                self.assertLogs('posts.counters', 'WARNING'):
+            response = self.view('first')
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            response = self.view('second')
+        self.assertEqual(response.context['views'], 2)
+        counters.flush_views()
+        stats = PostStats.objects.get(post=self.post)
+        self.assertEqual(stats.views, 2)
+        self.assertEqual(stats.unique_visitors, 2)
+
+    def test_deleted_post_is_skipped(self):
+        post = Post.objects.create(text='Удаленный', author=self.author)
+        counters.record_view(post.pk, 'visitor')
+        post.delete()
+        counters.flush_views()
+        self.assertFalse(PostStats.objects.filter(post_id=post.pk).exists())
+
+    def test_profile_shows_total_views(self):
+        self.view('reader', times=2)
+        counters.flush_views()
+        response = Client().get(
+            reverse('posts:profile', kwargs={'username': 'author'})
+        )
+        self.assertEqual(response.context['views'], 2)
+        self.assertContains(response, 'Просмотров постов: 2')
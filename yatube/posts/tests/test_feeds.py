@@ -0,0 +1,213 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import purge
+from ..models import FeedGeneration, Group, Post
+
+User = get_user_model()
+
+
+def body(response):
+    if response.streaming:
+        return b''.join(response.streaming_content).decode()
+    return response.content.decode()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Видимый пост', author=cls.author, group=cls.group
+        )
+        Post.objects.create(
+            text='Скрытый пост', author=cls.author, is_hidden=True
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_list_visible_posts(self):
+        link = 'http://testserver' + reverse(
+            'posts:post_detail', args=[self.post.pk]
+        )
+        for url in (
+            reverse('posts:site_feed'),
+            reverse('posts:group_feed', args=[self.group.slug]),
+            reverse('posts:author_feed', args=[self.author.username]),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    response['Content-Type'],
+                    'application/atom+xml; charset=utf-8',
+                )
+                content = body(response)
+                self.assertIn(f'<id>{link}</id>', content)
+                self.assertIn('Видимый пост', content)
+                self.assertNotIn('Скрытый пост', content)
+
+    def test_unchanged_feed_is_not_modified(self):
+        url = reverse('posts:site_feed')
+        first = self.client.get(url)
+        self.assertTrue(first.streaming)
+        body(first)
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+        cached = self.client.get(url)
+        self.assertFalse(cached.streaming)
+        self.assertIn('Видимый пост', body(cached))
+
+    @override_settings(FEEDS_CACHE_MAX_SIZE=100)
+    def test_oversized_feed_is_not_cached(self):
+        url = reverse('posts:site_feed')
+        self.assertIn('Видимый пост', body(self.client.get(url)))
+        again = self.client.get(url)
+        self.assertTrue(again.streaming)
+        self.assertIn('Видимый пост', body(again))
+
+    def test_new_post_invalidates_feed(self):
+        url = reverse('posts:site_feed')
+        response = self.client.get(url)
+        body(response)
+        Post.objects.create(text='Свежий пост', author=self.author)
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertIn('Свежий пост', body(fresh))
+
+    def test_generation_is_shared_through_database(self):
+        url = reverse('posts:site_feed')
+        response = self.client.get(url)
+        body(response)
+        # Другой процесс увеличил поколение, не трогая наш кэш.
+        FeedGeneration.objects.filter(name='site').update(
+            value=F('value') + 1
+        )
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+
+    def test_post_invalidates_only_its_feeds(self):
+        other = Group.objects.create(
+            title='Другая', slug='other', description=''
+        )
+        urls = [
+            reverse('posts:group_feed', args=[group.slug])
+            for group in (self.group, other)
+        ]
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        Post.objects.create(text='Свежий пост', author=self.author)
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+                    304,
+                )
+        self.post.group = other
+        self.post.save()
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+                    200,
+                )
+
+    def test_deleted_author_invalidates_all_feeds(self):
+        url = reverse('posts:group_feed', args=[self.group.slug])
+        etag = self.client.get(url)['ETag']
+        self.author.is_active = False
+        self.author.save(update_fields=['is_active'])
+        purge.hide_author(self.author.pk)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Видимый пост', body(response))
+
+    def test_login_keeps_feed(self):
+        url = reverse('posts:site_feed')
+        response = self.client.get(url)
+        body(response)
+        self.client.force_login(self.author)
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_hidden_or_inactive_owner_feed_not_found(self):
+        inactive = User.objects.create_user(
+            username='inactive', is_active=False
+        )
+        hidden = Group.objects.create(
+            title='Скрытая', slug='hidden', description='', is_hidden=True
+        )
+        for url in (
+            reverse('posts:author_feed', args=[inactive.username]),
+            reverse('posts:group_feed', args=[hidden.slug]),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+
+@override_settings(SITEMAP_SHARD_SIZE=2)
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=cls.author)
+            for number in range(5)
+        )
+        cls.posts = list(Post.objects.order_by('pk'))
+        Post.objects.filter(pk=cls.posts[-1].pk).update(is_hidden=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def shard(self, kind, shard):
+        return self.client.get(reverse(
+            'posts:sitemap', kwargs={'kind': kind, 'shard': shard}
+        ))
+
+    def test_index_lists_shards(self):
+        content = body(self.client.get(reverse('posts:sitemap_index')))
+        top = self.posts[-1].pk
+        for shard in range(top // 2 + 1):
+            with self.subTest(shard=shard):
+                self.assertIn(f'/sitemaps/posts-{shard}.xml', content)
+        self.assertNotIn(f'/sitemaps/posts-{top // 2 + 1}.xml', content)
+        self.assertIn('/sitemaps/groups-0.xml', content)
+
+    def test_shards_split_posts_by_id(self):
+        listed = []
+        for shard in range(self.posts[-1].pk // 2 + 1):
+            content = body(self.shard('posts', shard))
+            listed.extend(
+                post.pk for post in self.posts
+                if reverse('posts:post_detail', args=[post.pk]) + '<'
+                in content
+            )
+        self.assertEqual(listed, [post.pk for post in self.posts[:-1]])
+
+    def test_unknown_shard_or_kind_not_found(self):
+        self.assertEqual(
+            self.shard('posts', self.posts[-1].pk).status_code, 404
+        )
+        self.assertEqual(self.shard('comments', 0).status_code, 404)
+
+    def test_edit_invalidates_only_its_shard(self):
+        last = self.posts[-2]
+        shards = (0, last.pk // 2)
+        etags = [self.shard('posts', shard)['ETag'] for shard in shards]
+        last.text = 'Правка'
+        last.save()
+        statuses = [
+            self.client.get(
+                reverse('posts:sitemap', kwargs={'kind': 'posts',
+                                                 'shard': shard}),
+                HTTP_IF_NONE_MATCH=etag,
+            ).status_code
+            for shard, etag in zip(shards, etags)
+        ]
+        self.assertEqual(statuses, [304, 200])
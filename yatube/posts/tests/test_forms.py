@@ -1,11 +1,19 @@
+import hashlib
 import shutil
 import tempfile
+from io import BytesIO, StringIO
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.core.files.uploadhandler import StopUpload
+from django.core.management import call_command
+from django.test import Client, RequestFactory, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
+
+from core.markdown import VERSION
+from core.uploads import BoundedUploadHandler
 
 from ..models import Comment, Group, Post
 
@@ -13,6 +21,8 @@ TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 User = get_user_model()
 
+ORIENTATION = 0x0112
+
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostFormTests(TestCase):
@@ -88,7 +98,11 @@ class PostFormTests(TestCase):
         self.assertEqual(post_first.text, form_data['text'])
         self.assertEqual(post_first.author, self.user)
         self.assertEqual(post_first.group, self.group)
-        self.assertEqual(post_first.image, 'posts/small.gif')
+        digest = hashlib.sha256(small_gif).hexdigest()
+        self.assertEqual(
+            post_first.image,
+            f'posts/{digest[:2]}/{digest[2:4]}/{digest}.gif'
+        )
 
     def test_post_edit(self):
         """Валидная форма редактирует запись в Post."""
@@ -166,3 +180,115 @@ class PostFormTests(TestCase):
         )
         self.assertRedirects(response, redirect_url)
         self.assertEqual(Comment.objects.count(), 0)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def upload(self, content, name='photo.jpg'):
+        return self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Пост с картинкой',
+                'image': SimpleUploadedFile(name, content, 'image/jpeg'),
+            },
+        )
+
+    def jpeg(self, size=(40, 20), orientation=None):
+        exif = Image.Exif()
+        if orientation:
+            exif[ORIENTATION] = orientation
+        buffer = BytesIO()
+        Image.new('RGB', size, 'red').save(
+            buffer, 'JPEG', exif=exif.tobytes()
+        )
+        return buffer.getvalue()
+
+    @override_settings(UPLOAD_MAX_SIZE=100)
+    def test_oversized_upload_is_rejected(self):
+        """Файл больше лимита отклоняется, пост не создается."""
+        response = self.upload(self.jpeg())
+        self.assertFormError(
+            response, 'form', 'image', 'Файл больше 0 МБ.'
+        )
+        self.assertEqual(Post.objects.count(), 0)
+
+    @override_settings(UPLOAD_MAX_SIZE=4)
+    def test_oversized_upload_stops_reading(self):
+        handler = BoundedUploadHandler(RequestFactory().post('/'))
+        handler.new_file('image', 'photo.jpg', 'image/jpeg', None)
+        handler.receive_data_chunk(b'1234', 0)
+        with self.assertRaises(StopUpload) as raised:
+            handler.receive_data_chunk(b'5', 4)
+        self.assertTrue(raised.exception.connection_reset)
+
+    @override_settings(UPLOAD_MAX_PIXELS=100)
+    def test_too_many_pixels_is_rejected(self):
+        response = self.upload(self.jpeg())
+        self.assertFormError(
+            response, 'form', 'image', 'Картинка больше 0 мегапикселей.'
+        )
+
+    @override_settings(JOBS_ALWAYS_EAGER=True)
+    def test_exif_is_stripped_and_orientation_applied(self):
+        """Фоновая задача поворачивает картинку и убирает EXIF."""
+        self.upload(self.jpeg(size=(40, 20), orientation=6))
+        post = Post.objects.get()
+        with post.image.open('rb') as file:
+            image = Image.open(file)
+            self.assertEqual(image.size, (20, 40))
+            self.assertEqual(len(image.getexif()), 0)
+
+
+class MarkdownFormTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_html_is_rendered_on_save(self):
+        """Форма сохраняет готовый HTML, шаблон выводит его как есть."""
+        self.client.post(
+            reverse('posts:post_create'), {'text': '**Важно** <i>'}
+        )
+        post = Post.objects.get()
+        self.assertEqual(
+            post.text_html, '<p><strong>Важно</strong> &lt;i&gt;</p>'
+        )
+        self.assertEqual(post.html_version, VERSION)
+        self.client.post(
+            reverse('posts:add_comment', args=[post.pk]), {'text': '*да*'}
+        )
+        self.assertEqual(
+            Comment.objects.get().text_html, '<p><em>да</em></p>'
+        )
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post.pk])
+        )
+        self.assertContains(response, '<strong>Важно</strong> &lt;i&gt;')
+        self.assertContains(response, '<em>да</em>')
+
+    def test_render_markdown_command(self):
+        post = Post.objects.create(text='*старый*', author=self.user)
+        Comment.objects.create(post=post, author=self.user, text='`код`')
+        call_command('render_markdown', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, '<p><em>старый</em></p>')
+        self.assertEqual(
+            Comment.objects.get().text_html, '<p><code>код</code></p>'
+        )
@@ -0,0 +1,191 @@
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import cache, caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.jobs import run_pending
+from core.models import Job, StoredFile
+
+from .. import purge
+from ..models import Comment, Follow, Group, Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, PURGE_CHUNK_SIZE=2)
+class PurgeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+            for number in range(5)
+        ]
+        cls.kept = Post.objects.create(
+            text='Пост читателя', author=cls.reader, group=cls.group
+        )
+        for post in cls.posts:
+            Comment.objects.create(post=post, author=cls.reader, text='Да')
+        Comment.objects.create(post=cls.kept, author=cls.author, text='Нет')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.author, author=cls.reader)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        caches['pages'].clear()
+        self.admin = User.objects.create_superuser(
+            username='admin', password='pass'
+        )
+        self.client.force_login(self.admin)
+
+    def listed(self, url):
+        page = self.client.get(url).context['page_obj']
+        return {post.pk for post in page.object_list}
+
+    def test_hidden_post_leaves_listings(self):
+        post = self.posts[0]
+        Post.objects.filter(pk=post.pk).update(is_hidden=True)
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+        ):
+            with self.subTest(url=url):
+                self.assertNotIn(post.pk, self.listed(url))
+        response = self.client.get(
+            reverse('posts:post_detail', args=[post.pk])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_admin_delete_post_hides_and_enqueues(self):
+        post = self.posts[0]
+        self.client.post(
+            reverse('admin:posts_post_delete', args=[post.pk]),
+            {'post': 'yes'},
+        )
+        self.assertTrue(Post.objects.get(pk=post.pk).is_hidden)
+        self.assertTrue(Job.objects.filter(
+            task='posts.jobs.purge_post', args=[post.pk]
+        ).exists())
+        purge.purge_post(post.pk)
+        self.assertFalse(Post.objects.filter(pk=post.pk).exists())
+
+    def test_admin_delete_user_is_soft_and_purge_is_chunked(self):
+        """Удаление в админке только отключает автора; задача удаляет
+        его записи порциями по PURGE_CHUNK_SIZE."""
+        self.client.post(
+            reverse('admin:auth_user_delete', args=[self.author.pk]),
+            {'post': 'yes'},
+        )
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 5)
+        self.assertEqual(Post.objects.visible().count(), 6)
+        # Первой выполняется задача, скрывающая посты автора.
+        self.assertEqual(run_pending(limit=1), 1)
+        self.assertTrue(Job.objects.filter(
+            task='posts.jobs.purge_user', args=[self.author.pk]
+        ).exists())
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:profile', args=[self.author.username])
+            ).status_code,
+            HTTPStatus.NOT_FOUND,
+        )
+        self.assertEqual(
+            self.listed(reverse('posts:index')), {self.kept.pk}
+        )
+        with CaptureQueriesContext(connection) as queries:
+            purge.purge_user(self.author.pk)
+        post_deletes = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('DELETE FROM "posts_post"')
+        ]
+        self.assertEqual(len(post_deletes), 3)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertTrue(Post.objects.filter(pk=self.kept.pk).exists())
+
+    def test_admin_delete_checks_cascade_permissions(self):
+        """Без права удалять посты нельзя удалить и их автора."""
+        staff = User.objects.create_user(
+            username='staff', password='pass', is_staff=True
+        )
+        staff.user_permissions.add(
+            Permission.objects.get(codename='delete_user')
+        )
+        self.client.force_login(staff)
+        url = reverse('admin:auth_user_delete', args=[self.author.pk])
+        self.assertIn('Пост', self.client.get(url).context['perms_lacking'])
+        response = self.client.post(url, {'post': 'yes'})
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.author.refresh_from_db()
+        self.assertTrue(self.author.is_active)
+
+    def test_purge_skips_reactivated_user(self):
+        User.objects.filter(pk=self.author.pk).update(is_active=False)
+        purge.hide_author(self.author.pk)
+        User.objects.filter(pk=self.author.pk).update(is_active=True)
+        purge.purge_user(self.author.pk)
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 5)
+        self.assertEqual(Post.objects.visible().count(), 6)
+
+    def test_deactivation_alone_keeps_posts(self):
+        """Отключение в админке — не удаление: посты остаются в лентах,
+        а ленты не обращаются к auth_user."""
+        self.author.is_active = False
+        self.author.save()
+        self.assertEqual(Post.objects.visible().count(), 6)
+        self.assertNotIn('auth_user', str(Post.objects.visible().query))
+
+    def test_group_purge_keeps_posts(self):
+        self.client.post(
+            reverse('admin:posts_group_delete', args=[self.group.pk]),
+            {'post': 'yes'},
+        )
+        response = self.client.get(
+            reverse('posts:group_list', args=[self.group.slug])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        purge.purge_group(self.group.pk)
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(Post.objects.filter(group=None).count(), 6)
+
+    def test_purge_removes_unreferenced_images(self):
+        name = default_storage.save('posts/a.gif', ContentFile(b'gif'))
+        shared = default_storage.save('posts/b.gif', ContentFile(b'shared'))
+        Post.objects.filter(pk=self.posts[0].pk).update(image=name)
+        for post in (self.posts[1], self.kept):
+            post.image = shared
+            post.save()
+        StoredFile.objects.filter(name=name).update(refcount=1)
+        User.objects.filter(pk=self.author.pk).update(is_active=False)
+        purge.purge_user(self.author.pk)
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+        self.assertTrue(default_storage.exists(shared))
+        # Пост читателя и его версия в истории правок.
+        self.assertEqual(StoredFile.objects.get(name=shared).refcount, 2)
@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post, PostRevision
+from ..revisions import diff, patch, text_at
+
+User = get_user_model()
+
+LONG_TEXT = ' '.join(f'слово{number}' for number in range(2000))
+
+
+@override_settings(REVISION_SNAPSHOT_EVERY=3)
+class RevisionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        self.client.force_login(self.author)
+
+    def edit(self, post, text):
+        post.text = text
+        post.save()
+
+    def test_diff_roundtrip(self):
+        cases = [
+            ('', 'Новый текст'),
+            ('Один два три', 'Один три четыре'),
+            ('Строка\nвторая строка', 'Строка\n\nвторая  строка!'),
+            ('Удалить все', ''),
+        ]
+        for base, text in cases:
+            with self.subTest(base=base, text=text):
+                self.assertEqual(patch(base, diff(base, text)), text)
+
+    def test_every_version_is_reconstructed(self):
+        texts = [f'Версия {number} поста' for number in range(7)]
+        post = Post.objects.create(text=texts[0], author=self.author)
+        for text in texts[1:]:
+            self.edit(post, text)
+        revisions = list(post.revisions.values_list('number', 'is_snapshot'))
+        self.assertEqual(
+            revisions,
+            [(1, True), (2, False), (3, False), (4, True), (5, False),
+             (6, False), (7, True)],
+        )
+        for number, text in enumerate(texts, start=1):
+            self.assertEqual(text_at(post.pk, number), text)
+
+    def test_save_reads_old_row_once(self):
+        post = Post.objects.create(text='Первый текст', author=self.author)
+        with CaptureQueriesContext(connection) as queries:
+            self.edit(post, 'Второй текст')
+        selects = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "posts_post"' in query['sql']
+        ]
+        self.assertEqual(len(selects), 1)
+        self.assertEqual(text_at(post.pk, 1), 'Первый текст')
+
+    def test_delta_grows_with_edit_not_post(self):
+        post = Post.objects.create(text=LONG_TEXT, author=self.author)
+        self.edit(post, LONG_TEXT.replace('слово1000', 'правка'))
+        snapshot, delta = post.revisions.values_list('data', flat=True)
+        self.assertLess(len(delta), 100)
+        self.assertGreater(len(snapshot), 10 * len(delta))
+
+    def test_unchanged_save_adds_no_version(self):
+        post = Post.objects.create(text='Текст', author=self.author)
+        self.assertFalse(post.revisions.exists())
+        post.save()
+        self.assertFalse(post.revisions.exists())
+        self.edit(post, 'Правка')
+        post.save()
+        self.assertEqual(post.revisions.count(), 2)
+
+    def test_post_without_history_keeps_original(self):
+        post = Post.objects.create(text='Исходный', author=self.author)
+        PostRevision.objects.all().delete()
+        self.edit(post, 'Исправленный')
+        self.assertEqual(text_at(post.pk, 1), 'Исходный')
+        self.assertEqual(text_at(post.pk, 2), 'Исправленный')
+
+    def test_history_page(self):
+        post = Post.objects.create(text='Первый вариант', author=self.author)
+        self.client.post(
+            reverse('posts:post_edit', args=[post.pk]),
+            {'text': 'Второй вариант'},
+        )
+        url = reverse('posts:post_history', args=[post.pk])
+        response = self.client.get(url, {'version': 1})
+        self.assertEqual(len(response.context['versions']), 2)
+        self.assertEqual(
+            response.context['text_html'], '<p>Первый вариант</p>'
+        )
+        self.assertEqual(
+            self.client.get(url).context['text_html'], '<p>Второй вариант</p>'
+        )
+        stranger = Client()
+        stranger.force_login(User.objects.create_user(username='stranger'))
+        self.assertRedirects(
+            stranger.get(url), reverse('posts:post_detail', args=[post.pk])
+        )
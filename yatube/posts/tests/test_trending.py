@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import trending
+from ..models import Comment, Follow, Post, PostScore
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.quiet = Post.objects.create(text='Тихий пост', author=cls.author)
+        cls.loud = Post.objects.create(text='Громкий пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def comment(self, post, count=1):
+        for number in range(count):
+            Comment.objects.create(
+                post=post, author=self.reader, text=f'Комментарий {number}'
+            )
+
+    def test_comments_rank_posts(self):
+        """Пост с большим числом комментариев выше в популярном."""
+        self.comment(self.quiet)
+        self.comment(self.loud, 3)
+        self.assertEqual(
+            trending.trending_ids(), [self.loud.pk, self.quiet.pk]
+        )
+        self.assertAlmostEqual(
+            PostScore.objects.get(post=self.loud).score, 3, places=3
+        )
+
+    def test_score_halves_every_half_life(self):
+        now = timezone.now()
+        trending.record_comment(self.loud, now=now)
+        later = now + timedelta(seconds=settings.TRENDING_HALF_LIFE)
+        trending.record_comment(self.loud, now=later)
+        self.assertAlmostEqual(
+            PostScore.objects.get(post=self.loud).score, 1.5
+        )
+
+    def test_followers_increase_weight(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.comment(self.loud)
+        self.assertGreater(PostScore.objects.get(post=self.loud).score, 1)
+
+    def test_tick_decays_and_drops_faded_posts(self):
+        past = timezone.now() - timedelta(
+            seconds=settings.TRENDING_HALF_LIFE * 10
+        )
+        trending.record_comment(self.quiet, now=past)
+        self.comment(self.loud)
+        top = trending.tick()
+        self.assertEqual([post_id for post_id, _ in top], [self.loud.pk])
+        self.assertFalse(PostScore.objects.filter(post=self.quiet).exists())
+
+    def test_trending_page(self):
+        """Страница читает топ из кэша и делает один запрос за постами."""
+        self.comment(self.quiet)
+        self.comment(self.loud, 2)
+        client = Client()
+        with self.assertNumQueries(1):
+            response = client.get(reverse('posts:trending'))
+        posts = response.context['posts']
+        self.assertEqual(posts, [self.loud, self.quiet])
+        self.assertContains(response, 'Громкий пост')
+
+    def test_trending_page_matches_in_jinja2(self):
+        self.comment(self.loud)
+        pages = []
+        for engine in ('django', 'jinja2'):
+            with self.settings(POSTS_TEMPLATE_ENGINE=engine):
+                content = Client().get(reverse('posts:trending')).content
+            pages.append(' '.join(content.decode().split()))
+        self.assertEqual(pages[0], pages[1])
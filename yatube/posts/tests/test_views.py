@@ -1,15 +1,18 @@
 import shutil
 import tempfile
 from http import HTTPStatus
+from unittest import mock
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
+from django.core.cache import cache, caches
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from sorl.thumbnail import default
 
 from ..forms import PostForm
+from ..listings import PostRow
 from ..models import Follow, Group, Post
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -55,6 +58,7 @@ class PostPagesTests(TestCase):
 
     def setUp(self):
         cache.clear()
+        caches['pages'].clear()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
 
@@ -81,7 +85,8 @@ class PostPagesTests(TestCase):
     def check_post_object(self, post):
         """Избегаем дублирования тестов."""
         with self.subTest(post=post):
-            self.assertEqual(post.text, self.post.text)
+            self.assertEqual(post, self.post)
+            self.assertEqual(str(post), str(self.post))
             self.assertEqual(post.author, self.post.author)
             self.assertEqual(post.group, self.post.group)
             self.assertEqual(post.image, self.post.image)
@@ -183,7 +188,7 @@ class PostPagesTests(TestCase):
         Post.objects.first().delete()
         response_second = self.authorized_client.get(reverse('posts:index'))
         self.assertEqual(response.content, response_second.content)
-        cache.clear()
+        caches['pages'].clear()
         response_third = self.authorized_client.get(reverse('posts:index'))
         self.assertNotEqual(response.content, response_third.content)
 
@@ -252,3 +257,100 @@ class PostPagesTests(TestCase):
         )
         response = author_unfollow_client.get(reverse('posts:follow_index'))
         self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_listing_rows_are_slim(self):
+        """Ленты отдают в шаблон компактные строки без полного текста."""
+        long_post = Post.objects.create(
+            text='Очень длинный текст поста ' * 20,
+            author=self.user,
+            group=self.group,
+        )
+        response = self.authorized_client.get(reverse('posts:index'))
+        row = response.context['page_obj'][0]
+        self.assertIsInstance(row, PostRow)
+        self.assertEqual(row, long_post)
+        self.assertEqual(str(row), str(long_post))
+        self.assertFalse(hasattr(row, 'text'))
+        self.assertEqual(row.author.get_full_name(), self.user.get_full_name())
+        self.assertEqual(row.group.slug, self.group.slug)
+        self.assertContains(response, str(long_post))
+
+    def test_thumbnails_are_preloaded_in_one_lookup(self):
+        """Миниатюры страницы берутся из хранилища sorl одним get_many."""
+        url = reverse('posts:profile', kwargs={'username': self.user})
+        self.authorized_client.get(url)
+        kvstore = default.kvstore
+        with mock.patch.object(
+            kvstore.cache, 'get_many', wraps=kvstore.cache.get_many
+        ) as get_many, mock.patch.object(
+            kvstore, '_get_raw', wraps=kvstore._get_raw
+        ) as get_raw:
+            response = self.authorized_client.get(url)
+        row = response.context['page_obj'][0]
+        self.assertIsNotNone(row.thumbnail)
+        self.assertContains(response, row.thumbnail.url)
+        self.assertEqual(get_many.call_count, 1)
+        self.assertEqual(get_raw.call_count, 0)
+
+    def test_failed_thumbnail_is_tried_once(self):
+        """Шаблон не режет миниатюру заново, если preload не смог."""
+        url = reverse('posts:profile', kwargs={'username': self.user})
+        with mock.patch.object(
+            default.backend, 'get_thumbnail', side_effect=OSError
+        ) as get_thumbnail, self.assertLogs('core.thumbnails', 'ERROR'):
+            self.authorized_client.get(url)
+        self.assertEqual(get_thumbnail.call_count, 1)
+
+    @override_settings(POSTS_TEMPLATE_ENGINE='jinja2')
+    def test_jinja2_pages_render(self):
+        """Страницы постов рендерятся движком Jinja2."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                if url != reverse('posts:follow_index'):
+                    self.assertContains(response, str(self.post))
+
+    def test_jinja2_matches_django_templates(self):
+        """Jinja2-шаблоны выводят ту же разметку, что и DTL."""
+        guest_client = Client()
+        url = reverse('posts:profile', kwargs={'username': self.user})
+        pages = []
+        for engine in ('django', 'jinja2'):
+            with override_settings(POSTS_TEMPLATE_ENGINE=engine):
+                content = guest_client.get(url).content.decode()
+            pages.append(' '.join(content.split()))
+        self.assertEqual(pages[0], pages[1])
+
+    @override_settings(POSTS_STREAM_BATCH=2, BREAKER_NAMESPACES=('about',))
+    def test_streaming_matches_regular_page(self):
+        """Потоковая лента: сначала шапка, затем та же разметка."""
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=self.user, group=self.group)
+            for number in range(4)
+        )
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        for engine in ('django', 'jinja2'):
+            with self.subTest(engine=engine), override_settings(
+                POSTS_TEMPLATE_ENGINE=engine
+            ):
+                regular = self.client.get(url).content.decode()
+                with override_settings(POSTS_STREAMING=True):
+                    response = self.client.get(url)
+                    chunks = [
+                        chunk.decode() for chunk in response.streaming_content
+                    ]
+                self.assertIn('<title>', chunks[0])
+                self.assertNotIn('Пост', chunks[0])
+                self.assertEqual(len(chunks), 2 + 5)
+                self.assertEqual(
+                    ' '.join(''.join(chunks).split()),
+                    ' '.join(regular.split()),
+                )
@@ -0,0 +1,112 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .. import warmup
+from ..identity import groups_by_slug, users_by_username
+from ..models import Group, Post, PostStats
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class WarmupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description=''
+        )
+        cls.popular = Post.objects.create(
+            text='Популярный', author=cls.author, group=cls.group
+        )
+        cls.hidden = Post.objects.create(
+            text='Скрытый', author=cls.reader, is_hidden=True
+        )
+        PostStats.objects.create(post=cls.popular, views=100)
+        PostStats.objects.create(post=cls.hidden, views=500)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        caches['pages'].clear()
+        groups_by_slug.clear_local()
+        users_by_username.clear_local()
+
+    def add_image(self, post):
+        buffer = BytesIO()
+        Image.new('RGB', (40, 20), 'red').save(buffer, 'PNG')
+        post.image = default_storage.save(
+            'posts/red.png', ContentFile(buffer.getvalue())
+        )
+        post.save()
+
+    def test_popular_posts_follow_counters(self):
+        self.assertEqual(warmup.popular_posts(limit=2), [self.popular])
+
+    def test_warm_fills_identity_maps_thumbnails_and_pages(self):
+        self.add_image(self.popular)
+        counts = warmup.warm(workers=1, host='testserver')
+        self.assertEqual(
+            counts, {'groups': 1, 'authors': 1, 'thumbnails': 1, 'pages': 3}
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(groups_by_slug.get('group'), self.group)
+            self.assertEqual(users_by_username.get('author'), self.author)
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Популярный')
+        with mock.patch('core.thumbnails.get_thumbnail') as get_thumbnail:
+            self.assertEqual(
+                warmup.warm(workers=1, host='testserver')['thumbnails'], 1
+            )
+        get_thumbnail.assert_not_called()
+
+    def test_command_skips_process_caches(self):
+        """Команда не прогревает кэши, которые у процесса сайта свои."""
+        out = StringIO()
+        with mock.patch.object(warmup, 'fetch_all') as fetch_all:
+            call_command('warm_caches', limit=1, stdout=out)
+        fetch_all.assert_not_called()
+        self.assertIn(
+            'Прогрето миниатюр: 0, групп: 0, авторов: 0, страниц: 0',
+            out.getvalue(),
+        )
+
+    def test_process_warms_itself_after_start_and_invalidation(self):
+        """Первый запрос и сбросы лент планируют прогрев, пачка сбросов —
+        один раз."""
+        with mock.patch.object(warmup.threading, 'Timer') as timer, \
+                mock.patch.object(warmup, '_started', False), \
+                mock.patch.object(warmup, '_timer', None), \
+                mock.patch.object(warmup, '_host', None):
+            warmup.schedule_once({'HTTP_HOST': 'yatube.example'})
+            timer.assert_not_called()
+            with override_settings(WARMUP_IN_PROCESS=True):
+                for _ in range(3):
+                    warmup.schedule_once({'HTTP_HOST': 'other.example'})
+                    Post.objects.create(text='Пост', author=self.author)
+                self.assertEqual(timer.call_count, 1)
+                self.assertEqual(warmup._host, 'other.example')
+                with mock.patch.object(warmup, 'warm') as warm, \
+                        mock.patch.object(warmup.connections, 'close_all'):
+                    warmup.run_scheduled()
+                warm.assert_called_once()
+                self.group.save()
+            self.assertEqual(timer.call_count, 2)
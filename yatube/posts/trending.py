@@ -0,0 +1,125 @@
+"""Популярные посты: рейтинг с экспоненциальным затуханием.
+
+Каждый комментарий добавляет посту вес ``1 + log10(1 + подписчики
+автора)``, а весь накопленный рейтинг за ``TRENDING_HALF_LIFE`` секунд
+уменьшается вдвое. Рейтинг хранится вместе с моментом, на который он
+посчитан, поэтому комментарий обновляет одну строку ``PostScore`` без
+агрегатных запросов. Первые ``TRENDING_SIZE`` постов лежат в кэше
+списком, и страница «Популярное» читает его за одно обращение.
+
+Команда ``trending_tick`` периодически приводит все рейтинги к текущему
+моменту, удаляет угасшие и заново собирает список из базы.
+"""
+import heapq
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from core.transactions import immediate
+
+from .models import Follow, PostScore
+
+TOP_KEY = 'trending:top'
+FOLLOWERS_TIMEOUT = 5 * 60
+
+
+def decay(score, since, now):
+    age = (now - since).total_seconds()
+    return score * 0.5 ** (age / settings.TRENDING_HALF_LIFE)
+
+
+def followers_key(author_id):
+    return f'trending:followers:{author_id}'
+
+
+def followers(author_id):
+    return cache.get_or_set(
+        followers_key(author_id),
+        lambda: Follow.objects.filter(author_id=author_id).count(),
+        FOLLOWERS_TIMEOUT,
+    )
+
+
+def comment_weight(post):
+    return 1 + math.log10(1 + followers(post.author_id))
+
+
+def top_entries(now):
+    """Список ``[post_id, рейтинг]``, приведенный к моменту ``now``."""
+    cached = cache.get(TOP_KEY)
+    if cached is None:
+        return rebuild_top()
+    entries, since = cached
+    return [[post_id, decay(score, since, now)] for post_id, score in entries]
+
+
+def store_top(entries, now):
+    cache.set(TOP_KEY, (entries, now), None)
+
+
+def record_comment(post, now=None):
+    """Добавляет посту вес одного комментария."""
+    now = now or timezone.now()
+    with immediate():
+        row, created = PostScore.objects.get_or_create(
+            post_id=post.pk, defaults={'updated': now}
+        )
+        row.score = decay(row.score, row.updated, now) + comment_weight(post)
+        row.updated = now
+        row.save(update_fields=['score', 'updated'])
+    entries = [
+        entry for entry in top_entries(now) if entry[0] != post.pk
+    ]
+    entries.append([post.pk, row.score])
+    store_top(
+        heapq.nlargest(
+            settings.TRENDING_SIZE, entries, key=lambda entry: entry[1]
+        ),
+        now,
+    )
+
+
+def rebuild_top(now=None):
+    now = now or timezone.now()
+    entries = [
+        [row.post_id, decay(row.score, row.updated, now)]
+        for row in PostScore.objects.order_by('-score')[
+            :settings.TRENDING_SIZE * 4
+        ]
+    ]
+    entries = heapq.nlargest(
+        settings.TRENDING_SIZE, entries, key=lambda entry: entry[1]
+    )
+    store_top(entries, now)
+    return entries
+
+
+def tick(now=None, chunk_size=1000):
+    """Приводит рейтинги к ``now``, удаляет угасшие, пересобирает топ."""
+    now = now or timezone.now()
+    # Рейтинг только убывает: то, что мало уже сейчас, можно не пересчитывать.
+    PostScore.objects.filter(score__lt=settings.TRENDING_MIN_SCORE).delete()
+    last_pk = 0
+    while True:
+        rows = list(PostScore.objects.filter(
+            pk__gt=last_pk, updated__lt=now
+        ).order_by('pk').values_list('pk', 'score', 'updated')[:chunk_size])
+        if not rows:
+            break
+        with transaction.atomic():
+            for pk, score, updated in rows:
+                # Строку, которую успел обновить комментарий, не трогаем.
+                PostScore.objects.filter(pk=pk, updated=updated).update(
+                    score=decay(score, updated, now), updated=now
+                )
+        last_pk = rows[-1][0]
+    PostScore.objects.filter(score__lt=settings.TRENDING_MIN_SCORE).delete()
+    return rebuild_top(now)
+
+
+def trending_ids():
+    """id популярных постов по убыванию рейтинга."""
+    return [post_id for post_id, _ in top_entries(timezone.now())]
@@ -1,20 +1,39 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('trending/', views.trending, name='trending'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path(
+        'posts/<int:post_id>/history/',
+        views.post_history,
+        name='post_history'
+    ),
     path(
         'posts/<int:post_id>/comment/', views.add_comment, name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('feeds/atom/', feeds.site_feed, name='site_feed'),
+    path('group/<slug:slug>/atom/', feeds.group_feed, name='group_feed'),
+    path(
+        'profile/<str:username>/atom/',
+        feeds.author_feed,
+        name='author_feed'
+    ),
+    path('sitemap.xml', feeds.sitemap_index, name='sitemap_index'),
+    path(
+        'sitemaps/<slug:kind>-<int:shard>.xml',
+        feeds.sitemap,
+        name='sitemap'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
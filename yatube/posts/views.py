@@ -1,79 +1,149 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.models import User
-from django.core.paginator import Paginator
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
-
-from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post
 
+from core import markdown
+from core.stale import cache_page
+from core.thumbnails import preload
+from core.uploads import uploaded_files
 
-def paginate_page(request, post):
-    paginator = Paginator(post, settings.NUMBER_OF_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    return page_obj
+from . import revisions
+from .archive import posts_count, views_count
+from .counters import pending_views, record_view, visitor_id
+from .forms import CommentForm, PostForm
+from .identity import groups_by_slug, users_by_username
+from .jobs import prepare_image
+from .listings import (CARD_THUMBNAIL, PostRow, listing, paginate,
+                       paginate_rows)
+from .models import ArchivedPost, Follow, Post, PostStats
+from .streaming import render_listing
+from .trending import trending_ids
 
 
 @cache_page(20, key_prefix='index_page')
 def index(request):
-    """В переменную posts будет сохранена выборка из 10 объектов модели Post,
+    """На страницу попадает выборка из 10 постов в виде строк PostRow,
     отсортированных по полю pub_date по убыванию
     (от больших значений к меньшим).
-    В словаре context отправляем информацию в шаблон."""
-    post = Post.objects.select_related('author', 'group')
+    В словаре context отправляем информацию в шаблон.
+    Главная берется из кэша страниц, поэтому потоком не отдается:
+    потоковые ответы cache_page не сохраняет. Устаревшая копия
+    отдается сразу, а свежая рисуется в фоне (core/stale.py)."""
     context = {
-        'page_obj': paginate_page(request, post),
+        'page_obj': paginate_rows(request, Post.objects.visible()),
+    }
+    return render(
+        request, 'posts/index.html', context,
+        using=settings.POSTS_TEMPLATE_ENGINE
+    )
+
+
+def trending(request):
+    """Популярные посты в порядке рейтинга из кэша."""
+    ids = trending_ids()
+    rows = {
+        values[0]: PostRow.from_values(values)
+        for values in listing(Post.objects.visible().filter(id__in=ids))
     }
-    return render(request, 'posts/index.html', context)
+    posts = [rows[post_id] for post_id in ids if post_id in rows]
+    geometry, options = CARD_THUMBNAIL
+    preload(posts, geometry, options)
+    return render(
+        request, 'posts/trending.html', {'posts': posts},
+        using=settings.POSTS_TEMPLATE_ENGINE
+    )
 
 
 def group_posts(request, slug):
     """View-функция для страницы сообщества.
-    Функция get_object_or_404 получает по заданным критериям объект
-    из базы данных или возвращает сообщение об ошибке, если объект не найден.
-    В нашем случае в переменную group будут переданы объекты модели Group,
-    поле slug у которых соответствует значению slug в запросе."""
-    group = get_object_or_404(Group, slug=slug)
-    post = group.posts.select_related('author', 'group')
+    groups_by_slug.get_or_404 берет группу по slug из кэша идентичности
+    (при промахе — из базы) или возвращает ошибку 404, если группы нет.
+    В переменную group будет передан объект модели Group,
+    поле slug у которого соответствует значению slug в запросе."""
+    group = groups_by_slug.get_or_404(slug)
+    if group.is_hidden:
+        raise Http404(f'Группа {slug!r} удаляется')
     context = {
         'group': group,
-        'page_obj': paginate_page(request, post),
+        'page_obj': paginate(request, group.posts.visible()),
     }
-    return render(request, 'posts/group_list.html', context)
+    return render_listing(request, 'posts/group_list.html', context)
+
+
+def active_author_or_404(username):
+    author = users_by_username.get_or_404(username)
+    if not author.is_active:
+        raise Http404(f'Пользователь {username!r} отключен')
+    return author
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post = author.posts.select_related('author', 'group')
+    author = active_author_or_404(username)
     following = request.user.is_authenticated and Follow.objects.filter(
         user=request.user, author=author
     ).exists()
     context = {
         'author': author,
-        'page_obj': paginate_page(request, post),
+        'page_obj': paginate(
+            request, author.posts.visible(), author.archived_posts.all()
+        ),
         'following': following,
+        'views': views_count(author),
     }
-    return render(request, 'posts/profile.html', context)
+    return render_listing(request, 'posts/profile.html', context)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = Post.objects.visible().filter(id=post_id).first()
+    if post is None:
+        return archived_post_detail(request, post_id)
     form = CommentForm(request.POST or None)
     comments = post.comments.select_related('post', 'author')
+    if request.method == 'GET':
+        record_view(post.pk, visitor_id(request))
+    views, unique_visitors = PostStats.objects.filter(
+        post=post
+    ).values_list('views', 'unique_visitors').first() or (0, 0)
     context = {
         'post': post,
         'form': form,
         'comments': comments,
+        # Плюс просмотры этого процесса, еще не записанные в базу.
+        'views': views + pending_views(post.pk),
+        'unique_visitors': unique_visitors,
+        'posts_count': posts_count(post.author),
     }
-    return render(request, 'posts/post_detail.html', context)
+    return render(
+        request, 'posts/post_detail.html', context,
+        using=settings.POSTS_TEMPLATE_ENGINE
+    )
+
+
+def archived_post_detail(request, post_id):
+    """Пост из архива: только чтение, без новых комментариев."""
+    post = get_object_or_404(
+        ArchivedPost.objects.select_related('author', 'group'),
+        id=post_id, author__is_active=True,
+    )
+    context = {
+        'post': post,
+        'comments': post.comments.select_related('author'),
+        'views': post.views,
+        'unique_visitors': post.unique_visitors,
+        'posts_count': posts_count(post.author),
+        'archived': True,
+    }
+    return render(
+        request, 'posts/post_detail.html', context,
+        using=settings.POSTS_TEMPLATE_ENGINE
+    )
 
 
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None,
-                    files=request.FILES or None)
+                    files=uploaded_files(request))
     context = {
         'form': form,
         'is_edit': False,
@@ -82,22 +152,26 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        if post.image:
+            prepare_image.delay(post.pk)
         return redirect('posts:profile', request.user)
     return render(request, 'posts/post_create.html', context)
 
 
 @login_required
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.visible(), id=post_id)
     if post.author != request.user:
         return redirect('posts:post_detail', post_id)
     form = PostForm(
         request.POST or None,
-        files=request.FILES or None,
+        files=uploaded_files(request),
         instance=post
     )
     if form.is_valid():
-        form.save()
+        post = form.save()
+        if 'image' in form.changed_data and post.image:
+            prepare_image.delay(post.pk)
         return redirect('posts:post_detail', post_id)
     context = {
         'post': post,
@@ -107,9 +181,35 @@ def post_edit(request, post_id):
     return render(request, 'posts/post_create.html', context)
 
 
+@login_required
+def post_history(request, post_id):
+    """Версии поста; текст выбранной версии восстанавливается по запросу."""
+    post = get_object_or_404(Post.objects.visible(), id=post_id)
+    if post.author != request.user:
+        return redirect('posts:post_detail', post_id)
+    versions = list(post.revisions.defer('data').order_by('-number'))
+    try:
+        number = int(request.GET.get('version', ''))
+    except ValueError:
+        number = versions[0].number if versions else None
+    selected = next(
+        (version for version in versions if version.number == number), None
+    )
+    context = {
+        'post': post,
+        'versions': versions,
+        'selected': selected,
+        # Старые версии показываются редко: HTML для них не храним.
+        'text_html': markdown.render(
+            revisions.text_at(post.pk, number) if selected else post.text
+        ),
+    }
+    return render(request, 'posts/post_history.html', context)
+
+
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.visible(), id=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
@@ -121,18 +221,18 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post = Post.objects.select_related('author', 'group').filter(
+    post = Post.objects.visible().filter(
         author__following__user=request.user
     )
     context = {
-        'page_obj': paginate_page(request, post),
+        'page_obj': paginate(request, post),
     }
-    return render(request, 'posts/follow.html', context)
+    return render_listing(request, 'posts/follow.html', context)
 
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = active_author_or_404(username)
     if request.user != author:
         Follow.objects.get_or_create(user=request.user, author=author)
     return redirect('posts:profile', username)
@@ -140,6 +240,6 @@ def profile_follow(request, username):
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = users_by_username.get_or_404(username)
     Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username)
@@ -0,0 +1,200 @@
+"""Прогрев кэшей популярного.
+
+После выкладки, перезапуска или сброса кэша первые посетители главной,
+популярных групп, профилей и постов одновременно ходят в базу за
+группами и авторами, создают миниатюры карточек и рисуют кэшируемые
+страницы. ``warm`` заранее заполняет эти кэши:
+
+* миниатюры sorl (хранилище и таблица sorl общие для процессов);
+* карты идентичности (``posts.identity``) групп и авторов;
+* кэшируемые страницы: главную (``core.stale``), ленту сайта и ленты
+  групп (``posts.feeds``). Они проходят через обычный обработчик Django
+  со всеми middleware в ``WARMUP_WORKERS`` потоков.
+
+Посты выбираются по счетчикам: популярное (недавние комментарии) и
+самые просматриваемые, не больше ``WARMUP_LIMIT`` каждого вида;
+группы и авторы — этих постов. Полных агрегатов по таблицам нет.
+
+Главная лежит в кэше ``pages``, он у каждого процесса свой. Карты
+идентичности и ленты при ``LocMemCache`` тоже. Поэтому команда
+``warm_caches`` прогревает их, только если основной кэш общий
+(memcached), а главную — никогда. При ``WARMUP_IN_PROCESS`` процесс
+сайта прогревает себя сам: после первого запроса (на его хосте) и
+после сброса лент (``schedule``), не чаще раза в ``WARMUP_DELAY``
+секунд.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.handlers.base import BaseHandler
+from django.db import connections
+from django.test import RequestFactory
+from django.urls import reverse
+
+from core.thumbnails import preload
+
+from .identity import groups_by_slug, users_by_username
+from .listings import CARD_THUMBNAIL
+from .models import Post, PostStats
+from .trending import trending_ids
+
+logger = logging.getLogger(__name__)
+
+_handler = None
+_host = None
+_started = False
+_timer = None
+_timer_lock = threading.Lock()
+
+
+def shared_cache():
+    """Видят ли основной кэш другие процессы."""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def popular_posts(limit=None):
+    """Видимые посты из популярного и самые просматриваемые."""
+    limit = limit or settings.WARMUP_LIMIT
+    post_ids = trending_ids()[:limit]
+    post_ids += [
+        post_id for post_id in PostStats.objects.filter(
+            post__in=Post.objects.visible()
+        ).order_by('-views').values_list('post_id', flat=True)[:limit]
+        if post_id not in post_ids
+    ]
+    return list(
+        Post.objects.visible().filter(
+            id__in=post_ids
+        ).select_related('author', 'group')
+    )
+
+
+def handler():
+    """Обработчик со всеми middleware, но без сигналов начала и конца
+    запроса: они закрывали бы соединения потока, который ждет сайт."""
+    global _handler
+    if _handler is None:
+        base = BaseHandler()
+        base.load_middleware()
+        _handler = base
+    return _handler
+
+
+def fetch(url, host):
+    request = RequestFactory().get(url, HTTP_HOST=host)
+    response = handler().get_response(request)
+    if response.streaming:
+        # Ленты сохраняются в кэш, когда поток дочитан до конца.
+        for _ in response.streaming_content:
+            pass
+    return response.status_code
+
+
+def fetch_in_thread(url, host):
+    try:
+        return fetch(url, host)
+    except Exception:
+        logger.exception('Не удалось прогреть %s', url)
+        return None
+    finally:
+        connections.close_all()
+
+
+def fetch_all(urls, host, workers=None):
+    """Словарь ``адрес -> код ответа`` (None — ошибка).
+
+    При ``workers=1`` запросы идут в текущем потоке и его соединении.
+    """
+    workers = workers or settings.WARMUP_WORKERS
+    if workers == 1:
+        return {url: fetch(url, host) for url in urls}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(
+            urls, pool.map(fetch_in_thread, urls, [host] * len(urls))
+        ))
+
+
+def warm(limit=None, local=True, workers=None, host=None):
+    """Прогревает кэши; словарь ``вид -> сколько прогрето``.
+
+    ``local=False`` — прогрев из отдельного процесса: кэши, которые
+    процесс сайта держит у себя, пропускаются.
+    """
+    posts = popular_posts(limit)
+    with_images = [post for post in posts if post.image]
+    geometry, options = CARD_THUMBNAIL
+    preload(with_images, geometry, options)
+    counts = {
+        'thumbnails': sum(
+            post.thumbnail is not None for post in with_images
+        ),
+        'groups': 0,
+        'authors': 0,
+        'pages': 0,
+    }
+    if not local and not shared_cache():
+        return counts
+    slugs = {
+        post.group.slug for post in posts
+        if post.group is not None and not post.group.is_hidden
+    }
+    usernames = {post.author.username for post in posts}
+    for slug in slugs:
+        groups_by_slug.get(slug)
+    for username in usernames:
+        users_by_username.get(username)
+    urls = [reverse('posts:index')] if local else []
+    urls.append(reverse('posts:site_feed'))
+    urls += [reverse('posts:group_feed', args=[slug]) for slug in slugs]
+    statuses = fetch_all(urls, host or _host or settings.WARMUP_HOST, workers)
+    counts.update(
+        groups=len(slugs),
+        authors=len(usernames),
+        pages=sum(status == 200 for status in statuses.values()),
+    )
+    return counts
+
+
+def run_scheduled():
+    global _timer
+    with _timer_lock:
+        _timer = None
+    try:
+        warm()
+    except Exception:
+        logger.exception('Прогрев кэшей не удался')
+    finally:
+        connections.close_all()
+
+
+def schedule():
+    """Прогрев этого процесса через ``WARMUP_DELAY`` секунд.
+
+    Сбросы, пришедшие до запуска, прогрев не повторяют.
+    """
+    global _timer
+    if not settings.WARMUP_IN_PROCESS:
+        return
+    with _timer_lock:
+        if _timer is not None:
+            return
+        _timer = threading.Timer(settings.WARMUP_DELAY, run_scheduled)
+        _timer.daemon = True
+        _timer.start()
+
+
+def schedule_once(environ=None):
+    """Первый запрос процесса запоминает хост и планирует прогрев;
+    остальные ничего не делают."""
+    global _host, _started
+    if not settings.WARMUP_IN_PROCESS or _started:
+        return
+    _started = True
+    if environ:
+        _host = environ.get('HTTP_HOST') or environ.get('SERVER_NAME')
+    schedule()
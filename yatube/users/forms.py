@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
+
+from .jobs import send_password_reset
 
 User = get_user_model()
 
@@ -8,3 +10,20 @@ class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class DeferredPasswordResetForm(PasswordResetForm):
+    """Письмо рендерит и отправляет фоновая задача.
+
+    В очередь уходят только id пользователя и имена шаблонов: токен
+    сброса создает воркер, и в таблице задач он не хранится.
+    """
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        send_password_reset.delay(
+            context['user'].pk, subject_template_name, email_template_name,
+            from_email, context['domain'], context['site_name'],
+            context['protocol'], html_email_template_name,
+        )
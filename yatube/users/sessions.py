@@ -0,0 +1,135 @@
+"""Сессии в общем кэше с отложенной записью в базу.
+
+Создание сессии (вход пользователя) сразу пишется и в кэш, и в базу,
+поэтому сессию видит любой процесс. Дальнейшие изменения попадают только
+в кэш, а в ``django_session`` уходят пачкой раз в
+``SESSION_WRITE_BEHIND_INTERVAL`` секунд или при накоплении
+``SESSION_WRITE_BEHIND_BATCH`` изменённых сессий. До записи процесс
+держит у себя и копию изменений: вытеснение из кэша их не теряет.
+
+Все это работает только с кэшем, общим для процессов
+(``SESSION_WRITE_BEHIND``). С ``LocMemCache`` выход из аккаунта в одном
+процессе не увидели бы остальные, поэтому без общего кэша сессии
+читаются и пишутся прямо в базу, как в ``sessions.backends.db``.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import \
+    SessionStore as CachedDBStore
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.contrib.sessions.models import Session
+from django.db import DatabaseError, transaction
+
+logger = logging.getLogger(__name__)
+
+# Ключ сессии -> ее данные на момент последнего изменения.
+_dirty = {}
+_dirty_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = 'users.sessions.'
+
+    def load(self):
+        if not settings.SESSION_WRITE_BEHIND:
+            return DBStore.load(self)
+        return super().load()
+
+    def exists(self, session_key):
+        if not settings.SESSION_WRITE_BEHIND:
+            return DBStore.exists(self, session_key)
+        return super().exists(session_key)
+
+    def save(self, must_create=False):
+        if not settings.SESSION_WRITE_BEHIND:
+            return DBStore.save(self, must_create)
+        if must_create or self.session_key is None:
+            return super().save(must_create)
+        self._cache.set(self.cache_key, self._session, self.get_expiry_age())
+        mark_dirty(self.session_key, self._session)
+
+    def delete(self, session_key=None):
+        if not settings.SESSION_WRITE_BEHIND:
+            return DBStore.delete(self, session_key)
+        key = session_key or self.session_key
+        with _dirty_lock:
+            _dirty.pop(key, None)
+        return super().delete(session_key)
+
+
+def mark_dirty(session_key, data):
+    global _last_flush
+    with _dirty_lock:
+        _dirty[session_key] = dict(data)
+        due = (
+            len(_dirty) >= settings.SESSION_WRITE_BEHIND_BATCH
+            or time.monotonic() - _last_flush
+            >= settings.SESSION_WRITE_BEHIND_INTERVAL
+        )
+        if due:
+            _last_flush = time.monotonic()
+    if due:
+        try:
+            flush_dirty_sessions()
+        except DatabaseError as error:
+            # Изменения остались в очереди и уйдут со следующим сбросом.
+            logger.warning('Сессии не сохранены: %s', error)
+
+
+def flush_dirty_sessions():
+    """Переносит изменённые сессии из кэша в базу двумя запросами.
+
+    Если запись не удалась, сессии возвращаются в очередь.
+    """
+    with _dirty_lock:
+        dirty = dict(_dirty)
+        _dirty.clear()
+    if not dirty:
+        return 0
+    try:
+        return write_sessions(dirty)
+    except DatabaseError:
+        with _dirty_lock:
+            # Изменения, сделанные во время записи, новее.
+            for key, data in dirty.items():
+                _dirty.setdefault(key, data)
+        raise
+
+
+def write_sessions(dirty):
+    sessions = []
+    for key, changed in dirty.items():
+        store = SessionStore(key)
+        # В общем кэше может быть версия новее, из другого процесса;
+        # если ее вытеснили, пишем свою копию.
+        data = store._cache.get(store.cache_key)
+        if data is None:
+            data = changed
+        store._session_cache = data
+        sessions.append(store.create_model_instance(data))
+    existing = set(Session.objects.filter(
+        session_key__in=[session.session_key for session in sessions]
+    ).values_list('session_key', flat=True))
+    with transaction.atomic():
+        Session.objects.bulk_update(
+            [s for s in sessions if s.session_key in existing],
+            ['session_data', 'expire_date'],
+        )
+        Session.objects.bulk_create(
+            [s for s in sessions if s.session_key not in existing],
+            ignore_conflicts=True,
+        )
+    return len(sessions)
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        flush_dirty_sessions()
+    except DatabaseError as error:
+        logger.warning('Сессии не сохранены при остановке: %s', error)
@@ -0,0 +1,121 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .middleware import user_cache_key
+from .sessions import SessionStore, flush_dirty_sessions
+
+User = get_user_model()
+
+
+@override_settings(SESSION_WRITE_BEHIND=True, USER_CACHE=True)
+class CachedSessionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth', password='pass')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_authenticated_request_skips_session_and_user_tables(self):
+        """Повторный запрос не читает django_session и auth_user."""
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.context['user'], self.user)
+        tables = ' '.join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn('django_session', tables)
+        self.assertNotIn('auth_user', tables)
+
+    def test_user_save_invalidates_cache(self):
+        """Сохранение пользователя сбрасывает его копию в кэше."""
+        self.authorized_client.get(reverse('about:author'))
+        self.assertIsNotNone(cache.get(user_cache_key(self.user.pk)))
+        self.user.first_name = 'Новое'
+        self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+
+    def test_password_change_logs_out_other_sessions(self):
+        """Смена пароля завершает сессию даже при закэшированном
+        пользователе."""
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password')
+        user.save()
+        response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_session_changes_are_written_behind(self):
+        """Изменения сессии попадают в базу только при сбросе."""
+        store = SessionStore()
+        store['step'] = 1
+        store.create()
+        store['step'] = 2
+        store.save()
+        stored = Session.objects.get(session_key=store.session_key)
+        self.assertEqual(stored.get_decoded()['step'], 1)
+        self.assertEqual(SessionStore(store.session_key)['step'], 2)
+        flush_dirty_sessions()
+        stored = Session.objects.get(session_key=store.session_key)
+        self.assertEqual(stored.get_decoded()['step'], 2)
+
+    def test_evicted_session_changes_are_not_lost(self):
+        """Вытесненная из кэша сессия пишется из копии процесса."""
+        store = SessionStore()
+        store['step'] = 1
+        store.create()
+        store['step'] = 2
+        store.save()
+        cache.delete(store.cache_key)
+        flush_dirty_sessions()
+        stored = Session.objects.get(session_key=store.session_key)
+        self.assertEqual(stored.get_decoded()['step'], 2)
+
+    def test_failed_flush_keeps_sessions_queued(self):
+        """Ошибка базы при сбросе не теряет сессии и не роняет запрос."""
+        store = SessionStore()
+        store['step'] = 1
+        store.create()
+        locked = OperationalError('database is locked')
+        with mock.patch.object(
+            Session.objects, 'bulk_update', side_effect=locked
+        ), override_settings(SESSION_WRITE_BEHIND_BATCH=1), \
+                self.assertLogs('users.sessions', 'WARNING'):
+            store['step'] = 2
+            store.save()
+        flush_dirty_sessions()
+        stored = Session.objects.get(session_key=store.session_key)
+        self.assertEqual(stored.get_decoded()['step'], 2)
+
+    @override_settings(USER_CACHE=False)
+    def test_user_is_not_cached_without_shared_cache(self):
+        """Без общего кэша пользователь не кэшируется в процессе."""
+        self.authorized_client.get(reverse('about:author'))
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+
+    @override_settings(SESSION_WRITE_BEHIND=False)
+    def test_sessions_go_to_database_without_shared_cache(self):
+        """Без общего кэша сессия сразу пишется и читается из базы."""
+        store = SessionStore()
+        store['step'] = 1
+        store.create()
+        store['step'] = 2
+        store.save()
+        stored = Session.objects.get(session_key=store.session_key)
+        self.assertEqual(stored.get_decoded()['step'], 2)
+        self.assertIsNone(cache.get(store.cache_key))
+        store.delete()
+        self.assertFalse(SessionStore().exists(store.session_key))
@@ -35,8 +35,9 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'core.breaker.CircuitBreakerMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
@@ -62,15 +63,48 @@ TEMPLATES = [
             ],
         },
     },
+    {
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [os.path.join(BASE_DIR, 'templates', 'jinja2')],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'environment': 'core.jinja.environment',
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
 ]
 
+# Движок для лент и страницы поста: 'django' или 'jinja2'.
+POSTS_TEMPLATE_ENGINE = os.getenv('POSTS_TEMPLATE_ENGINE', 'django')
+# Ленты групп, авторов и подписок отдаются потоком (posts/streaming.py),
+# если их пространство имен не в BREAKER_NAMESPACES: с потока
+# предохранитель не снимает копию.
+POSTS_STREAMING = bool(strtobool(os.getenv('POSTS_STREAMING', 'False')))
+POSTS_STREAM_BATCH = 5
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'OPTIONS': {
+            'timeout': int(os.getenv('SQLITE_TIMEOUT', '20')),
+            'transaction_mode': 'DEFERRED',
+            'serialize_writes': bool(
+                strtobool(os.getenv('SQLITE_SERIALIZE_WRITES', 'True'))
+            ),
+            'pragmas': {
+                'journal_mode': 'wal',
+                'synchronous': 'normal',
+                'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', '134217728')),
+            },
+        },
     }
 }
 
@@ -105,21 +139,133 @@ NUMBER_OF_POSTS = 10
 SYMBOL_OF_POSTS = 15
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.getenv('STATIC_ROOT', os.path.join(BASE_DIR, 'staticfiles'))
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
 LOGIN_URL = 'users:login'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+# Миниатюры sorl сам называет по ключу, адресация по содержимому им не нужна.
+THUMBNAIL_STORAGE = 'django.core.files.storage.FileSystemStorage'
+THUMBNAIL_KVSTORE = 'core.thumbnails.KVStore'
+# Сколько секунд файл без ссылок ждет удаления командой gc_media: форма
+# могла сохранить файл, но еще не сохранить пост.
+MEDIA_GC_GRACE = int(os.getenv('MEDIA_GC_GRACE', 60 * 60))
+FILE_UPLOAD_HANDLERS = ['core.uploads.BoundedUploadHandler']
+UPLOAD_MAX_SIZE = int(os.getenv('UPLOAD_MAX_SIZE', 10 * 2 ** 20))
+UPLOAD_MAX_PIXELS = int(os.getenv('UPLOAD_MAX_PIXELS', 40 * 10 ** 6))
+IMAGE_CACHE_ROOT = os.getenv(
+    'IMAGE_CACHE_ROOT', os.path.join(BASE_DIR, 'image_cache')
+)
+IMAGE_CACHE_MAX_SIZE = int(os.getenv('IMAGE_CACHE_MAX_SIZE', 512 * 2 ** 20))
+IMAGE_MAX_SIDE = 2048
+IMAGE_LOCK_STRIPES = 64
+MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', 60 * 60 * 24))
+# Внутренний location nginx, например '/protected-media/'. Пусто — файлы
+# отдает само приложение.
+MEDIA_ACCEL_REDIRECT = os.getenv('MEDIA_ACCEL_REDIRECT', '')
 LOGIN_REDIRECT_URL = 'posts:index'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+# Общий для процессов кэш: MEMCACHED_LOCATION=host:port[,host:port]
+# (нужен пакет pymemcache). Без него у каждого процесса свой LocMemCache.
+MEMCACHED_LOCATION = os.getenv('MEMCACHED_LOCATION')
+if MEMCACHED_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': MEMCACHED_LOCATION.split(','),
+        }
     }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+# Копии страниц (core/stale.py, core/breaker.py) — в отдельном кэше
+# процесса ограниченного размера: они не вытесняют сессии и карты
+# идентичности из основного.
+CACHES['pages'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'pages',
+    'OPTIONS': {'MAX_ENTRIES': 1000},
 }
 
+SESSION_ENGINE = 'users.sessions'
+# Отложенная запись сессий возможна только при общем кэше.
+SESSION_WRITE_BEHIND = bool(MEMCACHED_LOCATION)
+SESSION_WRITE_BEHIND_INTERVAL = 30
+SESSION_WRITE_BEHIND_BATCH = 500
+# Копия пользователя в кэше: тоже только при общем кэше, иначе смену
+# пароля и блокировку не увидели бы другие процессы.
+USER_CACHE = bool(MEMCACHED_LOCATION)
+USER_CACHE_TIMEOUT = 300
+
+IDENTITY_CACHE_TIMEOUT = 300
+IDENTITY_NEGATIVE_TIMEOUT = 10
+IDENTITY_LOCAL_TTL = 5
+IDENTITY_LOCAL_SIZE = 1024
+
+JOBS_ALWAYS_EAGER = bool(strtobool(os.getenv('JOBS_ALWAYS_EAGER', 'False')))
+JOBS_WORKERS = int(os.getenv('JOBS_WORKERS', '2'))
+JOBS_BATCH_SIZE = 50
+JOBS_LOCK_TIMEOUT = 600
+JOBS_RELEASE_INTERVAL = 60
+JOBS_RETRY_BASE_DELAY = 5
+JOBS_RETRY_MAX_DELAY = 3600
+
+TRENDING_HALF_LIFE = int(os.getenv('TRENDING_HALF_LIFE', 6 * 60 * 60))
+TRENDING_SIZE = 20
+TRENDING_MIN_SCORE = 0.05
+
+VIEWS_FLUSH_INTERVAL = 30
+VIEWS_FLUSH_BATCH = 500
+
+PURGE_CHUNK_SIZE = 200
+
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 365))
+
+REVISION_SNAPSHOT_EVERY = 10
+
+FEEDS_SIZE = 50
+FEEDS_MAX_AGE = 300
+FEEDS_CACHE_TIMEOUT = 60 * 60
+# Ответы кэшируются сжатыми; memcached не примет значение больше 1 МБ.
+FEEDS_CACHE_MAX_SIZE = 1000 * 1000
+# Больше 50 000 адресов в одном файле протокол sitemap не допускает.
+SITEMAP_SHARD_SIZE = 50000
+
+# Прогрев кэшей популярного (posts/warmup.py, команда warm_caches).
+WARMUP_LIMIT = 20
+WARMUP_IN_PROCESS = bool(strtobool(os.getenv('WARMUP_IN_PROCESS', 'False')))
+WARMUP_DELAY = 5
+WARMUP_WORKERS = 4
+# Хост, для которого команда warm_caches рисует страницы (в ссылках
+# лент он абсолютный). Процесс сайта берет хост своего первого запроса.
+WARMUP_HOST = os.getenv('WARMUP_HOST', 'localhost')
+
+ADMIN_COUNT_CACHE_TIMEOUT = 60
+
+# Устаревшие копии страниц (core/stale.py) и предохранитель базы
+# (core/breaker.py).
+PAGE_CACHE_STALE_TTL = 24 * 60 * 60
+# Параметры адреса, от которых зависят копии; остальные (метки рекламных
+# кампаний и т. п.) отбрасываются и новых копий не создают.
+PAGE_CACHE_QUERY_PARAMS = ('page',)
+PAGE_CACHE_REFRESH_LOCK = 60
+STALE_COPY_INTERVAL = 60
+STALE_COPY_TTL = 24 * 60 * 60
+BREAKER_NAMESPACES = ('posts', 'about')
+BREAKER_WINDOW = 10
+BREAKER_MIN_REQUESTS = 10
+BREAKER_FAILURE_RATE = 0.5
+BREAKER_SLOW_DB_TIME = 1.0
+BREAKER_COOLDOWN = 30
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]